@@ -6,19 +6,39 @@ import os
 import logging
 import math
 import fnmatch
+from collections import deque, OrderedDict
 
 # 🟢 ОБНОВЛЕННЫЕ ИМПОРТЫ 
-from PyQt5.QtWidgets import QMessageBox, QLabel, QGraphicsOpacityEffect, QWidget 
-from PyQt5.QtCore import QTimer, Qt, QSize, QCoreApplication, QPropertyAnimation 
+from PyQt5.QtWidgets import QMessageBox, QLabel, QGraphicsOpacityEffect, QWidget, QProgressDialog 
+from PyQt5.QtCore import QTimer, Qt, QSize, QCoreApplication, QPropertyAnimation, QThread 
+from PyQt5.QtGui import QPixmap
 
 # --- ИМПОРТЫ ИЗ main_app.py (должны быть доступны) ---
 from config import (
     CONSOLE_SETTINGS, CURRENT_CONSOLE, 
     ITEM_WIDTH, ITEM_HEIGHT, 
-    ALLOWED_COVER_EXTENSIONS 
+    ALLOWED_COVER_EXTENSIONS, CATALOG_PATH, SNAPSHOT_DIR, WATCHER_DEBOUNCE_MS,
+    GAME_BATCH_SIZE, GAME_BATCH_INTERVAL_MS, WIDGET_BUILD_CHUNK,
+    CONSOLE_CACHE_MAX_MB, WIDGET_OVERHEAD_BYTES,
+    PRESCAN_ENABLED, PRESCAN_DELAY_MS, ROOT_PRECEDENCE,
+    HASHING_ENABLED, HASH_WORKERS, HASH_CHUNK_SIZE,
+    DAT_DIR, DAT_CACHE_DIR, DAT_CANONICAL_TITLES,
+    DUPLICATE_SCAN_ENABLED, HIDE_DUPLICATES,
+    EXTRACT_CACHE_DIR, EXTRACT_CACHE_MAX_MB, UNRAR_PATH, PLAYLIST_DIR, IO_WORKERS, DEDUPE_HARDLINKS
 )
-from threads import EmulatorMonitorThread, ImageLoaderThread, GameLoaderThread
-from widgets import GameItem, DescriptionWindow, extract_short_info 
+from catalog import GameCatalog
+from threads import (
+    EmulatorMonitorThread, CoverLoader, GameLoaderThread, FolderProbeThread, 
+    RomHashThread, DatLoaderThread, DuplicateScanThread, ExtractionThread
+)
+from watcher import RomLibraryWatcher
+from scanner import console_roots, scan_filter_for
+from datfile import find_dat_files
+from archives import ARCHIVE_EXTENSIONS, ARCHIVE_OK, is_archive
+from extract_cache import ExtractionCache
+from discs import write_playlist
+from io_scheduler import IOScheduler, PRIORITY_ACTIVE, PRIORITY_PREFETCH
+from widgets import GameItem, DescriptionWindow, EmptyFoldersWindow, extract_short_info 
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +61,11 @@ class AppLogicMixin:
         self.console_buttons = {}
         # Инициализация путей, используемых в новых методах
         self.current_rom_path = None
+        self.current_rom_roots = []
+        # 🟢 Кэш распаковки ROM'ов из архивов для эмуляторов без поддержки .zip/.rar
+        self.extraction_cache = ExtractionCache(EXTRACT_CACHE_DIR, EXTRACT_CACHE_MAX_MB * 1024 * 1024, UNRAR_PATH)
+        self.extract_thread = None
+        self.extract_console = None
         self.rom_extensions = []
         # 🟢 НОВЫЙ АТРИБУТ: Для сохранения ссылок на объекты анимации
         self.active_animations = [] 
@@ -48,10 +73,82 @@ class AppLogicMixin:
         self.loading_label = None 
         # 💡 КРИТИЧНО: Для сохранения полного списка ROM'ов
         self._all_roms_list = [] 
+        # 🟢 Персистентный каталог: сетка заполняется из него до окончания сканирования
+        self.catalog = self._open_catalog()
+        # 🟢 Наблюдение за ROM_PATH: новые/удалённые игры без полного пересканирования
+        self.library_watcher = RomLibraryWatcher(WATCHER_DEBOUNCE_MS, parent=self)
+        self.library_watcher.changes_detected.connect(self.handle_library_changes)
+        for console_key, settings in CONSOLE_SETTINGS.items():
+            for root_folder in console_roots(settings):
+                self.library_watcher.watch_root(console_key, root_folder)
+        # 🟢 Общий планировщик фонового ввода-вывода: сканирование и обложки в одной очереди
+        self.io_scheduler = IOScheduler(IO_WORKERS, name="retro-io")
+        self.cover_loader = CoverLoader(self.io_scheduler, ALLOWED_COVER_EXTENSIONS, parent=self)
+        self.cover_loader.image_ready.connect(self.handle_image_ready)
+        # Обложки плиток, попавших в область прокрутки, поднимаются в начало очереди
+        self._visible_covers_timer = QTimer(self)
+        self._visible_covers_timer.setSingleShot(True)
+        self._visible_covers_timer.setInterval(50)
+        self._visible_covers_timer.timeout.connect(self._prioritize_visible_covers)
+        # 🟢 Пакетное создание виджетов: по WIDGET_BUILD_CHUNK за проход цикла событий
+        self._pending_game_items = deque()
+        self._deferred_layout = None
+        self._widget_build_timer = QTimer(self)
+        self._widget_build_timer.setInterval(0)
+        self._widget_build_timer.timeout.connect(self._build_pending_game_items)
+        # 🟢 Кэш сеток консолей: {консоль: {'roms', 'items', 'dirty'}} в порядке LRU
+        self._console_states = OrderedDict()
+        self._grid_console = None
+        self._grid_complete = False
+        # 🟢 Фоновое предсканирование неактивных консолей (прогрев каталога)
+        self.prescan_thread = None
+        self._prescanned = set()
+        self._prescan_timer = QTimer(self)
+        self._prescan_timer.setSingleShot(True)
+        self._prescan_timer.setInterval(PRESCAN_DELAY_MS)
+        self._prescan_timer.timeout.connect(self._start_next_prescan)
+        # 🟢 Хэши содержимого ROM'ов: {FULL_ROM_PATH: {'size', 'crc32', 'md5', 'sha1'}}
+        self.hash_thread = None
+        self.rom_hashes = {}
+        # 🟢 Опознание дампов по DAT (No-Intro/Redump): {FULL_ROM_PATH: DatEntry}
+        self.dat_index = None
+        self.dat_matches = {}
+        self.dat_thread = None
+        self._start_dat_loader()
+        # 🟢 Дубликаты: последний отчёт и скрытые папки активной консоли
+        self.duplicate_thread = None
+        self.duplicate_groups = []
+        self._hidden_duplicates = set()
+        # 🟢 Папки без ROM'ов по консолям (для списка в футере): {консоль: [пути]}
+        self.empty_folders = {}
         
         # self.rom_list, self.game_loader_thread, self.threads 
         # инициализированы в main_app.py
 
+    def _open_catalog(self):
+        """Открывает каталог; при ошибке лаунчер работает без него (полное сканирование)."""
+        try:
+            return GameCatalog(CATALOG_PATH, snapshot_dir=SNAPSHOT_DIR)
+        except Exception as e:
+            logger.error(f"Не удалось открыть каталог игр {CATALOG_PATH}: {e}")
+            return None
+
+    def _load_catalog_roms(self, console_key):
+        """
+        Возвращает записи консоли из каталога (пустой список, если каталога нет).
+        ⚡ Сначала — из бинарного снимка: записи ленивые, поля читаются при отрисовке.
+        """
+        if self.catalog is None:
+            return []
+        try:
+            snapshot_roms = self.catalog.load_snapshot(console_key)
+            if snapshot_roms is not None:
+                return snapshot_roms
+            return self.catalog.load_console(console_key)
+        except Exception as e:
+            logger.error(f"Ошибка чтения каталога для {console_key}: {e}")
+            return []
+
     # ----------------------------------------------------------------------
     # МЕТОДЫ: update_rom_folder и load_roms (Вернули метку загрузки + 34pt)
     # ----------------------------------------------------------------------
@@ -60,27 +157,51 @@ class AppLogicMixin:
         """Обновляет путь к ROM'ам в зависимости от выбранной консоли."""
         
         settings = CONSOLE_SETTINGS.get(console_key, {})
-        self.current_rom_path = settings.get("ROM_PATH") 
+        # 🟢 Несколько корней: сканируются только доступные (внешний диск может быть отключён)
+        all_roots = console_roots(settings)
+        self.current_rom_roots = [root for root in all_roots if os.path.isdir(root)]
+        self.current_rom_path = self.current_rom_roots[0] if self.current_rom_roots else None
         self.rom_extensions = settings.get("ROM_EXTENSIONS", [])
         
-        if not self.current_rom_path or not os.path.isdir(self.current_rom_path):
-            logger.error(f"Папка ROM'ов не найдена для {console_key}: {self.current_rom_path}")
+        if not self.current_rom_path:
+            logger.error(f"Папка ROM'ов не найдена для {console_key}: {', '.join(all_roots)}")
             self.layout_roms([]) 
         else:
-            logger.info(f"Установлена папка ROM'ов для {console_key}: {self.current_rom_path}")
+            logger.info(f"Установлены папки ROM'ов для {console_key}: {', '.join(self.current_rom_roots)}")
 
 
     def load_roms(self, apply_layout=True):
         """Запускает поток загрузки игр, который сканирует папку ROM'ов."""
-        if hasattr(self, 'game_loader_thread') and self.game_loader_thread and self.game_loader_thread.isRunning():
-            self.game_loader_thread.requestInterruption()
-            self.game_loader_thread.wait()
+        # Видимая пользователю работа важнее прогрева каталога
+        self._stop_prescan()
+        self._stop_hashing()
+        
+        self._stop_game_loader()
+        
+        # 🟢 КЭШ КОНСОЛЕЙ: Сетка уходящей консоли сохраняется, а не уничтожается
+        grid_incomplete = bool(self._pending_game_items) or not self._grid_complete
+        if self._grid_console is not None and self._grid_console != CURRENT_CONSOLE:
+            self._park_console_state(self._grid_console, dirty=grid_incomplete)
+        self._grid_console = CURRENT_CONSOLE
+        self._grid_complete = False
+        self._update_empty_folders_button()
+            
+        # Недостроенные виджеты прошлой консоли больше не нужны
+        self._pending_game_items.clear()
+        self._deferred_layout = None
+        self._widget_build_timer.stop()
             
         if hasattr(self, 'clear_grid'): self.clear_grid() 
         
         if not self.current_rom_path:
              logger.warning("Путь к ROM'ам не установлен. Загрузка пропущена.")
              return
+        
+        # Консоль уже была открыта: показываем готовые виджеты без обращения к диску
+        state = self._console_states.pop(CURRENT_CONSOLE, None)
+        if state is not None:
+            self._restore_console_state(CURRENT_CONSOLE, state, apply_layout)
+            return
              
         # 🟢 ВОЗВРАТ: Отображаем индикатор загрузки
         if hasattr(self, 'grid_layout') and hasattr(self, 'grid_widget'):
@@ -102,22 +223,581 @@ class AppLogicMixin:
             self.grid_layout.addWidget(self.loading_label, 0, 0, 1, col_span, Qt.AlignCenter)
             self.grid_widget.update() 
             logger.info("Отображена надпись 'Загрузка...' в центре сетки.")
+        
+        # 🟢 КАТАЛОГ: Сразу показываем игры из прошлого сканирования, диск только сверяется
+        cached_roms = self._load_catalog_roms(CURRENT_CONSOLE)
+        self._hidden_duplicates = self._load_hidden_duplicates(CURRENT_CONSOLE)
+        if cached_roms:
+            # Виджеты строятся порциями, сетка размещается после последней порции
+            visible_roms = self._visible_roms(cached_roms)
+            self._all_roms_list = visible_roms
+            self._deferred_layout = visible_roms
+            self.handle_new_games(visible_roms)
+            logger.info(f"Из каталога загружено {len(cached_roms)} игр для {CURRENT_CONSOLE}.")
             
+        self._start_game_loader(cached_roms, apply_layout)
+
+    def _stop_game_loader(self):
+        """
+        ⚡ Прерывает сканирование без ожидания: поток дорабатывает в фоне до
+        ближайшей точки отмены (сканер проверяет её перед каждым обращением к
+        диску), а новая консоль начинает сканироваться сразу. Его пачки и
+        итог отбрасываются по проверке loader_thread.
+        """
+        loader_thread = getattr(self, 'game_loader_thread', None)
+        if loader_thread is not None and loader_thread.isRunning():
+            loader_thread.requestInterruption()
+            loader_thread.resume()
+            # Владелец — окно (parent), ссылка не нужна; объект удаляется после выхода из run()
+            loader_thread.finished.connect(loader_thread.deleteLater)
+            logger.info(f"Сканирование {loader_thread.console_key} прервано, поток завершается в фоне.")
+            self.game_loader_thread = None
+
+    def _start_game_loader(self, existing_roms, apply_layout):
+        """Создает и запускает GameLoaderThread для текущей консоли."""
         self.game_loader_thread = GameLoaderThread(
-            self.current_rom_path, 
+            self.current_rom_roots, 
             self.rom_extensions, 
             ALLOWED_COVER_EXTENSIONS, 
-            existing_roms=self._all_roms_list, 
+            existing_roms=existing_roms, 
+            console_key=CURRENT_CONSOLE,
+            catalog=self.catalog,
+            scan_workers=CONSOLE_SETTINGS.get(CURRENT_CONSOLE, {}).get("SCAN_WORKERS", 1),
+            root_precedence=ROOT_PRECEDENCE,
+            batch_size=GAME_BATCH_SIZE,
+            batch_interval_ms=GAME_BATCH_INTERVAL_MS,
+            io_scheduler=self.io_scheduler,
+            io_priority=PRIORITY_ACTIVE,
+            dedupe_hardlinks=DEDUPE_HARDLINKS,
+            scan_filter=scan_filter_for(CONSOLE_SETTINGS.get(CURRENT_CONSOLE, {})),
             parent=self 
         )
-        self.game_loader_thread.game_found.connect(self.handle_new_game_item)
+        loader_thread = self.game_loader_thread
+        self.game_loader_thread.games_found.connect(
+            lambda games: self._on_games_found(loader_thread, games)
+        )
+        self.game_loader_thread.empty_folders_found.connect(self._on_empty_folders_found)
         
-        if apply_layout:
-             self.game_loader_thread.finished_loading.connect(self.layout_roms)
+        self.game_loader_thread.scan_progress.connect(
+            lambda done, total, eta: self._on_scan_progress(loader_thread, done, total, eta)
+        )
+        self.game_loader_thread.finished_loading.connect(
+            lambda rom_list: self._on_scan_finished(loader_thread, rom_list, apply_layout)
+        )
              
         self.game_loader_thread.start()
         logger.info(f"Запущен поток загрузки игр для {CURRENT_CONSOLE}.")
 
+    def _on_games_found(self, loader_thread, games):
+        """Пачка игр от потока загрузки; пачки прерванного сканирования (уже в очереди событий) отбрасываются."""
+        if loader_thread is not self.game_loader_thread:
+            return
+        self.handle_new_games(games)
+
+    def _on_scan_progress(self, loader_thread, done, total, eta):
+        """Показывает прогресс сканирования и оценку времени на индикаторе загрузки."""
+        if loader_thread is not self.game_loader_thread or not self.loading_label or not total:
+            return
+        text = f"Загрузка... {done}/{total} ({done * 100 // total}%)"
+        if eta >= 1:
+            text += f"\nосталось ~{eta:.0f} с"
+        self.loading_label.setText(text)
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Кэш сеток консолей (LRU с ограничением по памяти)
+    # ----------------------------------------------------------------------
+    def _park_console_state(self, console_key, dirty):
+        """Снимает виджеты консоли с сетки и сохраняет их вместе с записями."""
+        for item_widget in self.game_items.values():
+            self.grid_layout.removeWidget(item_widget)
+            item_widget.setVisible(False)
+            
+        self._console_states[console_key] = {
+            'roms': self._all_roms_list,
+            'items': self.game_items,
+            # Сканирование не завершилось — при возврате нужна сверка с диском
+            'dirty': dirty,
+        }
+        self._console_states.move_to_end(console_key)
+        # Недогруженные обложки ушедшей консоли уступают очередь новой
+        self.cover_loader.prioritize(self.game_items.values(), PRIORITY_PREFETCH)
+        self.game_items = {}
+        self._all_roms_list = []
+        logger.info(f"Сетка {console_key} сохранена в кэше консолей ({len(self._console_states[console_key]['items'])} виджетов).")
+        
+        self._evict_console_states()
+
+    def _restore_console_state(self, console_key, state, apply_layout):
+        """Возвращает сохранённую сетку консоли; сверка с диском — только если кэш устарел."""
+        self.game_items = state['items']
+        self.cover_loader.prioritize(self.game_items.values(), PRIORITY_ACTIVE)
+        self._all_roms_list = state['roms']
+        self.library_watcher.set_game_folders(
+            console_key, {rom['FOLDER_NAME']: self._watch_paths(rom) for rom in self._all_roms_list}
+        )
+        self._watch_empty_folders()
+        if apply_layout:
+            self.layout_roms(self._all_roms_list)
+        logger.info(f"Сетка {console_key} восстановлена из кэша консолей без сканирования.")
+        
+        if not state['dirty']:
+            self._grid_complete = True
+            self._schedule_prescan()
+            self._start_hashing(console_key, self._all_roms_list)
+            return
+            
+        # Игры без виджета (сканирование было прервано) будут отправлены сканером заново
+        existing_roms = [rom for rom in self._all_roms_list if rom['FOLDER_NAME'] in self.game_items]
+        self._start_game_loader(existing_roms, apply_layout)
+
+    def _estimate_state_bytes(self, items):
+        """Оценка памяти сетки: пиксмап обложки + накладные расходы виджета."""
+        if not items:
+            return 0
+        sample = next(iter(items.values()))
+        size = sample.image_label.size()
+        return len(items) * (size.width() * size.height() * 4 + WIDGET_OVERHEAD_BYTES)
+
+    def _evict_console_states(self):
+        """Выгружает давно не открывавшиеся консоли, пока кэш больше CONSOLE_CACHE_MAX_MB."""
+        limit = CONSOLE_CACHE_MAX_MB * 1024 * 1024
+        total = self._estimate_state_bytes(self.game_items) + sum(
+            self._estimate_state_bytes(state['items']) for state in self._console_states.values()
+        )
+        while total > limit and self._console_states:
+            console_key, state = self._console_states.popitem(last=False)
+            total -= self._estimate_state_bytes(state['items'])
+            for item_widget in state['items'].values():
+                item_widget.setParent(None)
+                item_widget.deleteLater()
+            logger.info(f"Сетка {console_key} выгружена из кэша консолей (лимит {CONSOLE_CACHE_MAX_MB} МБ).")
+
+    def _on_scan_finished(self, loader_thread, rom_list, apply_layout):
+        """Принимает результат полного сканирования (устаревшие потоки игнорируются)."""
+        if loader_thread is not self.game_loader_thread:
+            logger.debug("Результат прерванного сканирования другой консоли отброшен.")
+            return
+            
+        rom_list = self._visible_roms(rom_list)
+        self._all_roms_list = rom_list
+        self._grid_complete = True
+        
+        # Виджеты ещё строятся порциями: размещение выполнится после последней порции
+        if self._pending_game_items:
+            if apply_layout:
+                self._deferred_layout = rom_list
+            apply_layout = False
+            
+        self.library_watcher.set_game_folders(
+            CURRENT_CONSOLE, {rom['FOLDER_NAME']: self._watch_paths(rom) for rom in rom_list}
+        )
+        self._watch_empty_folders()
+        
+        if apply_layout:
+            self.layout_roms(rom_list)
+            
+        self._schedule_prescan()
+        self._start_hashing(CURRENT_CONSOLE, rom_list)
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Фоновое предсканирование неактивных консолей
+    # ----------------------------------------------------------------------
+    def _schedule_prescan(self):
+        """Откладывает предсканирование: сначала сетка активной консоли должна успокоиться."""
+        if PRESCAN_ENABLED and self.catalog is not None:
+            self._prescan_timer.start()
+
+    def _stop_prescan(self):
+        """Прерывает предсканирование без ожидания (поток дорабатывает в фоне)."""
+        self._prescan_timer.stop()
+        if self.prescan_thread is not None and self.prescan_thread.isRunning():
+            self.prescan_thread.requestInterruption()
+            self.prescan_thread.resume()
+            logger.info(f"Предсканирование {self.prescan_thread.console_key} прервано.")
+        self.prescan_thread = None
+
+    def _is_emulator_running(self):
+        return bool(getattr(self, 'emulator_thread', None) and self.emulator_thread.isRunning())
+
+    def _start_next_prescan(self):
+        """Сканирует следующую неактивную консоль с самым низким приоритетом."""
+        if self._is_emulator_running():
+            return # Перезапуск — после закрытия эмулятора (show_launcher)
+        foreground_busy = (
+            (self.game_loader_thread is not None and self.game_loader_thread.isRunning())
+            or bool(self._pending_game_items)
+        )
+        if foreground_busy:
+            # Сетка активной консоли ещё строится — попробуем позже
+            self._schedule_prescan()
+            return
+        if self.prescan_thread is not None and self.prescan_thread.isRunning():
+            return
+            
+        for console_key, settings in CONSOLE_SETTINGS.items():
+            if console_key == CURRENT_CONSOLE or console_key in self._prescanned:
+                continue
+            state = self._console_states.get(console_key)
+            if state is not None and not state['dirty']:
+                continue # Сетка уже в кэше консолей
+            root_folders = [root for root in console_roots(settings) if os.path.isdir(root)]
+            if not root_folders:
+                self._prescanned.add(console_key)
+                continue
+                
+            self.prescan_thread = GameLoaderThread(
+                root_folders, 
+                settings.get("ROM_EXTENSIONS", []), 
+                ALLOWED_COVER_EXTENSIONS, 
+                existing_roms=None, # Записи читаются из каталога в потоке
+                console_key=console_key,
+                catalog=self.catalog,
+                scan_workers=1,
+                root_precedence=ROOT_PRECEDENCE,
+                io_scheduler=self.io_scheduler,
+                io_priority=PRIORITY_PREFETCH,
+                dedupe_hardlinks=DEDUPE_HARDLINKS,
+                scan_filter=scan_filter_for(settings),
+                parent=self 
+            )
+            prescan_thread = self.prescan_thread
+            self.prescan_thread.empty_folders_found.connect(self._on_empty_folders_found)
+            self.prescan_thread.finished_loading.connect(
+                lambda rom_list: self._on_prescan_finished(prescan_thread, rom_list)
+            )
+            self.prescan_thread.start(QThread.IdlePriority)
+            logger.info(f"Фоновое предсканирование {console_key} запущено.")
+            return
+
+    def _on_prescan_finished(self, prescan_thread, rom_list):
+        """Каталог консоли прогрет; переходим к следующей."""
+        self._prescanned.add(prescan_thread.console_key)
+        logger.info(f"Предсканирование {prescan_thread.console_key} завершено: {len(rom_list)} игр в каталоге.")
+        if prescan_thread is self.prescan_thread:
+            self.prescan_thread = None
+            self._schedule_prescan()
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Хэширование ROM'ов (пул процессов, не блокирует GUI и запуск игр)
+    # ----------------------------------------------------------------------
+    def _start_hashing(self, console_key, rom_list):
+        """Запускает хэширование файлов ROM'ов консоли (кэшированные не перечитываются)."""
+        # Архивы не читаются целиком: для опознания хватает CRC32 из их оглавления
+        archive_digests = self._archive_digests(rom_list)
+        self.rom_hashes.update(archive_digests)
+        self._apply_dat_matches(archive_digests)
+        
+        if not HASHING_ENABLED or not rom_list:
+            return
+        self._stop_hashing()
+        
+        self.hash_thread = RomHashThread(
+            console_key, 
+            [rom.get('FULL_ROM_PATH') for rom in rom_list if not is_archive(rom.get('FULL_ROM_PATH') or "")], 
+            catalog=self.catalog,
+            workers=HASH_WORKERS,
+            chunk_size=HASH_CHUNK_SIZE,
+            parent=self 
+        )
+        hash_thread = self.hash_thread
+        self.hash_thread.hash_progress.connect(
+            lambda done, total, rate: self._on_hash_progress(hash_thread, done, total, rate)
+        )
+        self.hash_thread.hashes_ready.connect(self._on_hashes_ready)
+        if self._is_emulator_running():
+            self.hash_thread.pause()
+        self.hash_thread.start(QThread.LowPriority)
+
+    @staticmethod
+    def _archive_digests(rom_list):
+        """{путь архива: {'size', 'crc32'}} первого ROM'а внутри (из оглавления, без распаковки)."""
+        digests = {}
+        for rom in rom_list:
+            archive = rom.get('ARCHIVE')
+            if archive and archive['status'] == ARCHIVE_OK and archive['members']:
+                _, size, crc = archive['members'][0]
+                if crc is not None:
+                    digests[rom['FULL_ROM_PATH']] = {'size': size, 'crc32': f"{crc:08x}"}
+        return digests
+
+    def _stop_hashing(self):
+        """Прерывает хэширование без ожидания (начатые файлы дочитываются в фоне)."""
+        if self.hash_thread is not None and self.hash_thread.isRunning():
+            self.hash_thread.requestInterruption()
+            self.hash_thread.resume()
+        self.hash_thread = None
+
+    def _console_title(self):
+        return f"Retro Hub - {CONSOLE_SETTINGS.get(CURRENT_CONSOLE, {}).get('NAME', CURRENT_CONSOLE)}"
+
+    def _on_hash_progress(self, hash_thread, done, total, rate):
+        """Прогресс хэширования — в заголовке окна (сетка уже готова)."""
+        if hash_thread is not self.hash_thread or not total:
+            return
+        if done >= total:
+            self.setWindowTitle(self._console_title())
+        else:
+            self.setWindowTitle(f"{self._console_title()} — хэширование {done}/{total} ({rate:.0f} МБ/с)")
+
+    def _on_hashes_ready(self, console_key, hashes):
+        self.rom_hashes.update(hashes)
+        logger.info(f"Хэши {console_key} готовы: {len(hashes)} файлов.")
+        self._apply_dat_matches(hashes)
+        self._start_duplicate_scan()
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Опознание дампов по DAT-файлам
+    # ----------------------------------------------------------------------
+    def _start_dat_loader(self):
+        """Загружает DAT'ы всех консолей в фоне (если они есть в DAT_DIR)."""
+        dat_paths = []
+        for settings in CONSOLE_SETTINGS.values():
+            dat_paths += [path for path in find_dat_files(DAT_DIR, settings.get("DAT_FILES", ())) if path not in dat_paths]
+        if not dat_paths:
+            return
+        self.dat_thread = DatLoaderThread(dat_paths, DAT_CACHE_DIR, parent=self)
+        self.dat_thread.index_ready.connect(self._on_dat_index_ready)
+        self.dat_thread.start(QThread.LowPriority)
+
+    def _on_dat_index_ready(self, dat_index):
+        self.dat_index = dat_index
+        self.dat_thread = None
+        self._apply_dat_matches(self.rom_hashes)
+
+    def _apply_dat_matches(self, hashes):
+        """Сопоставляет хэши с индексом DAT и подписывает готовые виджеты."""
+        if self.dat_index is None or not hashes:
+            return
+        matched = {}
+        for rom_path, digests in hashes.items():
+            dat_entry = self.dat_index.match(digests)
+            if dat_entry is not None:
+                matched[rom_path] = dat_entry
+        self.dat_matches.update(matched)
+        
+        for item_widget in self.game_items.values():
+            if item_widget.rom_path in matched:
+                item_widget.set_dat_entry(matched[item_widget.rom_path], DAT_CANONICAL_TITLES)
+                
+        verified = sum(1 for entry in matched.values() if entry.status == "verified")
+        bad = sum(1 for entry in matched.values() if entry.status == "baddump")
+        logger.info(f"Опознано по DAT: {len(matched)} из {len(hashes)} (проверенных {verified}, плохих дампов {bad}).")
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Дубликаты ROM'ов
+    # ----------------------------------------------------------------------
+    def _load_hidden_duplicates(self, console_key):
+        if not HIDE_DUPLICATES or self.catalog is None:
+            return set()
+        try:
+            return self.catalog.load_duplicates(console_key)
+        except Exception as e:
+            logger.error(f"Ошибка чтения списка дубликатов {console_key}: {e}")
+            return set()
+
+    def _visible_roms(self, rom_list):
+        """Записи без скрытых дублей (виджеты для них не создаются)."""
+        if not self._hidden_duplicates:
+            return rom_list
+        return [rom for rom in rom_list if rom['FOLDER_NAME'] not in self._hidden_duplicates]
+
+    def _start_duplicate_scan(self):
+        """Ищет дубликаты по всему каталогу в фоне (после хэширования активной консоли)."""
+        if not DUPLICATE_SCAN_ENABLED or self.catalog is None:
+            return
+        if self.duplicate_thread is not None and self.duplicate_thread.isRunning():
+            return
+        member_extensions = {
+            console_key: tuple(ext for ext in settings.get("ROM_EXTENSIONS", ()) if ext.lower() not in ARCHIVE_EXTENSIONS)
+            for console_key, settings in CONSOLE_SETTINGS.items()
+        }
+        self.duplicate_thread = DuplicateScanThread(self.catalog, member_extensions, parent=self)
+        self.duplicate_thread.duplicates_found.connect(self._on_duplicates_found)
+        self.duplicate_thread.start(QThread.LowPriority)
+
+    def _on_duplicates_found(self, groups, hidden):
+        self.duplicate_groups = groups
+        if not HIDE_DUPLICATES:
+            return
+            
+        # Сетки других консолей в кэше сверятся при следующем открытии
+        for console_key, state in self._console_states.items():
+            if any(rom['FOLDER_NAME'] in hidden.get(console_key, ()) for rom in state['roms']):
+                state['dirty'] = True
+                
+        newly_hidden = hidden.get(CURRENT_CONSOLE, set()) - self._hidden_duplicates
+        self._hidden_duplicates = hidden.get(CURRENT_CONSOLE, set())
+        if not newly_hidden:
+            return
+        for folder_name in newly_hidden:
+            item_widget = self.game_items.pop(folder_name, None)
+            if item_widget is not None:
+                self.grid_layout.removeWidget(item_widget)
+                item_widget.setParent(None)
+                item_widget.deleteLater()
+        self._all_roms_list = self._visible_roms(self._all_roms_list)
+        self._pending_game_items = deque(self._visible_roms(self._pending_game_items))
+        if self._deferred_layout is not None:
+            self._deferred_layout = self._visible_roms(self._deferred_layout)
+        logger.info(f"Скрыто дубликатов в {CURRENT_CONSOLE}: {len(newly_hidden)}.")
+        
+        search_text = self.search_input.text() if hasattr(self, 'search_input') else ""
+        self.filter_roms(search_text)
+
+    @staticmethod
+    def _header_text(rom_data):
+        """Внутреннее имя и серийный номер из заголовка ROM'а — для поиска."""
+        header = rom_data.get('HEADER') or {}
+        return f"{header.get('title', '')} {header.get('serial', '')}".lower()
+
+    def _dat_name(self, rom_data):
+        dat_entry = self.dat_matches.get(rom_data.get('FULL_ROM_PATH'))
+        return dat_entry.name if dat_entry is not None else ""
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Папки без ROM'ов
+    # ----------------------------------------------------------------------
+    def _on_empty_folders_found(self, console_key, folder_paths):
+        self.empty_folders[console_key] = folder_paths
+        if console_key == CURRENT_CONSOLE:
+            self._update_empty_folders_button()
+            self._watch_empty_folders()
+
+    def _watch_empty_folders(self):
+        """Следим и за папками без ROM'а: докопированная игра появится в сетке сразу."""
+        for folder_path in self._current_empty_folders():
+            self.library_watcher.watch_game_folder(CURRENT_CONSOLE, os.path.basename(folder_path), [folder_path])
+
+    def _current_empty_folders(self):
+        """Папки без ROM'а активной консоли (из последнего сканирования или каталога)."""
+        if CURRENT_CONSOLE not in self.empty_folders and self.catalog is not None:
+            try:
+                self.empty_folders[CURRENT_CONSOLE] = sorted(self.catalog.load_empty_folders(CURRENT_CONSOLE))
+            except Exception as e:
+                logger.error(f"Ошибка чтения папок без ROM'а {CURRENT_CONSOLE}: {e}")
+        return self.empty_folders.get(CURRENT_CONSOLE, [])
+
+    def _update_empty_folders_button(self):
+        if not hasattr(self, 'empty_folders_button'):
+            return
+        count = len(self._current_empty_folders())
+        self.empty_folders_button.setText(f"📁 Папки без ROM'ов: {count}")
+        self.empty_folders_button.setVisible(count > 0)
+
+    def show_empty_folders(self):
+        folder_paths = self._current_empty_folders()
+        console_name = CONSOLE_SETTINGS.get(CURRENT_CONSOLE, {}).get('NAME', CURRENT_CONSOLE)
+        EmptyFoldersWindow(console_name, folder_paths, parent=self).exec_()
+
+    # ----------------------------------------------------------------------
+    # МЕТОДЫ: Живое обновление по событиям файловой системы
+    # ----------------------------------------------------------------------
+    @staticmethod
+    def _watch_paths(rom_data):
+        """Папка игры и её 'Rom/' и 'images/' (если они были при сканировании — см. SIGNATURE)."""
+        paths = [rom_data['FOLDER_PATH']]
+        signature = rom_data.get('SIGNATURE')
+        if signature and signature[1] is not None:
+            paths.append(os.path.join(rom_data['FOLDER_PATH'], "Rom"))
+        # Новая или заменённая обложка (images/cartridge.*, images/cover.*) меняет только images/
+        if signature and signature[2] is not None:
+            paths.append(os.path.join(rom_data['FOLDER_PATH'], "images"))
+        # Многодисковая игра: изменения в папках остальных дисков перепроверяют эту запись
+        for disc_path in rom_data.get('DISCS') or []:
+            disc_dir = os.path.dirname(disc_path)
+            if disc_dir not in paths:
+                paths.append(disc_dir)
+        return paths
+
+    def handle_library_changes(self, console_key, folder_names, root_changed):
+        """Перепроверяет только изменившиеся папки игр консоли в фоновом потоке."""
+        settings = CONSOLE_SETTINGS.get(console_key, {})
+        is_active = console_key == CURRENT_CONSOLE
+        
+        if is_active and self.game_loader_thread and self.game_loader_thread.isRunning():
+            # Полное сканирование ещё идёт — повторим проверку после паузы
+            QTimer.singleShot(
+                WATCHER_DEBOUNCE_MS, 
+                lambda: self.handle_library_changes(console_key, folder_names, root_changed)
+            )
+            return
+            
+        probe = FolderProbeThread(
+            console_roots(settings), 
+            folder_names, 
+            settings.get("ROM_EXTENSIONS", []), 
+            ALLOWED_COVER_EXTENSIONS, 
+            existing_roms=self._all_roms_list if is_active else None, 
+            console_key=console_key,
+            catalog=self.catalog,
+            check_root=root_changed,
+            root_precedence=ROOT_PRECEDENCE,
+            io_scheduler=self.io_scheduler,
+            io_priority=PRIORITY_ACTIVE if is_active else PRIORITY_PREFETCH,
+            scan_filter=scan_filter_for(settings),
+            parent=self 
+        )
+        probe.folders_probed.connect(self.handle_probed_folders)
+        probe.empty_folders_found.connect(self._on_empty_folders_found)
+        if not hasattr(self, 'threads'): self.threads = []
+        self.threads.append(probe)
+        probe.start()
+
+    def handle_probed_folders(self, console_key, results):
+        """Добавляет, обновляет или удаляет отдельные GameItem без очистки сетки."""
+        if console_key != CURRENT_CONSOLE and console_key in self._console_states and results:
+            # Сетка неактивной консоли в кэше устарела — сверка при следующем открытии
+            self._console_states[console_key]['dirty'] = True
+        if console_key != CURRENT_CONSOLE or not results:
+            return
+            
+        roms_by_name = {rom['FOLDER_NAME']: rom for rom in self._all_roms_list}
+        removed = set()
+        
+        for folder_name, rom_data, changed in results:
+            if folder_name in self._hidden_duplicates:
+                continue # Скрытый дубль — виджета у него нет
+            if rom_data is None and folder_name not in roms_by_name:
+                # ROM'а пока нет (копирование не завершено) — ждём изменений внутри папки
+                folder_paths = [
+                    os.path.join(root_folder, folder_name) 
+                    for root_folder in console_roots(CONSOLE_SETTINGS[console_key])
+                ]
+                folder_path = next((path for path in folder_paths if os.path.isdir(path)), folder_paths[0])
+                rom_subdir = os.path.join(folder_path, "Rom")
+                self.library_watcher.watch_game_folder(
+                    console_key, folder_name, 
+                    [folder_path, rom_subdir] if os.path.isdir(rom_subdir) else [folder_path]
+                )
+            elif rom_data is None:
+                removed.add(folder_name)
+                self.library_watcher.unwatch_game_folder(console_key, folder_name)
+                item_widget = self.game_items.pop(folder_name, None)
+                if item_widget is not None:
+                    self.grid_layout.removeWidget(item_widget)
+                    item_widget.setParent(None)
+                    item_widget.deleteLater()
+                logger.info(f"Игра удалена из сетки: {folder_name}")
+            elif changed:
+                self.handle_new_game_item(rom_data)
+                self.library_watcher.watch_game_folder(console_key, folder_name, self._watch_paths(rom_data))
+                if folder_name not in roms_by_name:
+                    self._all_roms_list.append(rom_data)
+                    logger.info(f"Новая игра добавлена в сетку: {folder_name}")
+                roms_by_name[folder_name] = rom_data
+        
+        self._all_roms_list = [
+            roms_by_name[rom['FOLDER_NAME']] for rom in self._all_roms_list 
+            if rom['FOLDER_NAME'] not in removed
+        ]
+        
+        # Перестраиваем сетку с учётом текущего поиска
+        search_text = self.search_input.text() if hasattr(self, 'search_input') else ""
+        if self._all_roms_list:
+            self.filter_roms(search_text)
+        else:
+            self.layout_roms([])
+
 
     # ----------------------------------------------------------------------
     # МЕТОДЫ: switch_console, update_ui_for_console, apply_console_style, 
@@ -200,15 +880,42 @@ class AppLogicMixin:
         except Exception as e:
             logger.error(f"Ошибка при обновлении кнопок консоли: {e}")
             
+    def handle_new_games(self, games):
+        """Принимает пачку найденных игр; виджеты создаются порциями, не блокируя GUI."""
+        self._pending_game_items.extend(self._visible_roms(games))
+        if not self._widget_build_timer.isActive():
+            self._widget_build_timer.start()
+
+    def _build_pending_game_items(self):
+        """Создаёт до WIDGET_BUILD_CHUNK виджетов за один проход цикла событий."""
+        for _ in range(min(WIDGET_BUILD_CHUNK, len(self._pending_game_items))):
+            self.handle_new_game_item(self._pending_game_items.popleft())
+            
+        if not self._pending_game_items:
+            self._widget_build_timer.stop()
+            if self._deferred_layout is not None:
+                rom_list, self._deferred_layout = self._deferred_layout, None
+                self.layout_roms(rom_list)
+
     def handle_new_game_item(self, game_data):
         """Создает и кэширует новый виджет GameItem и скрывает его."""
         if not hasattr(self, 'game_items'): self.game_items = {}
         folder_name = game_data['FOLDER_NAME']
+        short_description = extract_short_info(game_data['description'])
+        
         if folder_name in self.game_items:
-            logger.debug(f"Виджет для {folder_name} уже существует в кэше UI. Пропуск.")
+            # Папка игры изменилась на диске: обновляем готовый виджет вместо пересоздания
+            item_widget = self.game_items[folder_name]
+            item_widget.update_game_data(game_data['FULL_ROM_PATH'], short_description, game_data['screenshots'])
+            dat_entry = self.dat_matches.get(game_data['FULL_ROM_PATH'])
+            if dat_entry is not item_widget.dat_entry:
+                item_widget.set_dat_entry(dat_entry, DAT_CANONICAL_TITLES)
+            item_widget.set_archive_status((game_data.get('ARCHIVE') or {}).get('status'))
+            item_widget.set_header(game_data.get('HEADER'))
+            if game_data.get('COVER_PATH') != item_widget.cover_path:
+                self._start_cover_loader(item_widget, game_data)
+            logger.debug(f"Виджет для {folder_name} уже существует в кэше UI. Данные обновлены.")
             return
-
-        short_description = extract_short_info(game_data['description'])
         
         item_widget = GameItem(
             game_folder=game_data['FOLDER_PATH'], 
@@ -216,7 +923,8 @@ class AppLogicMixin:
             description=short_description, 
             item_width=ITEM_WIDTH,      
             item_height=ITEM_HEIGHT,
-            screenshots=game_data['screenshots']
+            screenshots=game_data['screenshots'],
+            title=game_data.get('title')
         )
         item_widget.game_launched.connect(self.launch_game)
         item_widget.show_description_requested.connect(self.request_game_description)
@@ -227,28 +935,45 @@ class AppLogicMixin:
             self.grid_layout.addWidget(item_widget, 0, 0) 
             item_widget.setVisible(False) 
         
-        loader = ImageLoaderThread(
-            game_data['FOLDER_PATH'], 
-            item_widget, 
-            ALLOWED_COVER_EXTENSIONS, 
-            parent=self 
-        )
-        if not hasattr(self, 'threads'): self.threads = []
-        loader.image_ready.connect(self.handle_image_ready)
-        self.threads.append(loader)
-        loader.start()
+        self._start_cover_loader(item_widget, game_data)
+        
+        dat_entry = self.dat_matches.get(game_data['FULL_ROM_PATH'])
+        if dat_entry is not None:
+            item_widget.set_dat_entry(dat_entry, DAT_CANONICAL_TITLES)
+        if game_data.get('ARCHIVE'):
+            item_widget.set_archive_status(game_data['ARCHIVE']['status'])
+        item_widget.set_header(game_data.get('HEADER'))
         
         logger.info(f"Создан и закэширован новый СКРЫТЫЙ виджет для: {folder_name}")
 
+    def _start_cover_loader(self, item_widget, game_data):
+        """Ставит загрузку обложки виджета в очередь планировщика (приоритет активной консоли)."""
+        item_widget.cover_path = game_data.get('COVER_PATH')
+        self.cover_loader.load(item_widget, game_data['FOLDER_PATH'], item_widget.cover_path)
+
+    def _schedule_visible_covers(self, *args):
+        """Прокрутка/размещение: видимые плитки пересчитываются не чаще раза в 50 мс."""
+        self._visible_covers_timer.start()
+
+    def _prioritize_visible_covers(self):
+        """⚡ Незагруженные обложки плиток в области прокрутки — в приоритет PRIORITY_VISIBLE."""
+        visible = []
+        for item_widget in self.cover_loader.pending_widgets():
+            try:
+                if item_widget.isVisible() and not item_widget.visibleRegion().isEmpty():
+                    visible.append(item_widget)
+            except RuntimeError:
+                continue # Виджет уже удалён
+        moved = self.cover_loader.prioritize(visible)
+        if moved:
+            logger.debug(f"Обложки видимых плиток вперёд очереди: {moved}; очередь: {self.io_scheduler.queue_depths()}")
+
 
     # ----------------------------------------------------------------------
     # МЕТОД: layout_roms (ФИНАЛЬНЫЙ СТАБИЛЬНЫЙ КОД С ПРОЗРАЧНОСТЬЮ)
     # ----------------------------------------------------------------------
     def layout_roms(self, rom_list):
-        
-        if hasattr(self.game_loader_thread, 'isFinished') and self.game_loader_thread.isFinished():
-            self._all_roms_list = rom_list 
-        
+        # _all_roms_list задаётся в _on_scan_finished: здесь может прийти отфильтрованный список
         self.rom_list = rom_list 
         
         # 🟢 ВОЗВРАТ: Удаление индикатора загрузки
@@ -383,6 +1108,7 @@ class AppLogicMixin:
         self.scroll_area.viewport().update()
         self.scroll_area.update()
         
+        self._schedule_visible_covers()
         logger.info("Размещение завершено. Стабильность сетки сохранена, градиент возвращен.")
 
     def remove_all_non_spacer_items(self):
@@ -411,8 +1137,14 @@ class AppLogicMixin:
     # [ ... ОСТАЛЬНЫЕ МЕТОДЫ (Без изменений) ...]
     # ----------------------------------------------------------------------
     
-    def handle_image_ready(self, game_item_widget, pixmap):
-        game_item_widget.set_cover_pixmap(pixmap)
+    def handle_image_ready(self, game_item_widget, image):
+        # QPixmap создаётся только в GUI-потоке
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        try:
+            game_item_widget.set_cover_pixmap(pixmap)
+        except RuntimeError:
+            # Виджет уже удалён (игра исчезла с диска или сетка очищена)
+            pass
         
     def filter_roms(self, text):
         search_text = text.strip().lower()
@@ -427,6 +1159,8 @@ class AppLogicMixin:
             filtered_list = [
                 game for game in self._all_roms_list 
                 if search_text in game.get('title', '').lower()
+                or search_text in self._dat_name(game).lower()
+                or search_text in self._header_text(game)
             ]
             
         self.layout_roms(filtered_list)
@@ -466,11 +1200,22 @@ class AppLogicMixin:
         self.showNormal() 
         self.activateWindow() 
         logger.info("Главное окно лаунчера восстановлено.")
+        
+        # Эмулятор закрыт — фоновое сканирование и хэширование можно продолжить
+        if self.hash_thread is not None:
+            self.hash_thread.resume()
+        if self.prescan_thread is not None:
+            self.prescan_thread.resume()
+        else:
+            self._schedule_prescan()
 
     def launch_game(self, rom_path):
         if hasattr(self, 'emulator_thread') and self.emulator_thread and self.emulator_thread.isRunning():
             logger.warning("Эмулятор уже запущен. Игнорирование запроса на запуск.")
             return
+        if self.extract_thread is not None and self.extract_thread.isRunning():
+            logger.warning("Идёт распаковка архива. Игнорирование запроса на запуск.")
+            return
 
         settings = CONSOLE_SETTINGS.get(CURRENT_CONSOLE, {})
         EMULATOR_PATH = settings.get("EMULATOR_PATH") 
@@ -479,21 +1224,105 @@ class AppLogicMixin:
             QMessageBox.critical(self, "Ошибка Запуска", f"Эмулятор {settings.get('NAME', 'Консоли')} не найден по пути: {EMULATOR_PATH}")
             logger.error(f"Эмулятор не найден: {EMULATOR_PATH}")
             return
-            
+
+        # 🟢 Эмулятор не открывает архивы: запускаем распакованную копию из кэша
+        if settings.get("EXTRACT_ARCHIVES") and is_archive(rom_path):
+            self._launch_from_archive(rom_path, settings)
+            return
+
+        # 🟢 Многодисковая игра: эмулятору передаётся плейлист .m3u со всеми дисками
+        rom_data = self._find_rom_record(rom_path)
+        if rom_data is not None and len(rom_data.get('DISCS') or []) > 1:
+            try:
+                rom_path = write_playlist(PLAYLIST_DIR, rom_data.get('title', rom_data['FOLDER_NAME']), rom_data['DISCS'])
+            except OSError as e:
+                logger.error(f"Не удалось записать плейлист дисков, запуск первого диска: {e}")
+
+        self._start_emulator(rom_path, settings)
+
+    def _start_emulator(self, rom_path, settings):
         try:
             fullscreen_arg = settings.get('FULLSCREEN_ARG')
             
-            self.emulator_thread = EmulatorMonitorThread(EMULATOR_PATH, rom_path, fullscreen_arg, parent=self)
+            self.emulator_thread = EmulatorMonitorThread(settings.get("EMULATOR_PATH"), rom_path, fullscreen_arg, parent=self)
             self.emulator_thread.emulator_closed.connect(self.show_launcher) 
             self.emulator_thread.start()
             
+            # Не конкурируем с эмулятором за диск
+            self._prescan_timer.stop()
+            if self.prescan_thread is not None:
+                self.prescan_thread.pause()
+                logger.info("Предсканирование приостановлено на время игры.")
+            if self.hash_thread is not None:
+                self.hash_thread.pause()
+            
             self.showMinimized() 
             logger.info(f"Игра {os.path.basename(os.path.dirname(rom_path))} запущена.")
             
         except Exception:
             logger.error("Не удалось запустить процесс эмулятора:", exc_info=True)
             QMessageBox.critical(self, "Ошибка Запуска", "Не удалось запустить процесс эмулятора.")
-            
+
+    # --- Кэш распаковки архивов ---
+
+    def _find_rom_record(self, rom_path):
+        """Запись игры активной консоли по пути ROM'а (его передаёт виджет при запуске)."""
+        for rom_data in self._all_roms_list:
+            if rom_data.get('FULL_ROM_PATH') == rom_path:
+                return rom_data
+        return None
+
+    def _archive_rom_members(self, rom_path):
+        """[(имя, размер)] ROM'ов архива из оглавления, сохранённого сканером."""
+        archive = (self._find_rom_record(rom_path) or {}).get('ARCHIVE')
+        if archive and archive.get('status') == ARCHIVE_OK:
+            return [(name, size) for name, size, _ in archive['members']]
+        return []
+
+    def _launch_from_archive(self, rom_path, settings):
+        members = self._archive_rom_members(rom_path)
+        if not members:
+            QMessageBox.critical(self, "Ошибка Запуска", f"В архиве нет ROM'а для запуска:\n{rom_path}")
+            logger.error(f"Нечего распаковывать для запуска: {rom_path}")
+            return
+
+        # Повторный запуск — без распаковки
+        cached_path = self.extraction_cache.lookup(rom_path, [name for name, _ in members])
+        if cached_path:
+            logger.info(f"Запуск из кэша распаковки: {cached_path}")
+            self._start_emulator(cached_path, settings)
+            return
+
+        total_mb = sum(size for _, size in members) / (1024 * 1024)
+        progress_dialog = QProgressDialog(
+            f"Распаковка {os.path.basename(rom_path)} ({total_mb:.0f} МБ)...", "Отмена", 0, 100, self
+        )
+        progress_dialog.setWindowTitle("Подготовка игры")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(400) # Мелкие ROM'ы распаковываются без мелькания окна
+        progress_dialog.setAutoClose(False)
+        progress_dialog.setAutoReset(False)
+        progress_dialog.setValue(0)
+
+        thread = ExtractionThread(self.extraction_cache, rom_path, members, parent=self)
+        thread.extraction_progress.connect(progress_dialog.setValue)
+        thread.extracted.connect(self._on_archive_extracted)
+        thread.extraction_failed.connect(self._on_extraction_failed)
+        thread.finished.connect(progress_dialog.close)
+        thread.finished.connect(progress_dialog.deleteLater)
+        progress_dialog.canceled.connect(thread.requestInterruption)
+        self.extract_thread = thread
+        self.extract_console = CURRENT_CONSOLE
+        thread.start()
+
+    def _on_archive_extracted(self, launch_path):
+        self._start_emulator(launch_path, CONSOLE_SETTINGS.get(self.extract_console, {}))
+
+    def _on_extraction_failed(self, error):
+        if error: # Пустая строка — отмена пользователем
+            archive_name = os.path.basename(self.extract_thread.archive_path)
+            QMessageBox.critical(self, "Ошибка Запуска", f"Не удалось распаковать {archive_name}:\n{error}")
+
     def show_game_description(self, game_folder, description, screenshots):
         try:
             desc_window = DescriptionWindow(
@@ -0,0 +1,284 @@
+# archives.py - Оглавление .zip/.rar без распаковки (имена, размеры, CRC32), без Qt
+
+import os
+import struct
+import zipfile
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_EXTENSIONS = ('.zip', '.rar')
+
+# Файл внутри архива: имя, распакованный размер, CRC32 из заголовка (или None)
+ArchiveMember = namedtuple('ArchiveMember', ['name', 'size', 'crc32'])
+
+# Результат проверки архива для записи игры
+ARCHIVE_OK = "ok"                   # Внутри есть ROM этой консоли
+ARCHIVE_EMPTY = "empty"             # Нет ни одного ROM'а
+ARCHIVE_FOREIGN = "foreign"         # Только ROM'ы других систем
+ARCHIVE_UNREADABLE = "unreadable"   # Повреждён, зашифрованы заголовки и т.п.
+
+# Расширения ROM'ов известных систем — чтобы отличить «чужой» архив от пустого
+KNOWN_ROM_EXTENSIONS = (
+    '.nes', '.fds', '.unf', '.unif', '.smd', '.gen', '.md', '.bin', '.32x', '.sms', '.gg',
+    '.sfc', '.smc', '.gb', '.gbc', '.gba', '.n64', '.z64', '.v64', '.pce', '.iso', '.img',
+    '.cue', '.chd', '.pbp', '.a26', '.lnx', '.ws', '.wsc', '.ngp', '.ngc',
+)
+
+
+class ArchiveError(Exception):
+    """Оглавление архива не удалось прочитать."""
+
+
+def is_archive(path):
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+# ----------------------------------------------------------------------
+# ZIP: центральный каталог
+# ----------------------------------------------------------------------
+def _list_zip(path):
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return [
+                ArchiveMember(info.filename, info.file_size, info.CRC)
+                for info in archive.infolist() if not info.is_dir()
+            ]
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, ValueError) as e:
+        raise ArchiveError(str(e)) from e
+
+
+# ----------------------------------------------------------------------
+# RAR: заголовки файлов (RAR 1.5-4.x и RAR 5.0), данные пропускаются через seek
+# ----------------------------------------------------------------------
+RAR4_SIGNATURE = b"Rar!\x1a\x07\x00"
+RAR5_SIGNATURE = b"Rar!\x1a\x07\x01\x00"
+
+
+def _list_rar(path):
+    with open(path, 'rb') as f:
+        signature = f.read(8)
+        file_size = os.fstat(f.fileno()).st_size
+        if signature == RAR5_SIGNATURE:
+            return _list_rar5(f, file_size)
+        if signature[:7] == RAR4_SIGNATURE:
+            f.seek(len(RAR4_SIGNATURE))
+            return _list_rar4(f, file_size)
+    raise ArchiveError("не RAR-архив (или самораспаковывающийся)")
+
+
+def _skip_data(f, data_size, file_size):
+    """Пропускает данные блока; блок за концом файла — признак обрезанного архива."""
+    if f.tell() + data_size > file_size:
+        raise ArchiveError("обрезанный архив")
+    f.seek(data_size, os.SEEK_CUR)
+
+
+def _decode_rar_unicode(std_name, encoded):
+    """
+    Unicode-имя RAR4 (флаг 0x200): после нулевого байта идёт сжатое UTF-16 —
+    старший байт, затем группы по 2 бита флагов на символ: байт как есть,
+    байт со старшим байтом, полный символ или отрезок обычного имени.
+    """
+    high = encoded[0]
+    pos, flags, flag_bits = 1, 0, 0
+    chars = []
+    while pos < len(encoded):
+        if flag_bits == 0:
+            flags, flag_bits = encoded[pos], 8
+            pos += 1
+            if pos >= len(encoded):
+                break
+        flag_bits -= 2
+        kind = (flags >> flag_bits) & 3
+        if kind == 0:
+            chars.append(encoded[pos])
+            pos += 1
+        elif kind == 1:
+            chars.append(encoded[pos] | high << 8)
+            pos += 1
+        elif kind == 2:
+            if pos + 1 >= len(encoded):
+                break
+            chars.append(encoded[pos] | encoded[pos + 1] << 8)
+            pos += 2
+        else:
+            length = encoded[pos]
+            pos += 1
+            if length & 0x80:
+                if pos >= len(encoded):
+                    break
+                correction = encoded[pos]
+                pos += 1
+                for _ in range((length & 0x7F) + 2):
+                    if len(chars) >= len(std_name):
+                        break
+                    chars.append(((std_name[len(chars)] + correction) & 0xFF) | high << 8)
+            else:
+                for _ in range(length + 2):
+                    if len(chars) >= len(std_name):
+                        break
+                    chars.append(std_name[len(chars)])
+    return "".join(chr(char) for char in chars)
+
+
+def _rar4_name(raw, flags):
+    """
+    Имя члена RAR4: без флага 0x200 — в OEM-кодировке (для русской Windows cp866);
+    с флагом — Unicode-имя после нулевого байта или UTF-8, если нуля нет.
+    """
+    if not flags & 0x0200:
+        return raw.decode('cp866')
+    std_name, _, encoded = raw.partition(b"\x00")
+    if not encoded:
+        return raw.decode('utf-8', 'replace')
+    try:
+        return _decode_rar_unicode(std_name, encoded)
+    except IndexError:
+        return std_name.decode('cp866')
+
+
+def _list_rar4(f, file_size):
+    members = []
+    has_main_header = False
+    while True:
+        head = f.read(7)
+        if not head:
+            break # Старые архивы (RAR 2.x) могут заканчиваться без блока конца
+        if len(head) < 7:
+            raise ArchiveError("обрезанный архив")
+        _, head_type, flags, head_size = struct.unpack('<HBHH', head)
+        if head_size < 7:
+            raise ArchiveError("повреждённый заголовок RAR")
+        body = f.read(head_size - 7)
+        if len(body) < head_size - 7:
+            raise ArchiveError("обрезанный заголовок RAR")
+
+        # У блоков с данными (флаг 0x8000) их размер — первое поле заголовка
+        data_size = struct.unpack_from('<I', body, 0)[0] if flags & 0x8000 else 0
+        if head_type == 0x73:
+            has_main_header = True
+            if flags & 0x0080:
+                raise ArchiveError("заголовки RAR зашифрованы")
+        if head_type == 0x74:
+            pack_size, unp_size, _, file_crc, _, _, _, name_size, _ = struct.unpack_from('<IIBIIBBHI', body, 0)
+            offset = 25
+            if flags & 0x0100:
+                high_pack, high_unp = struct.unpack_from('<II', body, offset)
+                pack_size |= high_pack << 32
+                unp_size |= high_unp << 32
+                offset += 8
+            name = _rar4_name(body[offset:offset + name_size], flags)
+            if flags & 0x00E0 != 0x00E0: # 0xE0 — каталог
+                members.append(ArchiveMember(name, unp_size, file_crc))
+            data_size = pack_size
+        elif head_type == 0x7B: # Конец архива
+            break
+        _skip_data(f, data_size, file_size)
+    if not has_main_header:
+        raise ArchiveError("обрезанный архив")
+    return members
+
+
+def _vint(buffer, pos):
+    """Целое переменной длины RAR5 (по 7 бит в байте)."""
+    result, shift = 0, 0
+    while pos < len(buffer):
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+    raise ArchiveError("обрезанное число в заголовке RAR5")
+
+
+def _list_rar5(f, file_size):
+    members = []
+    has_main_header = False
+    while True:
+        start = f.tell()
+        prefix = f.read(7) # CRC32 + размер заголовка (до 3 байт)
+        if not prefix:
+            break
+        if len(prefix) < 5:
+            raise ArchiveError("обрезанный архив")
+        head_size, pos = _vint(prefix, 4)
+        f.seek(start + pos)
+        header = f.read(head_size)
+        if len(header) < head_size:
+            raise ArchiveError("обрезанный заголовок RAR5")
+
+        head_type, p = _vint(header, 0)
+        head_flags, p = _vint(header, p)
+        data_size = 0
+        if head_flags & 0x01:
+            _, p = _vint(header, p) # Размер дополнительной области
+        if head_flags & 0x02:
+            data_size, p = _vint(header, p)
+
+        if head_type == 1:
+            has_main_header = True
+        if head_type == 4:
+            raise ArchiveError("заголовки RAR зашифрованы")
+        if head_type == 2:
+            file_flags, p = _vint(header, p)
+            unp_size, p = _vint(header, p)
+            _, p = _vint(header, p) # Атрибуты
+            if file_flags & 0x02:
+                p += 4 # mtime
+            file_crc = None
+            if file_flags & 0x04:
+                file_crc = struct.unpack_from('<I', header, p)[0]
+                p += 4
+            _, p = _vint(header, p) # Метод сжатия
+            _, p = _vint(header, p) # ОС
+            name_size, p = _vint(header, p)
+            name = header[p:p + name_size].decode('utf-8', 'replace')
+            if not file_flags & 0x01: # 0x01 — каталог
+                members.append(ArchiveMember(name, unp_size, file_crc))
+        elif head_type == 5: # Конец архива
+            break
+        _skip_data(f, data_size, file_size)
+    if not has_main_header:
+        raise ArchiveError("обрезанный архив")
+    return members
+
+
+# ----------------------------------------------------------------------
+# ПУБЛИЧНЫЙ API
+# ----------------------------------------------------------------------
+def list_archive(path):
+    """Файлы архива по его оглавлению. ArchiveError, если прочитать не удалось."""
+    lower = path.lower()
+    try:
+        if lower.endswith('.zip'):
+            return _list_zip(path)
+        if lower.endswith('.rar'):
+            return _list_rar(path)
+    except (OSError, struct.error) as e:
+        raise ArchiveError(str(e)) from e
+    raise ArchiveError("неподдерживаемый формат архива")
+
+
+def inspect_archive(path, rom_extensions):
+    """
+    Проверяет архив с игрой: (статус, [ArchiveMember ROM'ов этой консоли]).
+    rom_extensions — расширения консоли (сами архивные расширения не учитываются).
+    """
+    rom_extensions = tuple(ext.lower() for ext in rom_extensions if ext.lower() not in ARCHIVE_EXTENSIONS)
+    try:
+        members = list_archive(path)
+    except ArchiveError as e:
+        logger.warning(f"Архив не читается: {path} ({e})")
+        return ARCHIVE_UNREADABLE, []
+
+    roms = [member for member in members if member.name.lower().endswith(rom_extensions)]
+    if roms:
+        return ARCHIVE_OK, roms
+    if any(member.name.lower().endswith(KNOWN_ROM_EXTENSIONS) for member in members):
+        logger.warning(f"В архиве только ROM'ы другой системы: {path}")
+        return ARCHIVE_FOREIGN, []
+    logger.warning(f"В архиве нет ROM'ов: {path}")
+    return ARCHIVE_EMPTY, []
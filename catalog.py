@@ -0,0 +1,369 @@
+# catalog.py - Персистентный каталог игр (SQLite)
+
+import os
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+
+from snapshot import write_snapshot, open_snapshot, SNAPSHOT_EXTENSION
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ПЕРСИСТЕНТНОГО КАТАЛОГА (GameCatalog)
+# ----------------------------------------------------------------------
+class GameCatalog:
+    """
+    Хранит результаты сканирования на диске, ключ — (консоль, FOLDER_NAME).
+    Каталог является кэшем: при смене схемы он просто пересоздаётся.
+    Хэши содержимого ROM'ов (rom_hashes) хранятся отдельно, ключ — путь файла,
+    и переживают пересоздание таблицы игр: файл хэшируется один раз за жизнь.
+    Если задан snapshot_dir, после полного сохранения консоли рядом пишется
+    её бинарный снимок (snapshot.py); любое изменение записей консоли меняет
+    её ревизию, и устаревший снимок больше не используется.
+    """
+
+    SCHEMA_VERSION = 5
+
+    def __init__(self, db_path, snapshot_dir=None):
+        self.db_path = db_path
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        """Открывает новое соединение (по одному на вызов — безопасно для потоков)."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Создаёт таблицы; при несовпадении версии схемы пересоздаёт каталог."""
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version != self.SCHEMA_VERSION:
+                    if version:
+                        logger.info(f"Схема каталога v{version} устарела, пересоздание (v{self.SCHEMA_VERSION}).")
+                    conn.execute("DROP TABLE IF EXISTS games")
+                    conn.execute("DROP TABLE IF EXISTS console_revisions")
+
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS games (
+                        console     TEXT NOT NULL,
+                        folder_name TEXT NOT NULL,
+                        position    INTEGER NOT NULL,
+                        title       TEXT,
+                        folder_path TEXT NOT NULL,
+                        rom_path    TEXT,
+                        cover_path  TEXT,
+                        description TEXT,
+                        screenshots TEXT,
+                        signature   TEXT,
+                        archive     TEXT,
+                        discs       TEXT,
+                        header      TEXT,
+                        PRIMARY KEY (console, folder_name)
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS rom_hashes (
+                        path     TEXT PRIMARY KEY,
+                        size     INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        crc32    TEXT NOT NULL,
+                        md5      TEXT NOT NULL,
+                        sha1     TEXT NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS duplicates (
+                        console     TEXT NOT NULL,
+                        folder_name TEXT NOT NULL,
+                        PRIMARY KEY (console, folder_name)
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS empty_folders (
+                        console     TEXT NOT NULL,
+                        folder_path TEXT NOT NULL,
+                        signature   TEXT NOT NULL,
+                        PRIMARY KEY (console, folder_path)
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS console_revisions (
+                        console  TEXT PRIMARY KEY,
+                        revision TEXT NOT NULL
+                    )
+                """)
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+                conn.commit()
+            finally:
+                conn.close()
+
+    # --- Преобразование записей ---
+
+    @staticmethod
+    def _row_to_rom(row):
+        return {
+            'title': row['title'] or row['folder_name'],
+            'FOLDER_NAME': row['folder_name'],
+            'FOLDER_PATH': row['folder_path'],
+            'FULL_ROM_PATH': row['rom_path'],
+            'COVER_PATH': row['cover_path'],
+            'description': row['description'] or "Описание недоступно.",
+            'screenshots': json.loads(row['screenshots']) if row['screenshots'] else [],
+            'SIGNATURE': json.loads(row['signature']) if row['signature'] else None,
+            'ARCHIVE': json.loads(row['archive']) if row['archive'] else None,
+            'DISCS': json.loads(row['discs']) if row['discs'] else [],
+            'HEADER': json.loads(row['header']) if row['header'] else None,
+        }
+
+    @staticmethod
+    def _rom_to_row(console_key, position, rom_data):
+        return (
+            console_key,
+            rom_data['FOLDER_NAME'],
+            position,
+            rom_data.get('title', rom_data['FOLDER_NAME']),
+            rom_data['FOLDER_PATH'],
+            rom_data.get('FULL_ROM_PATH'),
+            rom_data.get('COVER_PATH'),
+            rom_data.get('description'),
+            json.dumps(rom_data.get('screenshots', []), ensure_ascii=False),
+            json.dumps(rom_data.get('SIGNATURE')),
+            json.dumps(rom_data.get('ARCHIVE'), ensure_ascii=False),
+            json.dumps(rom_data.get('DISCS') or [], ensure_ascii=False),
+            json.dumps(rom_data.get('HEADER'), ensure_ascii=False),
+        )
+
+    # --- Публичный API ---
+
+    def load_console(self, console_key):
+        """Возвращает список записей игр консоли в порядке последнего сканирования."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM games WHERE console = ? ORDER BY position",
+                (console_key,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [self._row_to_rom(row) for row in rows]
+
+    def save_console(self, console_key, rom_list):
+        """
+        Полностью заменяет записи консоли результатом сканирования (одна
+        транзакция) и записывает её снимок.
+        """
+        rows = [self._rom_to_row(console_key, i, rom) for i, rom in enumerate(rom_list)]
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM games WHERE console = ?", (console_key,))
+                    conn.executemany(
+                        "INSERT INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                    )
+                    revision = self._bump_revision(conn, console_key)
+            finally:
+                conn.close()
+        logger.info(f"Каталог {console_key} сохранён: {len(rows)} игр.")
+        self._write_snapshot(console_key, revision, rom_list)
+
+    def upsert_game(self, console_key, rom_data):
+        """Добавляет или обновляет одну игру (новые игры попадают в конец списка)."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT position FROM games WHERE console = ? AND folder_name = ?",
+                        (console_key, rom_data['FOLDER_NAME'])
+                    ).fetchone()
+                    if row is not None:
+                        position = row['position']
+                    else:
+                        position = conn.execute(
+                            "SELECT COALESCE(MAX(position) + 1, 0) FROM games WHERE console = ?",
+                            (console_key,)
+                        ).fetchone()[0]
+                    conn.execute(
+                        "INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        self._rom_to_row(console_key, position, rom_data)
+                    )
+                    self._bump_revision(conn, console_key)
+            finally:
+                conn.close()
+
+    def remove_game(self, console_key, folder_name):
+        """Удаляет игру из каталога."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "DELETE FROM games WHERE console = ? AND folder_name = ?",
+                        (console_key, folder_name)
+                    )
+                    self._bump_revision(conn, console_key)
+            finally:
+                conn.close()
+
+    # --- Бинарные снимки консолей ---
+
+    @staticmethod
+    def _bump_revision(conn, console_key):
+        """Новая ревизия записей консоли (в транзакции изменения): прежний снимок устаревает."""
+        revision = uuid.uuid4().hex[:16]
+        conn.execute("INSERT OR REPLACE INTO console_revisions VALUES (?, ?)", (console_key, revision))
+        return revision
+
+    def _snapshot_path(self, console_key, revision):
+        return os.path.join(self.snapshot_dir, f"{console_key}.{revision}{SNAPSHOT_EXTENSION}")
+
+    def _write_snapshot(self, console_key, revision, rom_list):
+        """
+        Пишет снимок под именем с ревизией и удаляет прежние снимки консоли.
+        Отображённый в память старый снимок в Windows не удаляется — он будет
+        удалён при следующей записи.
+        """
+        if not self.snapshot_dir:
+            return
+        try:
+            size = write_snapshot(self._snapshot_path(console_key, revision), revision, rom_list)
+        except (OSError, UnicodeError) as e:
+            logger.warning(f"Не удалось записать снимок каталога {console_key}: {e}")
+            return
+        logger.info(f"Снимок каталога {console_key} записан: {len(rom_list)} игр, {size / 1024:.0f} КБ.")
+
+        current = os.path.basename(self._snapshot_path(console_key, revision))
+        for entry in os.scandir(self.snapshot_dir):
+            if entry.name.startswith(f"{console_key}.") and entry.name != current:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def load_snapshot(self, console_key):
+        """
+        Записи консоли из актуального снимка (ленивые SnapshotRecord в порядке
+        последнего сканирования) или None — тогда записи читаются load_console.
+        """
+        if not self.snapshot_dir:
+            return None
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT revision FROM console_revisions WHERE console = ?", (console_key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        snapshot = open_snapshot(self._snapshot_path(console_key, row['revision']))
+        if snapshot is None or snapshot.revision != row['revision']:
+            return None
+        return snapshot.records()
+
+    # --- Кэш хэшей содержимого ---
+
+    def load_hashes(self, paths):
+        """Возвращает {путь: {'size', 'mtime_ns', 'crc32', 'md5', 'sha1'}} для известных путей."""
+        paths = list(paths)
+        hashes = {}
+        conn = self._connect()
+        try:
+            # Ограничение SQLite на число параметров запроса
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM rom_hashes WHERE path IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for row in rows:
+                    hashes[row['path']] = {key: row[key] for key in ('size', 'mtime_ns', 'crc32', 'md5', 'sha1')}
+        finally:
+            conn.close()
+        return hashes
+
+    def save_hashes(self, entries):
+        """Сохраняет хэши: entries — [(путь, размер, mtime_ns, {'crc32', 'md5', 'sha1'})]."""
+        rows = [
+            (path, size, mtime_ns, digests['crc32'], digests['md5'], digests['sha1'])
+            for path, size, mtime_ns, digests in entries
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO rom_hashes VALUES (?, ?, ?, ?, ?, ?)", rows)
+            finally:
+                conn.close()
+
+    # --- Дубликаты ---
+
+    def save_duplicates(self, hidden_by_console):
+        """Заменяет список скрываемых дублей: {консоль: {FOLDER_NAME}}."""
+        rows = [(console_key, folder_name) for console_key, names in hidden_by_console.items() for folder_name in names]
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM duplicates")
+                    conn.executemany("INSERT INTO duplicates VALUES (?, ?)", rows)
+            finally:
+                conn.close()
+
+    def load_duplicates(self, console_key):
+        """Папки консоли, помеченные как дубли при последнем поиске."""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT folder_name FROM duplicates WHERE console = ?", (console_key,)).fetchall()
+        finally:
+            conn.close()
+        return {row['folder_name'] for row in rows}
+
+    def save_empty_folders(self, console_key, misses, replace=True, cleared=()):
+        """
+        Папки консоли без ROM'а: {путь папки: сигнатура}. replace=True —
+        результат полного сканирования заменяет прежний список; иначе записи
+        добавляются, а пути из cleared (там нашлась игра или папки больше нет)
+        удаляются.
+        """
+        rows = [(console_key, folder_path, json.dumps(signature)) for folder_path, signature in misses.items()]
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    if replace:
+                        conn.execute("DELETE FROM empty_folders WHERE console = ?", (console_key,))
+                    else:
+                        conn.executemany(
+                            "DELETE FROM empty_folders WHERE console = ? AND folder_path = ?",
+                            [(console_key, folder_path) for folder_path in cleared]
+                        )
+                    conn.executemany("INSERT OR REPLACE INTO empty_folders VALUES (?, ?, ?)", rows)
+            finally:
+                conn.close()
+
+    def load_empty_folders(self, console_key):
+        """{путь папки: сигнатура} папок консоли, где при последней проверке не было ROM'а."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT folder_path, signature FROM empty_folders WHERE console = ? ORDER BY folder_path",
+                (console_key,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row['folder_path']: json.loads(row['signature']) for row in rows}
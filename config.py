@@ -1,8 +1,6 @@
 # config.py - ИСПРАВЛЕННАЯ ВЕРСИЯ
 
 import os
-from PyQt5.QtCore import QSize
-from PyQt5.QtWidgets import QMainWindow 
 
 # --- ОПРЕДЕЛЕНИЕ БАЗОВОГО ПУТИ ---
 import sys
@@ -20,39 +18,163 @@ ITEM_WIDTH = 180
 ITEM_HEIGHT = 180
 ALLOWED_COVER_EXTENSIONS = ('.png', '.jpg', '.jpeg') # Расширения для обложек
 
+# --- ПЕРСИСТЕНТНЫЙ КАТАЛОГ ИГР ---
+# SQLite-кэш результатов сканирования: сетка заполняется из него сразу при запуске
+CATALOG_PATH = os.path.join(BASE_DIR, "catalog.db")
+# Бинарные снимки консолей (отображаются в память при старте вместо разбора строк SQLite)
+SNAPSHOT_DIR = os.path.join(BASE_DIR, "catalog_snapshots")
+
+# --- НАБЛЮДЕНИЕ ЗА ПАПКАМИ ROM'ОВ ---
+# Пауза после последнего события ФС, прежде чем перепроверить изменённые папки
+WATCHER_DEBOUNCE_MS = 750
+
+# --- ПАКЕТНАЯ ДОСТАВКА НАЙДЕННЫХ ИГР В GUI ---
+GAME_BATCH_SIZE = 64          # Записей в одном сигнале games_found
+GAME_BATCH_INTERVAL_MS = 100  # Максимальная задержка отправки неполной пачки
+WIDGET_BUILD_CHUNK = 24       # Виджетов GameItem за один проход цикла событий
+
+# --- КЭШ СЕТОК КОНСОЛЕЙ ---
+# Виджеты и обложки консолей сохраняются при переключении; сверх лимита
+# выгружается консоль, которую дольше всех не открывали
+CONSOLE_CACHE_MAX_MB = 512
+WIDGET_OVERHEAD_BYTES = 16 * 1024 # Оценка памяти виджета GameItem без пиксмапа
+
+# --- ФОНОВОЕ ПРЕДСКАНИРОВАНИЕ НЕАКТИВНЫХ КОНСОЛЕЙ ---
+# После того как сетка активной консоли готова, остальные консоли сканируются
+# с низким приоритетом, чтобы первый клик по ним брал данные из каталога
+PRESCAN_ENABLED = True
+PRESCAN_DELAY_MS = 3000
+
+# --- ОБЩИЙ ПЛАНИРОВЩИК ФОНОВОГО ВВОДА-ВЫВОДА ---
+# Проверка папок и загрузка обложек идут через одну очередь с приоритетами:
+# обложки видимых плиток, затем активная консоль, затем предсканирование.
+# Окно сканирования одной консоли — её SCAN_WORKERS, остальное — обложкам
+IO_WORKERS = 8
+
+# --- ССЫЛКИ В БИБЛИОТЕКЕ ---
+# Папки-ссылки (symlink/junction) на одну папку проверяются один раз всегда.
+# DEDUPE_HARDLINKS: ROM-файлы, являющиеся жёсткими ссылками на один файл,
+# показываются одной игрой (стоит один stat на игру при каждом сканировании)
+DEDUPE_HARDLINKS = False
+
+# --- НЕСКОЛЬКО КОРНЕЙ ROM'ОВ НА КОНСОЛЬ ---
+# Кроме ROM_PATH у консоли могут быть EXTRA_ROM_PATHS (внешние диски, NAS).
+# Если одна и та же папка игры есть в нескольких корнях, берётся копия из корня
+# с наивысшим приоритетом: "order" — по порядку ROM_PATH, EXTRA_ROM_PATHS;
+# "fastest" — сначала самый быстрый по замеру корень (SSD раньше USB-HDD)
+ROOT_PRECEDENCE = "fastest"
+
+# --- ХЭШИ СОДЕРЖИМОГО ROM'ОВ (CRC32/MD5/SHA1) ---
+# Считаются после сканирования в пуле процессов и кэшируются в каталоге
+# по (путь, размер, mtime): каждый файл читается один раз за свою жизнь
+HASHING_ENABLED = True
+HASH_WORKERS = 2
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# --- ИДЕНТИФИКАЦИЯ ПО DAT-ФАЙЛАМ (No-Intro / Redump) ---
+# XML DAT'ы кладутся в DAT_DIR, у консоли в DAT_FILES — шаблоны их имён.
+# Разобранный DAT кэшируется в DAT_CACHE_DIR до изменения самого файла
+DAT_DIR = os.path.join(BASE_DIR, "DAT")
+DAT_CACHE_DIR = os.path.join(BASE_DIR, "dat_cache")
+# Подписывать игру каноническим именем из DAT вместо имени папки
+DAT_CANONICAL_TITLES = True
+
+# --- ДУБЛИКАТЫ ROM'ОВ ---
+# После хэширования каталог проверяется на одинаковые игры (в т.ч. .nes и .rar
+# с тем же .nes внутри); отчёт пишется в лог. HIDE_DUPLICATES скрывает лишние
+# копии в сетке консоли — меньше виджетов и загрузок обложек
+DUPLICATE_SCAN_ENABLED = True
+HIDE_DUPLICATES = False
+
+# --- КЭШ РАСПАКОВКИ АРХИВОВ ---
+# Консолям с EXTRACT_ARCHIVES ROM из .zip/.rar при запуске распаковывается в
+# EXTRACT_CACHE_DIR и дальше запускается оттуда без повторной распаковки.
+# Сверх лимита удаляются игры, которые дольше всех не запускали
+EXTRACT_CACHE_DIR = os.path.join(BASE_DIR, "extract_cache")
+EXTRACT_CACHE_MAX_MB = 8192
+# Распаковщик .rar (UnRAR или 7-Zip); если файла нет — ищется в PATH
+UNRAR_PATH = os.path.join(BASE_DIR, "Emulator", "UnRAR.exe")
+
+# --- МНОГОДИСКОВЫЕ ИГРЫ ---
+# У консолей с .cue в ROM_EXTENSIONS образ выбирается по cue-файлам, а диски
+# игры ('Game (Disc 1)', 'Game (Disc 2)') объединяются в одну плитку. Плейлист
+# .m3u для эмулятора пишется при запуске сюда, а не в папки ROM'ов
+PLAYLIST_DIR = os.path.join(BASE_DIR, "playlists")
+
+# --- СКАНИРОВАНИЕ ПАПОК КОНСОЛИ ---
+# SCAN_WORKERS консоли — сколько папок игр проверяется параллельно
+# (1 — последовательно; для NAS и USB-HDD с большой задержкой — 8-16)
+# SCAN_INCLUDE / SCAN_EXCLUDE — glob-шаблоны без учёта регистра: какие папки
+# корня считать играми (пусто — все) и какие каталоги не обходить вовсе.
+# Шаблон без '/' сравнивается с именем каталога на любой глубине, с '/' —
+# с путём от корня ROM'ов ('Game/extras/*'). Экономия видна в отчёте сканирования
+
 CONSOLE_SETTINGS = {
     "DENDY": {
         # 🟢 ИСПРАВЛЕНО: ROM_PATH используется корректно
         "ROM_PATH": os.path.join(BASE_DIR, "Dendy"),
+        # 🟢 Дополнительные корни (например, [r"E:\Dendy"]) — объединяются в один каталог
+        "EXTRA_ROM_PATHS": [],
+        # 🟢 DAT-файлы для опознания дампов (шаблоны имён в DAT_DIR)
+        "DAT_FILES": ("Nintendo - Nintendo Entertainment System (*).dat",),
         "ROM_EXTENSIONS": ('.nes', '.rar'),
+        # 🟢 Эмулятор не открывает архивы: распаковывать ROM в кэш перед запуском
+        "EXTRACT_ARCHIVES": True,
         "EMULATOR_PATH": os.path.join(BASE_DIR, "Emulator", "FCE Ultra X Rus", "fceux64 rus.exe"),
         "NAME": "Dendy",
         # 🎨 НОВЫЙ НЕОНОВО-ФИОЛЕТОВЫЙ ГРАДИЕНТ (Темный старт)
         "GRADIENT_END": "#8A2BE2",      
         "GRADIENT_START": "#0A001A", 
         "FULLSCREEN_ARG": "", 
+        # ⚡ Потоков проверки папок
+        "SCAN_WORKERS": 4,
+        # ⚡ Правила сканирования (glob)
+        "SCAN_INCLUDE": (),
+        "SCAN_EXCLUDE": ("_incoming", "manuals", "soundtrack", "*.part"),
     }, 
     "SEGA": {
         # 🟢 ИСПРАВЛЕНО: ROM_PATH используется корректно
         "ROM_PATH": os.path.join(BASE_DIR, "Sega"),
+        # 🟢 Дополнительные корни (например, [r"E:\Sega"]) — объединяются в один каталог
+        "EXTRA_ROM_PATHS": [],
+        # 🟢 DAT-файлы для опознания дампов (шаблоны имён в DAT_DIR)
+        "DAT_FILES": ("Sega - Mega Drive - Genesis (*).dat",),
         "ROM_EXTENSIONS": ('.gen', '.smd', '.bin', '.zip'),
+        # 🟢 Эмулятор сам открывает .zip: архив передаётся ему как есть, без распаковки
+        "EXTRACT_ARCHIVES": False,
         "EMULATOR_PATH": os.path.join(BASE_DIR, "Emulator", "Gens32", "Gens32Surreal.exe"), 
         "NAME": "Sega",
         # 🎨 НОВЫЙ ТЕМНЫЙ НЕОНОВО-САЛАТОВЫЙ ГРАДИЕНТ (Темный старт)
         "GRADIENT_END": "#7FFF00",      
         "GRADIENT_START": "#000A0A", 
         "FULLSCREEN_ARG": "",
+        # ⚡ Потоков проверки папок
+        "SCAN_WORKERS": 4,
+        # ⚡ Правила сканирования (glob)
+        "SCAN_INCLUDE": (),
+        "SCAN_EXCLUDE": ("_incoming", "manuals", "soundtrack", "*.part"),
     },
     # --- КОНСОЛЬ SONY ---
     "SONY": { 
         # 🟢 ИСПРАВЛЕНО: ROM_PATH используется корректно
         "ROM_PATH": os.path.join(BASE_DIR, "Sony"),
+        # 🟢 Дополнительные корни (например, [r"E:\Sony"]) — объединяются в один каталог
+        "EXTRA_ROM_PATHS": [],
+        # 🟢 DAT-файлы для опознания дампов (шаблоны имён в DAT_DIR)
+        "DAT_FILES": ("Sony - PlayStation - *.dat",),
         "ROM_EXTENSIONS": ('.iso', '.bin', '.img', '.cue', '.zip'),
+        # 🟢 Эмулятор не открывает архивы: распаковывать ROM в кэш перед запуском
+        "EXTRACT_ARCHIVES": True,
         "EMULATOR_PATH": os.path.join(BASE_DIR, "Emulator", "DuckStation", "duckstation-qt-x64-ReleaseLTCG.exe"), 
         "NAME": "Sony PlayStation",
         # 🎨 НОВЫЙ НЕОНОВО-ЖЕЛТЫЙ ГРАДИЕНТ (Темный старт)
         "GRADIENT_END": "#FFFF00",      
         "GRADIENT_START": "#1A1A00", 
         "FULLSCREEN_ARG": "-fullscreen", 
+        # ⚡ Потоков проверки папок
+        "SCAN_WORKERS": 4,
+        # ⚡ Правила сканирования (glob)
+        "SCAN_INCLUDE": (),
+        "SCAN_EXCLUDE": ("_incoming", "manuals", "soundtrack", "*.part"),
     }
 }
\ No newline at end of file
@@ -0,0 +1,200 @@
+# datfile.py - Идентификация ROM'ов по DAT-файлам No-Intro / Redump (без Qt)
+
+import os
+import re
+import pickle
+import fnmatch
+import logging
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Результат сопоставления: каноническое имя, регион, статус дампа, имя DAT
+DatEntry = namedtuple('DatEntry', ['name', 'region', 'status', 'source'])
+
+# Статус дампа: 'verified' — подтверждён, 'good' — без пометок, 'baddump' — плохой
+STATUS_GOOD = "good"
+
+KNOWN_REGIONS = {
+    "World", "USA", "Europe", "Japan", "Asia", "Australia", "Brazil", "Canada",
+    "China", "France", "Germany", "Hong Kong", "Italy", "Korea", "Netherlands",
+    "Russia", "Spain", "Sweden", "Taiwan", "UK", "Scandinavia", "Greece",
+    "Portugal", "Poland", "Finland", "Denmark", "Norway", "Unknown",
+}
+_PARENS_RE = re.compile(r"\(([^()]*)\)")
+
+
+def region_from_name(game_name):
+    """Регион из имени по правилам No-Intro/Redump: '... (USA, Europe) (Rev 1)' -> 'USA, Europe'."""
+    for group in _PARENS_RE.findall(game_name):
+        parts = [part.strip() for part in group.split(",")]
+        if parts and all(part in KNOWN_REGIONS for part in parts):
+            return group
+    return ""
+
+
+def _hex_key(value):
+    try:
+        return bytes.fromhex(value) if value else None
+    except ValueError:
+        return None
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ИНДЕКСА DAT (DatIndex)
+# ----------------------------------------------------------------------
+class DatIndex:
+    """
+    Индекс хэш -> DatEntry по одному или нескольким DAT-файлам. Ключи хранятся
+    компактно: SHA1/MD5 — как bytes, CRC32 — как (int, размер); на каждый ROM
+    заводится ключ SHA1 (или MD5) и ключ CRC32 для архивов. Каждый DAT
+    разбирается потоковым XML-парсером один раз и кэшируется в pickle рядом
+    с остальными, пока не изменятся его размер или mtime.
+    """
+
+    CACHE_VERSION = 3
+
+    def __init__(self):
+        self.sources = []
+        self._by_sha1 = {}
+        self._by_md5 = {}
+        self._by_crc = {}
+
+    def __len__(self):
+        return max(len(self._by_sha1) + len(self._by_md5), len(self._by_crc))
+
+    # --- Сопоставление ---
+
+    def match(self, digests):
+        """Ищет запись по хэшам файла: SHA1, затем MD5, затем CRC32 + размер. O(1)."""
+        entry = (
+            self._by_sha1.get(_hex_key(digests.get('sha1')))
+            or self._by_md5.get(_hex_key(digests.get('md5')))
+        )
+        if entry is None and digests.get('crc32'):
+            entry = self._by_crc.get((int(digests['crc32'], 16), digests.get('size')))
+        return DatEntry(*entry) if entry is not None else None
+
+    # --- Загрузка ---
+
+    def merge(self, tables):
+        """Добавляет таблицы одного DAT (см. parse_dat)."""
+        self.sources.append(tables['source'])
+        self._by_sha1.update(tables['sha1'])
+        self._by_md5.update(tables['md5'])
+        self._by_crc.update(tables['crc'])
+
+    @classmethod
+    def load(cls, dat_paths, cache_dir=None):
+        """Собирает индекс по DAT-файлам; битые файлы пропускаются с ошибкой в логе."""
+        index = cls()
+        for dat_path in dat_paths:
+            try:
+                index.merge(load_dat_tables(dat_path, cache_dir))
+            except (OSError, ET.ParseError) as e:
+                logger.error(f"Не удалось загрузить DAT {dat_path}: {e}")
+        return index
+
+
+# ----------------------------------------------------------------------
+# РАЗБОР И КЭШ ОДНОГО DAT
+# ----------------------------------------------------------------------
+def parse_dat(dat_path):
+    """
+    Потоковый разбор XML DAT (logiqx: <game>/<machine> с вложенными <rom>).
+    Обработанные элементы сразу очищаются, поэтому память не растёт с размером файла.
+    """
+    tables = {'source': os.path.basename(dat_path), 'roms': 0, 'sha1': {}, 'md5': {}, 'crc': {}}
+    strings = {}  # Общие строки регионов/статусов вместо тысяч одинаковых копий
+
+    root, in_header = None, False
+    for event, elem in ET.iterparse(dat_path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            elif elem.tag == 'header':
+                in_header = True
+            continue
+
+        if in_header:
+            if elem.tag == 'name' and elem.text:
+                tables['source'] = elem.text.strip()
+            elif elem.tag == 'header':
+                in_header = False
+        elif elem.tag in ('game', 'machine'):
+            game_name = elem.get('name', "")
+            region = region_from_name(game_name)
+            region = strings.setdefault(region, region)
+            for rom in elem.iter('rom'):
+                status = rom.get('status') or STATUS_GOOD
+                status = strings.setdefault(status, status)
+                entry = (game_name, region, status, tables['source'])
+                tables['roms'] += 1
+
+                # Хэшер считает все три суммы, поэтому из SHA1/MD5 хватает самого
+                # надёжного; CRC32 + размер нужен всегда — он есть в оглавлении архивов
+                sha1 = _hex_key(rom.get('sha1'))
+                md5 = _hex_key(rom.get('md5')) if not sha1 else None
+                if sha1:
+                    tables['sha1'][sha1] = entry
+                elif md5:
+                    tables['md5'][md5] = entry
+                try:
+                    tables['crc'].setdefault((int(rom.get('crc'), 16), int(rom.get('size'))), entry)
+                except (TypeError, ValueError):
+                    pass
+            # Разобранные игры не держим в памяти
+            elem.clear()
+            root.clear()
+    return tables
+
+
+def _cache_path(dat_path, cache_dir):
+    name = os.path.splitext(os.path.basename(dat_path))[0]
+    return os.path.join(cache_dir, f"{name}.pickle")
+
+
+def load_dat_tables(dat_path, cache_dir=None):
+    """Таблицы DAT из кэша (если DAT не менялся) или после разбора с записью кэша."""
+    st = os.stat(dat_path)
+    stamp = (DatIndex.CACHE_VERSION, os.path.abspath(dat_path), st.st_size, st.st_mtime_ns)
+
+    cache_path = _cache_path(dat_path, cache_dir) if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached.get('stamp') == stamp:
+                return cached['tables']
+        except Exception as e:
+            logger.warning(f"Кэш DAT повреждён, повторный разбор: {cache_path} ({e})")
+
+    tables = parse_dat(dat_path)
+    logger.info(f"DAT разобран: {tables['source']} ({tables['roms']} ROM'ов).")
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'stamp': stamp, 'tables': tables}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Не удалось записать кэш DAT {cache_path}: {e}")
+    return tables
+
+
+def find_dat_files(dat_dir, patterns):
+    """DAT-файлы в dat_dir, подходящие под шаблоны (в порядке шаблонов, без повторов)."""
+    try:
+        names = sorted(os.listdir(dat_dir))
+    except OSError:
+        return []
+    found = []
+    for pattern in patterns:
+        for name in fnmatch.filter(names, pattern):
+            path = os.path.join(dat_dir, name)
+            if path not in found and os.path.isfile(path):
+                found.append(path)
+    return found
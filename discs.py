@@ -0,0 +1,125 @@
+# discs.py - Образы дисков (PS1): разбор .cue, выбор образа для запуска, многодисковые игры, плейлисты .m3u (без Qt)
+
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 'Game (Disc 1)', 'Game (Disc 2 of 3)', 'Game [CD1]', 'Game (Disk 1)'
+DISC_TAG_RE = re.compile(r"\s*[\(\[]\s*(?:disc|disk|cd)\s*(\d+)(?:\s*of\s*\d+)?\s*[\)\]]", re.IGNORECASE)
+# Строка FILE "имя" BINARY в cue-файле
+CUE_FILE_RE = re.compile(r'^\s*FILE\s+(?:"([^"]+)"|(\S+))', re.IGNORECASE | re.MULTILINE)
+CUE_MAX_BYTES = 64 * 1024 # Cue-файлы крошечные; больше — не cue, а мусор с тем же расширением
+
+
+def is_disc_console(rom_extensions):
+    """Консоль с образами дисков: среди её расширений есть .cue."""
+    return any(ext.lower() == '.cue' for ext in rom_extensions)
+
+
+def _is_cue(path):
+    return path.lower().endswith('.cue')
+
+
+# ----------------------------------------------------------------------
+# НОМЕРА ДИСКОВ
+# ----------------------------------------------------------------------
+def disc_number(name):
+    """Номер диска из имени файла или папки, None — если пометки нет."""
+    match = DISC_TAG_RE.search(name)
+    return int(match.group(1)) if match else None
+
+
+def strip_disc_tag(name):
+    """'Game (Disc 1)' -> 'Game'."""
+    return DISC_TAG_RE.sub("", name).strip()
+
+
+def sibling_disc_name(name, number):
+    """Имя той же игры с другим номером диска: ('Game (Disc 1)', 2) -> 'Game (Disc 2)'."""
+    match = DISC_TAG_RE.search(name)
+    if match is None:
+        return None
+    return f"{name[:match.start(1)]}{number}{name[match.end(1):]}"
+
+
+# ----------------------------------------------------------------------
+# CUE-ФАЙЛЫ И ВЫБОР ОБРАЗА
+# ----------------------------------------------------------------------
+def cue_tracks(cue_path):
+    """Абсолютные пути файлов дорожек, на которые ссылается cue-файл."""
+    try:
+        with open(cue_path, 'rb') as f:
+            raw = f.read(CUE_MAX_BYTES)
+    except OSError as e:
+        logger.warning(f"Не удалось прочитать cue-файл {cue_path}: {e}")
+        return []
+    try:
+        text = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        text = raw.decode('cp1251', 'replace') # Cue от старых русских рипов
+    cue_dir = os.path.dirname(cue_path)
+    return [
+        os.path.normpath(os.path.join(cue_dir, quoted or bare))
+        for quoted, bare in CUE_FILE_RE.findall(text)
+    ]
+
+
+def resolve_disc_images(paths):
+    """
+    Из ROM-файлов одного каталога выбирает образы для запуска: cue-файл
+    важнее дорожек, на которые он ссылается (.bin дорожки сами по себе не
+    запускаются), по одному образу на диск. Возвращает [путь] для одного
+    диска или пути всех дисков по порядку номеров.
+    """
+    paths = sorted(paths)
+    cues = [path for path in paths if _is_cue(path)]
+    tracks = set()
+    for cue in cues:
+        tracks.update(os.path.normcase(track) for track in cue_tracks(cue))
+    images = [path for path in paths if _is_cue(path) or os.path.normcase(path) not in tracks] or paths
+
+    by_disc = {}
+    for path in images:
+        number = disc_number(os.path.basename(path))
+        if number is None:
+            continue
+        current = by_disc.get(number)
+        if current is None or (_is_cue(path) and not _is_cue(current)):
+            by_disc[number] = path
+    if len(by_disc) > 1:
+        return [by_disc[number] for number in sorted(by_disc)]
+
+    cue_images = [path for path in images if _is_cue(path)]
+    return [(cue_images or images)[0]]
+
+
+# ----------------------------------------------------------------------
+# ПЛЕЙЛИСТЫ .M3U
+# ----------------------------------------------------------------------
+def _safe_file_name(name):
+    return re.sub(r'[<>:"/\\|?*]', "_", name).strip() or "game"
+
+
+def write_playlist(playlist_dir, title, disc_paths):
+    """
+    Плейлист .m3u многодисковой игры (DuckStation меняет диски по нему).
+    Файл переписывается, только если список дисков изменился. Возвращает путь.
+    """
+    playlist_path = os.path.join(playlist_dir, f"{_safe_file_name(title)}.m3u")
+    content = "".join(f"{path}\n" for path in disc_paths)
+    try:
+        with open(playlist_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return playlist_path
+    except OSError:
+        pass
+
+    os.makedirs(playlist_dir, exist_ok=True)
+    tmp_path = playlist_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, playlist_path)
+    logger.info(f"Плейлист дисков записан: {playlist_path} ({len(disc_paths)} дисков).")
+    return playlist_path
@@ -0,0 +1,181 @@
+# duplicates.py - Поиск одинаковых ROM'ов в разных папках и консолях (без Qt)
+
+import os
+import logging
+from collections import namedtuple, defaultdict
+
+from hasher import hash_file
+from discs import cue_tracks
+from archives import is_archive, list_archive, ArchiveError
+
+logger = logging.getLogger(__name__)
+
+# Одна игра в отчёте: консоль, папка и файл ROM'а
+DuplicateEntry = namedtuple('DuplicateEntry', ['console', 'folder_name', 'rom_path'])
+# Группа одинаковых игр: keeper остаётся в сетке, остальные — дубли
+DuplicateGroup = namedtuple('DuplicateGroup', ['size', 'keeper', 'duplicates'])
+
+
+# ----------------------------------------------------------------------
+# СОДЕРЖИМОЕ АРХИВОВ
+# ----------------------------------------------------------------------
+def archive_members(rom_data, member_extensions=None):
+    """
+    [(размер, crc32)] распакованных ROM'ов архива. Берётся из оглавления,
+    сохранённого сканером в записи (ARCHIVE), иначе архив читается заново —
+    в обоих случаях без распаковки. None, если архив не читается.
+    """
+    archive = rom_data.get('ARCHIVE')
+    if archive is not None:
+        return sorted((size, crc) for _, size, crc in archive['members'] if crc is not None) or None
+
+    try:
+        members = list_archive(rom_data['FULL_ROM_PATH'])
+    except ArchiveError as e:
+        logger.warning(f"Не удалось прочитать архив {rom_data['FULL_ROM_PATH']}: {e}")
+        return None
+    if member_extensions:
+        members = [member for member in members if member.name.lower().endswith(member_extensions)]
+    return sorted((member.size, member.crc32) for member in members if member.crc32 is not None) or None
+
+
+# ----------------------------------------------------------------------
+# ФАЙЛЫ ОБРАЗОВ ДИСКОВ
+# ----------------------------------------------------------------------
+def rom_data_files(rom_data):
+    """
+    Файлы с данными игры: для образов с cue-файлом — дорожки всех дисков
+    (сам cue — лишь текст разметки и у разных игр может совпадать), иначе
+    сам ROM. [] — если cue не ссылается ни на один файл.
+    """
+    files = []
+    for disc_path in rom_data.get('DISCS') or [rom_data['FULL_ROM_PATH']]:
+        if disc_path.lower().endswith('.cue'):
+            tracks = cue_tracks(disc_path)
+            if not tracks:
+                return []
+            files.extend(tracks)
+        else:
+            files.append(disc_path)
+    return files
+
+
+# ----------------------------------------------------------------------
+# ПОИСК ДУБЛЕЙ
+# ----------------------------------------------------------------------
+def find_duplicates(entries, hashes=None, member_extensions=None, hash_missing=True):
+    """
+    Ищет одинаковые игры. entries — [(консоль, rom_data)], hashes — кэш
+    {путь: {'size', 'crc32', ...}} от хэшера. Сначала игры группируются по
+    размеру (дёшево: stat или оглавление архива), и только в совпавших по
+    размеру группах сравнивается содержимое: CRC32 распакованных файлов для
+    архивов, CRC32 из кэша хэшей (или свежий хэш) для обычных файлов.
+    Поэтому .nes и .rar с тем же .nes внутри считаются одной игрой. Образы
+    дисков сравниваются по дорожкам из cue-файлов (см. rom_data_files).
+    """
+    hashes = hashes or {}
+    member_extensions = tuple(ext.lower() for ext in member_extensions) if member_extensions else None
+
+    # --- Шаг 1: группировка по размеру ---
+    by_size = defaultdict(list)
+    members_cache = {}
+    files_cache = {}
+    for console_key, rom_data in entries:
+        rom_path = rom_data.get('FULL_ROM_PATH')
+        if not rom_path:
+            continue
+        if is_archive(rom_path):
+            members = archive_members(rom_data, member_extensions)
+            if not members:
+                continue
+            members_cache[rom_path] = members
+            size = sum(member_size for member_size, _ in members)
+        else:
+            files = rom_data_files(rom_data)
+            try:
+                sizes = [hashes[path]['size'] if path in hashes else os.stat(path).st_size for path in files]
+            except OSError:
+                continue
+            if not files:
+                continue
+            files_cache[rom_path] = list(zip(files, sizes))
+            size = sum(sizes)
+        by_size[size].append(DuplicateEntry(console_key, rom_data['FOLDER_NAME'], rom_path))
+
+    # --- Шаг 2: сравнение содержимого внутри групп одного размера ---
+    groups = []
+    for size, candidates in by_size.items():
+        # Пустые файлы (заглушки, недокачанные) дублями не считаем
+        if len(candidates) < 2 or size == 0:
+            continue
+        by_content = defaultdict(list)
+        for entry in candidates:
+            key = _content_key(entry.rom_path, members_cache, files_cache, hashes, hash_missing)
+            if key is not None:
+                by_content[key].append(entry)
+        for same in by_content.values():
+            if len(same) > 1:
+                keeper = _pick_keeper(same)
+                groups.append(DuplicateGroup(size, keeper, [entry for entry in same if entry is not keeper]))
+
+    groups.sort(key=lambda group: -group.size)
+    return groups
+
+
+def _content_key(rom_path, members_cache, files_cache, hashes, hash_missing):
+    """Содержимое как кортеж (размер, crc32) распакованных файлов или дорожек."""
+    if rom_path in members_cache:
+        return tuple(members_cache[rom_path])
+    key = []
+    for path, size in files_cache[rom_path]:
+        digests = hashes.get(path)
+        if digests is None:
+            if not hash_missing:
+                return None
+            try:
+                digests = hash_file(path)
+            except OSError as e:
+                logger.warning(f"Не удалось хэшировать {path}: {e}")
+                return None
+            hashes[path] = digests
+        key.append((size, int(digests['crc32'], 16)))
+    return tuple(sorted(key))
+
+
+def _pick_keeper(entries):
+    """
+    В сетке остаётся распакованный файл, затем папка с самым коротким именем
+    (копии обычно с приписками вроде '(copy)'), затем первая в каталоге.
+    """
+    return min(entries, key=lambda entry: (is_archive(entry.rom_path), len(entry.folder_name)))
+
+
+def hidden_in_console(groups, console_key):
+    """
+    Папки консоли, которые можно скрыть: в каждой группе в сетке консоли
+    остаётся одна копия. Дубли из других консолей только попадают в отчёт.
+    """
+    hidden = set()
+    for group in groups:
+        members = [entry for entry in [group.keeper] + group.duplicates if entry.console == console_key]
+        if len(members) < 2:
+            continue
+        keeper = group.keeper if group.keeper in members else _pick_keeper(members)
+        hidden.update(entry.folder_name for entry in members if entry is not keeper)
+    return hidden
+
+
+def format_report(groups):
+    """Текстовый отчёт для лога и CLI."""
+    if not groups:
+        return "Дубликаты не найдены."
+    wasted = sum(group.size * len(group.duplicates) for group in groups)
+    lines = [
+        f"Найдено групп дубликатов: {len(groups)}, лишних копий: "
+        f"{sum(len(group.duplicates) for group in groups)} (~{wasted / (1024 * 1024):.1f} МБ)."
+    ]
+    for group in groups:
+        lines.append(f"  {group.keeper.console}/{group.keeper.folder_name} ({group.size / 1024:.0f} КБ):")
+        for entry in group.duplicates:
+            lines.append(f"    = {entry.console}/{entry.folder_name} ({os.path.basename(entry.rom_path)})")
+    return "\n".join(lines)
@@ -0,0 +1,224 @@
+# extract_cache.py - Кэш распакованных ROM'ов для эмуляторов, не умеющих открывать архивы (без Qt)
+
+import os
+import time
+import shutil
+import hashlib
+import zipfile
+import logging
+import subprocess
+
+from archives import list_archive, ArchiveError
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Порядок выбора файла для запуска: образ диска с разметкой, затем плейлист, затем первый ROM
+LAUNCH_PRIORITY = ('.cue', '.m3u')
+
+
+class ExtractionError(Exception):
+    """Распаковка не удалась (или была отменена)."""
+
+
+def launch_member(member_names):
+    """Файл из архива, который нужно передать эмулятору."""
+    for ext in LAUNCH_PRIORITY:
+        for name in member_names:
+            if name.lower().endswith(ext):
+                return name
+    return member_names[0]
+
+
+def _safe_relpath(member_name):
+    """Путь файла архива внутри каталога кэша без выхода за его пределы."""
+    parts = [part for part in member_name.replace("\\", "/").split("/") if part not in ("", ".", "..")]
+    if not parts:
+        raise ExtractionError(f"Недопустимое имя в архиве: {member_name}")
+    return os.path.join(*parts)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС КЭША РАСПАКОВКИ (ExtractionCache)
+# ----------------------------------------------------------------------
+class ExtractionCache:
+    """
+    Каталог с распакованными ROM'ами: по подкаталогу на архив, ключ — путь,
+    размер и mtime архива (изменённый архив распакуется заново). Время
+    последнего запуска хранится в mtime подкаталога; при превышении
+    max_bytes удаляются давно не запускавшиеся игры (LRU).
+    """
+
+    def __init__(self, cache_dir, max_bytes, unrar_path=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.unrar_path = unrar_path
+
+    def entry_dir(self, archive_path):
+        st = os.stat(archive_path)
+        key = f"{os.path.abspath(archive_path)}|{st.st_size}|{st.st_mtime_ns}"
+        name = os.path.splitext(os.path.basename(archive_path))[0]
+        return os.path.join(self.cache_dir, f"{name}.{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}")
+
+    # --- Поиск и распаковка ---
+
+    def lookup(self, archive_path, member_names):
+        """Путь к распакованному файлу для запуска или None, если архива нет в кэше."""
+        try:
+            entry = self.entry_dir(archive_path)
+        except OSError:
+            return None
+        if not all(os.path.isfile(os.path.join(entry, _safe_relpath(name))) for name in member_names):
+            return None
+        self._touch(entry)
+        return os.path.join(entry, _safe_relpath(launch_member(member_names)))
+
+    def extract(self, archive_path, members, on_progress=None, is_cancelled=None):
+        """
+        Потоково распаковывает members ([(имя, размер)]) во временный каталог и
+        атомарно переименовывает его в запись кэша. Возвращает путь для запуска.
+        on_progress(распаковано байт, всего байт).
+        """
+        is_cancelled = is_cancelled or (lambda: False)
+        entry = self.entry_dir(archive_path)
+        part_dir = entry + ".part"
+        shutil.rmtree(part_dir, ignore_errors=True)
+        os.makedirs(part_dir)
+
+        total = sum(size for _, size in members) or 1
+        done = 0
+
+        def progress(written):
+            nonlocal done
+            done += written
+            if on_progress:
+                on_progress(done, total)
+            if is_cancelled():
+                raise ExtractionError("Распаковка отменена.")
+
+        try:
+            is_zip = archive_path.lower().endswith('.zip')
+            tool_names = {} if is_zip else self._archive_names(archive_path, members)
+            for name, _ in members:
+                target = os.path.join(part_dir, _safe_relpath(name))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if is_zip:
+                    self._extract_zip_member(archive_path, name, target, progress)
+                else:
+                    self._extract_with_tool(archive_path, tool_names.get(name, name), target, progress)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(part_dir, entry)
+        except BaseException:
+            shutil.rmtree(part_dir, ignore_errors=True)
+            raise
+
+        self._touch(entry)
+        self.evict(keep=entry)
+        return os.path.join(entry, _safe_relpath(launch_member([name for name, _ in members])))
+
+    @staticmethod
+    def _copy_stream(source, target, progress):
+        with open(target, 'wb') as out:
+            while True:
+                chunk = source.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                out.write(chunk)
+                progress(len(chunk))
+
+    def _extract_zip_member(self, archive_path, name, target, progress):
+        try:
+            with zipfile.ZipFile(archive_path) as archive, archive.open(name) as source:
+                self._copy_stream(source, target, progress)
+        except (zipfile.BadZipFile, KeyError, NotImplementedError) as e:
+            raise ExtractionError(f"{os.path.basename(archive_path)}: {e}") from e
+
+    @staticmethod
+    def _archive_names(archive_path, members):
+        """
+        Имена для распаковщика по свежему оглавлению архива: в каталоге могут
+        остаться имена RAR, прочитанные в неверной кодировке. Неизвестное имя
+        сопоставляется с файлом того же размера, если такой файл один.
+        """
+        try:
+            listed = list_archive(archive_path)
+        except ArchiveError as e:
+            logger.warning(f"Оглавление {os.path.basename(archive_path)} не прочитано: {e}")
+            return {}
+        names = {member.name for member in listed}
+        by_size = {}
+        for member in listed:
+            by_size.setdefault(member.size, []).append(member.name)
+        resolved = {}
+        for name, size in members:
+            candidates = by_size.get(size, [])
+            if name not in names and len(candidates) == 1:
+                resolved[name] = candidates[0]
+        return resolved
+
+    def _unpack_command(self, archive_path, name):
+        """Команда, печатающая файл архива в stdout: UnRAR или 7-Zip."""
+        candidates = [self.unrar_path] if self.unrar_path else []
+        candidates += ["unrar", "UnRAR", "7z", "7za"]
+        for candidate in candidates:
+            tool = shutil.which(candidate) or (candidate if candidate and os.path.isfile(candidate) else None)
+            if not tool:
+                continue
+            if os.path.basename(tool).lower().startswith("7z"):
+                return [tool, "e", "-so", archive_path, name]
+            return [tool, "p", "-inul", archive_path, name]
+        raise ExtractionError("Не найден распаковщик RAR (UnRAR или 7-Zip), см. UNRAR_PATH в config.py.")
+
+    def _extract_with_tool(self, archive_path, name, target, progress):
+        process = subprocess.Popen(
+            self._unpack_command(archive_path, name),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        )
+        try:
+            self._copy_stream(process.stdout, target, progress)
+        except BaseException:
+            process.kill()
+            raise
+        finally:
+            process.stdout.close()
+        if process.wait() != 0:
+            raise ExtractionError(f"Распаковщик завершился с кодом {process.returncode}: {os.path.basename(archive_path)}")
+
+    # --- LRU ---
+
+    @staticmethod
+    def _touch(entry):
+        now = time.time()
+        os.utime(entry, (now, now))
+
+    @staticmethod
+    def _dir_size(path):
+        total = 0
+        for dir_path, _, file_names in os.walk(path):
+            for file_name in file_names:
+                try:
+                    total += os.path.getsize(os.path.join(dir_path, file_name))
+                except OSError:
+                    pass
+        return total
+
+    def evict(self, keep=None):
+        """Удаляет давно не запускавшиеся записи, пока кэш больше max_bytes."""
+        try:
+            entries = [
+                entry for entry in os.scandir(self.cache_dir)
+                if entry.is_dir() and not entry.name.endswith(".part")
+            ]
+        except OSError:
+            return
+        sized = [(entry.stat().st_mtime, entry.path, self._dir_size(entry.path)) for entry in entries]
+        total = sum(size for _, _, size in sized)
+        for _, path, size in sorted(sized):
+            if total <= self.max_bytes:
+                break
+            if keep and os.path.normcase(path) == os.path.normcase(keep):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info(f"Кэш распаковки: удалена давно не запускавшаяся игра {os.path.basename(path)}.")
@@ -0,0 +1,79 @@
+# game_info.py - Разбор описаний игр (index.html) без зависимостей от Qt
+
+import re
+
+# ----------------------------------------------------------------------
+# ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
+# ----------------------------------------------------------------------
+
+def extract_short_info(html_content):
+    """
+    Извлекает основные детали (год, разработчик, оценка критиков и т.д.) из HTML для тултипа.
+    Поля, которые не удалось спарсить (возвращают '???'), исключаются из итогового описания.
+    """
+    
+    # Полный список мета-полей для использования в lookahead
+    META_FIELDS = ["Дата выхода", "Разработчик", "Издатель", "Количество игроков", "Жанр", "Доп. детали", "Год", "Оценка критиков", "Язык игры"]
+
+    # Создаем строку-разделитель, которая ищет любое название поля, завершающееся двоеточием
+    field_separators = "|".join([re.escape(f + ":") for f in META_FIELDS])
+
+    def get_value(field_name, content):
+        """Вспомогательная функция для надежного извлечения значения поля по его имени."""
+        
+        # Регулярное выражение для извлечения значения поля
+        pattern = re.search(
+            # Start: Имя поля: и опциональные пробелы
+            rf'{re.escape(field_name)}:\s*'
+            # Value: Нежадный захват (.*?)
+            r'(.*?)'
+            # Lookahead (Конец): Остановка перед следующим полем, блочным тегом или концом строки.
+            rf'(?=\s*(?:<[^>]+>)*\s*(?:{field_separators})|\s*</p>|\s*</li>|\s*</div>|$)',
+            content,
+            re.IGNORECASE | re.DOTALL
+        )
+
+        if pattern:
+            raw_value = pattern.group(1).strip()
+            
+            # Агрессивно удаляем ВСЕ HTML-теги и сущности
+            clean_value = re.sub(r'<[^>]+>', '', raw_value).strip()
+            clean_value = clean_value.replace('&nbsp;', ' ').strip()
+
+            return clean_value if clean_value else '???'
+
+        return '???'
+
+    # --- 1. Парсинг основных полей ---
+    dev_data = get_value("Разработчик", html_content)
+    lang_data = get_value("Количество игроков", html_content)
+
+    # --- 2. Парсинг Года ---
+    year_data = get_value("Год", html_content)
+    year_match = re.search(r'(\d{4})', year_data)
+    year = year_match.group(1) if year_match else '???'
+    
+    if year == '???':
+        year_data_full = get_value("Дата выхода", html_content)
+        year_match = re.search(r'(\d{4})', year_data_full)
+        year = year_match.group(1) if year_match else '???'
+    
+    # --- 3. Обработка ОЦЕНКИ КРИТИКОВ ---
+    critics_rating_data = get_value("Оценка критиков", html_content)
+    
+    # ----------------------------------------------------------------------------------
+    # --- 4. Формирование итоговой строки (С УСЛОВИЕМ) ---
+    # ----------------------------------------------------------------------------------
+    info_parts = []
+    
+    # Вспомогательная функция для добавления строки только при наличии данных
+    def add_info_part(label, data):
+        if data != '???':
+            info_parts.append(f"{label}: {data}")
+
+    add_info_part("Разработчик", dev_data)
+    add_info_part("Год", year)
+    add_info_part("Количество игроков", lang_data)
+    add_info_part("Оценка критиков", critics_rating_data)
+    
+    return "\n".join(info_parts)
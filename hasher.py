@@ -0,0 +1,118 @@
+# hasher.py - Хэши содержимого ROM'ов (CRC32/MD5/SHA1) в пуле процессов, без Qt
+
+import os
+import mmap
+import time
+import zlib
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+# ----------------------------------------------------------------------
+# ХЭШИРОВАНИЕ ОДНОГО ФАЙЛА
+# ----------------------------------------------------------------------
+def _update_digests(digests, crc, data):
+    for digest in digests:
+        digest.update(data)
+    return zlib.crc32(data, crc)
+
+
+def hash_file(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Считает CRC32, MD5 и SHA1 за один последовательный проход. Файл
+    отображается в память (mmap) и подаётся кусками по chunk_size без
+    копирования; если mmap недоступен (сетевые ФС), читается большими блоками.
+    """
+    md5, sha1 = hashlib.md5(), hashlib.sha1()
+    crc = 0
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        except (OSError, ValueError):
+            mapped = None
+
+        if mapped is not None:
+            with mapped, memoryview(mapped) as view:
+                for offset in range(0, size, chunk_size):
+                    chunk = view[offset:offset + chunk_size]
+                    crc = _update_digests((md5, sha1), crc, chunk)
+                    chunk.release()
+        else:
+            buffer = bytearray(chunk_size)
+            with memoryview(buffer) as view:
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    crc = _update_digests((md5, sha1), crc, view[:read])
+
+    return {
+        'size': size,
+        'crc32': f"{crc & 0xFFFFFFFF:08x}",
+        'md5': md5.hexdigest(),
+        'sha1': sha1.hexdigest(),
+    }
+
+
+def _hash_job(path, chunk_size):
+    """Задача для пула процессов: (путь, хэши или None, ошибка)."""
+    try:
+        return path, hash_file(path, chunk_size), None
+    except OSError as e:
+        return path, None, str(e)
+
+
+# ----------------------------------------------------------------------
+# ПАКЕТНОЕ ХЭШИРОВАНИЕ
+# ----------------------------------------------------------------------
+def file_stat_key(path):
+    """(размер, mtime_ns) файла или None — ключ актуальности кэша хэшей."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def hash_files(paths, workers=2, chunk_size=DEFAULT_CHUNK_SIZE,
+               is_cancelled=None, is_paused=None, on_result=None):
+    """
+    Хэширует файлы в пуле из workers процессов. В работе держится не больше
+    2 * workers файлов, поэтому пауза (is_paused) и отмена срабатывают
+    быстро: новые файлы не отдаются пулу, а начатые дохэшируются в фоне.
+    on_result(path, digests, error) вызывается в вызывающем потоке.
+    Возвращает False при отмене.
+    """
+    is_cancelled = is_cancelled or (lambda: False)
+    is_paused = is_paused or (lambda: False)
+    queue = list(reversed(paths))
+    max_in_flight = max(1, workers) * 2
+
+    executor = ProcessPoolExecutor(max_workers=max(1, workers))
+    cancelled = False
+    try:
+        pending = set()
+        while queue or pending:
+            if is_cancelled():
+                cancelled = True
+                return False
+            while queue and len(pending) < max_in_flight and not is_paused():
+                pending.add(executor.submit(_hash_job, queue.pop(), chunk_size))
+            if not pending:
+                time.sleep(0.1) # Пауза: ждём, ничего не отдавая пулу
+                continue
+
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                if on_result:
+                    on_result(*future.result())
+        return True
+    finally:
+        # При отмене не ждём процессы: запуск игры не должен зависеть от хэширования
+        executor.shutdown(wait=not cancelled, cancel_futures=True)
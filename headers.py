@@ -0,0 +1,279 @@
+# headers.py - Метаданные из заголовков ROM'ов: iNES/NES 2.0, Mega Drive, PS1 (ISO9660), без Qt
+
+import os
+import re
+import zlib
+import struct
+import zipfile
+import logging
+
+from discs import cue_tracks
+
+logger = logging.getLogger(__name__)
+
+# Заголовок читается позиционным чтением: несколько КБ вместо всего образа
+_pread = getattr(os, 'pread', None)
+
+
+def _read_at(f, offset, size):
+    if _pread is not None:
+        return _pread(f.fileno(), size, offset)
+    f.seek(offset)
+    return f.read(size)
+
+
+def _text(raw):
+    """Поле заголовка: ASCII без хвостовых пробелов и нулей, повторяющиеся пробелы схлопнуты."""
+    return " ".join(raw.decode('ascii', 'replace').replace("\x00", " ").split())
+
+
+# ----------------------------------------------------------------------
+# NES: iNES / NES 2.0
+# ----------------------------------------------------------------------
+INES_MAGIC = b"NES\x1a"
+NES_TIMINGS = {0: "NTSC", 1: "PAL", 2: "NTSC/PAL", 3: "Dendy"}
+NES_MIRRORING = {0: "горизонтальное", 1: "вертикальное"}
+
+
+def parse_nes(data):
+    """16-байтовый заголовок iNES/NES 2.0: маппер, объёмы PRG/CHR, ТВ-система."""
+    if len(data) < 16 or data[:4] != INES_MAGIC:
+        return None
+    flags6, flags7 = data[6], data[7]
+    nes2 = flags7 & 0x0C == 0x08
+    mapper = flags6 >> 4
+    if nes2:
+        mapper |= (flags7 & 0xF0) | ((data[8] & 0x0F) << 8)
+        timing = NES_TIMINGS[data[12] & 0x03]
+    else:
+        # Старые дампы с подписью 'DiskDude!' в байтах 7-15: старший полубайт маппера — мусор
+        if not any(data[12:16]):
+            mapper |= flags7 & 0xF0
+        timing = "PAL" if data[9] & 0x01 else "NTSC"
+
+    header = {
+        'format': "NES 2.0" if nes2 else "iNES",
+        'mapper': mapper,
+        'prg_kb': data[4] * 16,
+        'chr_kb': data[5] * 8,
+        'mirroring': "четырёхэкранное" if flags6 & 0x08 else NES_MIRRORING[flags6 & 0x01],
+        'battery': bool(flags6 & 0x02),
+        'region': timing,
+    }
+    if nes2:
+        header['submapper'] = data[8] >> 4
+    return header
+
+
+# ----------------------------------------------------------------------
+# MEGA DRIVE: заголовок 'SEGA' по адресу 0x100 (в т.ч. чередование SMD)
+# ----------------------------------------------------------------------
+MD_HEADER_OFFSET = 0x100
+MD_HEADER_SIZE = 0x100
+SMD_HEADER_SIZE = 512
+SMD_BLOCK_SIZE = 16 * 1024
+MD_OLD_REGIONS = {'J': "Japan", 'U': "USA", 'E': "Europe"}
+MD_NEW_REGIONS = ((0x1, "Japan"), (0x4, "USA"), (0x8, "Europe"))
+
+
+def smd_deinterleave(block):
+    """Блок SMD: в первой половине нечётные байты, во второй — чётные."""
+    half = len(block) // 2
+    out = bytearray(len(block))
+    out[0::2] = block[half:]
+    out[1::2] = block[:half]
+    return bytes(out)
+
+
+def _is_smd(head, file_size):
+    return file_size % SMD_BLOCK_SIZE == SMD_HEADER_SIZE and head[8:10] == b"\xaa\xbb"
+
+
+def _md_region(raw):
+    code = _text(raw)
+    if not code:
+        return ""
+    if all(char in MD_OLD_REGIONS for char in code):
+        return ", ".join(MD_OLD_REGIONS[char] for char in code)
+    try:
+        mask = int(code[0], 16)
+    except ValueError:
+        return code
+    return ", ".join(name for bit, name in MD_NEW_REGIONS if mask & bit)
+
+
+def parse_megadrive(header):
+    """256 байт заголовка Mega Drive (с адреса 0x100 образа)."""
+    if len(header) < MD_HEADER_SIZE or b"SEGA" not in header[:16]: # Бывает и ' SEGA GENESIS'
+        return None
+    overseas = _text(header[0x50:0x80])
+    domestic = _text(header[0x20:0x50])
+    return {
+        'format': _text(header[0x00:0x10]),
+        'title': overseas or domestic,
+        'serial': _text(header[0x80:0x8E]),
+        'region': _md_region(header[0xF0:0xF3]),
+    }
+
+
+def _read_megadrive(f, file_size):
+    head = _read_at(f, 0, SMD_HEADER_SIZE)
+    if _is_smd(head, file_size):
+        block = smd_deinterleave(_read_at(f, SMD_HEADER_SIZE, SMD_BLOCK_SIZE))
+        return parse_megadrive(block[MD_HEADER_OFFSET:MD_HEADER_OFFSET + MD_HEADER_SIZE])
+    return parse_megadrive(_read_at(f, MD_HEADER_OFFSET, MD_HEADER_SIZE))
+
+
+# ----------------------------------------------------------------------
+# PS1: ISO9660 -> SYSTEM.CNF -> серийный номер
+# ----------------------------------------------------------------------
+CD_SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+RAW_SECTOR_SIZE = 2352
+SECTOR_SIZE = 2048
+PVD_SECTOR = 16
+BOOT_RE = re.compile(r"BOOT\s*=\s*cdrom:\\?\\?([^;\s]+)", re.IGNORECASE)
+SERIAL_RE = re.compile(r"([A-Z]{4})[_-]?(\d{3})\.?(\d{2})")
+PS1_REGIONS = {
+    'SLUS': "USA", 'SCUS': "USA", 'SLES': "Europe", 'SCES': "Europe", 'SCED': "Europe",
+    'SLPS': "Japan", 'SCPS': "Japan", 'SLPM': "Japan", 'SCPM': "Japan", 'SIPS': "Japan",
+}
+
+
+class _DiscImage:
+    """Чтение логических секторов (2048 байт) из образа 2048 или raw 2352 (MODE1/MODE2)."""
+
+    def __init__(self, f):
+        self.f = f
+        first = _read_at(f, 0, 16)
+        if first[:12] == CD_SYNC:
+            self.sector_size = RAW_SECTOR_SIZE
+            self.data_offset = 16 if first[15] == 1 else 24 # MODE2: ещё 8 байт подзаголовка
+        else:
+            self.sector_size = SECTOR_SIZE
+            self.data_offset = 0
+
+    def read(self, lba, size=SECTOR_SIZE):
+        chunks = []
+        while size > 0:
+            chunk = _read_at(self.f, lba * self.sector_size + self.data_offset, min(size, SECTOR_SIZE))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+            lba += 1
+        return b"".join(chunks)
+
+
+def _find_in_directory(directory, wanted):
+    """(LBA, размер) файла в каталоге ISO9660 (имя без ';1', регистр не важен)."""
+    pos = 0
+    while pos < len(directory):
+        length = directory[pos]
+        if length == 0:
+            pos = (pos // SECTOR_SIZE + 1) * SECTOR_SIZE # Записи не пересекают границу сектора
+            continue
+        record = directory[pos:pos + length]
+        name_len = record[32]
+        name = record[33:33 + name_len].decode('ascii', 'replace').split(";")[0].upper()
+        if name == wanted:
+            return struct.unpack_from('<I', record, 2)[0], struct.unpack_from('<I', record, 10)[0]
+        pos += length
+    return None
+
+
+def read_ps1_image(f):
+    """Метка тома и серийный номер из SYSTEM.CNF (несколько секторов образа)."""
+    disc = _DiscImage(f)
+    pvd = disc.read(PVD_SECTOR)
+    if len(pvd) < SECTOR_SIZE or pvd[1:6] != b"CD001":
+        return None
+    root_lba, root_size = struct.unpack_from('<I', pvd, 156 + 2)[0], struct.unpack_from('<I', pvd, 156 + 10)[0]
+    header = {'format': "ISO9660", 'title': _text(pvd[40:72])}
+
+    found = _find_in_directory(disc.read(root_lba, min(root_size, 8 * SECTOR_SIZE)), "SYSTEM.CNF")
+    if found:
+        system_cnf = disc.read(found[0], min(found[1], SECTOR_SIZE)).decode('ascii', 'replace')
+        boot = BOOT_RE.search(system_cnf)
+        serial = SERIAL_RE.search(boot.group(1).upper()) if boot else None
+        if serial:
+            prefix = serial.group(1)
+            header['serial'] = f"{prefix}-{serial.group(2)}{serial.group(3)}"
+            header['region'] = PS1_REGIONS.get(prefix, "")
+    return header
+
+
+def _disc_data_file(rom_path):
+    """Файл с данными диска: для .cue — его первая дорожка."""
+    if rom_path.lower().endswith('.cue'):
+        tracks = cue_tracks(rom_path)
+        return tracks[0] if tracks else None
+    return rom_path
+
+
+# ----------------------------------------------------------------------
+# ПУБЛИЧНЫЙ API
+# ----------------------------------------------------------------------
+NES_EXTENSIONS = ('.nes',)
+MD_EXTENSIONS = ('.gen', '.smd', '.md', '.bin')
+DISC_EXTENSIONS = ('.cue', '.iso', '.img', '.bin')
+ZIP_PREFIX_SIZE = SMD_HEADER_SIZE + SMD_BLOCK_SIZE # Хватает и на заголовок SMD
+
+
+def _parse_prefix(name, data):
+    """Заголовок по началу файла (для ROM'а в .zip)."""
+    lower = name.lower()
+    if lower.endswith(NES_EXTENSIONS):
+        return parse_nes(data[:16])
+    if lower.endswith(MD_EXTENSIONS):
+        if _is_smd(data, len(data)) or lower.endswith('.smd'):
+            data = smd_deinterleave(data[SMD_HEADER_SIZE:SMD_HEADER_SIZE + SMD_BLOCK_SIZE])
+        return parse_megadrive(data[MD_HEADER_OFFSET:MD_HEADER_OFFSET + MD_HEADER_SIZE])
+    return None
+
+
+def _read_zip_header(rom_path, member_name):
+    with zipfile.ZipFile(rom_path) as archive, archive.open(member_name) as member:
+        # Распаковывается только начало файла
+        return _parse_prefix(member_name, member.read(ZIP_PREFIX_SIZE))
+
+
+def read_header(rom_path, disc_console=False, archive=None):
+    """
+    Метаданные из заголовка ROM'а: {'format', 'title', 'serial', 'region', ...}
+    или None (заголовка нет или формат не поддерживается). Читается только
+    нужная часть файла; для .zip — начало первого ROM'а из оглавления archive.
+    """
+    lower = rom_path.lower()
+    try:
+        if lower.endswith('.zip'):
+            members = (archive or {}).get('members')
+            return _read_zip_header(rom_path, members[0][0]) if members else None
+        if disc_console and lower.endswith(DISC_EXTENSIONS):
+            data_path = _disc_data_file(rom_path)
+            if not data_path:
+                return None
+            with open(data_path, 'rb') as f:
+                return read_ps1_image(f)
+        if lower.endswith(NES_EXTENSIONS):
+            with open(rom_path, 'rb') as f:
+                return parse_nes(_read_at(f, 0, 16))
+        if lower.endswith(MD_EXTENSIONS):
+            with open(rom_path, 'rb') as f:
+                return _read_megadrive(f, os.fstat(f.fileno()).st_size)
+    # Зашифрованный (RuntimeError), Deflate64 (NotImplementedError) или битый член
+    # архива не должен прерывать сканирование всей консоли
+    except (OSError, zipfile.BadZipFile, KeyError, struct.error, IndexError, RuntimeError,
+            NotImplementedError, zlib.error, EOFError) as e:
+        logger.warning(f"Не удалось прочитать заголовок {rom_path}: {e}")
+    return None
+
+
+def describe_header(header):
+    """Короткая строка для подсказки: 'USA · SLUS-00705 · маппер 4'."""
+    if not header:
+        return ""
+    parts = [header.get('region'), header.get('serial')]
+    if 'mapper' in header:
+        parts.append(f"маппер {header['mapper']}")
+        parts.append(f"PRG {header['prg_kb']} КБ, CHR {header['chr_kb']} КБ")
+    return " · ".join(part for part in parts if part)
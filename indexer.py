@@ -0,0 +1,121 @@
+# indexer.py - Консольная индексация библиотеки без окна лаунчера
+#
+# Использование:
+#   python indexer.py                  — все консоли
+#   python indexer.py SONY SEGA        — выбранные консоли
+#   python indexer.py --full --workers 16
+#
+# Запускает то же обнаружение ROM'ов, описаний и скриншотов, что и GameLoaderThread,
+# и записывает результат в каталог. Qt не требуется.
+
+import sys
+import time
+import logging
+import argparse
+
+from config import CONSOLE_SETTINGS, ALLOWED_COVER_EXTENSIONS, CATALOG_PATH, SNAPSHOT_DIR, ROOT_PRECEDENCE, DEDUPE_HARDLINKS
+from catalog import GameCatalog
+from scanner import scan_roots, console_roots, scan_filter_for, ScanStats, MissCache, LinkGuard
+from duplicates import find_duplicates, format_report
+from archives import ARCHIVE_EXTENSIONS
+from hasher import file_stat_key
+
+logger = logging.getLogger(__name__)
+
+
+def index_console(catalog, console_key, workers=None, full=False):
+    """Сканирует одну консоль и сохраняет её в каталог. Возвращает ScanStats или None."""
+    settings = CONSOLE_SETTINGS[console_key]
+    root_folders = console_roots(settings)
+    workers = workers or settings.get("SCAN_WORKERS", 1)
+
+    # --full: сигнатуры из каталога игнорируются, каждая папка проверяется заново
+    existing_roms_map = {} if full else {rom['FOLDER_NAME']: rom for rom in catalog.load_console(console_key)}
+    misses = MissCache({} if full else catalog.load_empty_folders(console_key))
+
+    stats = ScanStats()
+    try:
+        results = scan_roots(
+            root_folders, settings.get("ROM_EXTENSIONS", []), ALLOWED_COVER_EXTENSIONS,
+            existing_roms_map=existing_roms_map, workers=workers, precedence=ROOT_PRECEDENCE, stats=stats,
+            misses=misses, guard=LinkGuard(DEDUPE_HARDLINKS), scan_filter=scan_filter_for(settings)
+        )
+    except FileNotFoundError:
+        logger.error(f"Корневая папка не найдена: {', '.join(root_folders)}")
+        return None
+
+    rom_list = [rom_data for rom_data in results if rom_data]
+    save_started = time.monotonic()
+    catalog.save_console(console_key, rom_list)
+    catalog.save_empty_folders(console_key, misses.found)
+    logger.info(f"{console_key} (запись каталога {time.monotonic() - save_started:.2f} с): {stats.report()}")
+    return stats
+
+
+def print_duplicates(catalog):
+    """Ищет дубликаты по всем консолям каталога (хэши — из кэша или по месту)."""
+    entries, member_extensions = [], set()
+    for console_key, settings in CONSOLE_SETTINGS.items():
+        entries += [(console_key, rom_data) for rom_data in catalog.load_console(console_key)]
+        member_extensions.update(ext for ext in settings.get("ROM_EXTENSIONS", ()) if ext.lower() not in ARCHIVE_EXTENSIONS)
+    cached = catalog.load_hashes(rom_data.get('FULL_ROM_PATH') for _, rom_data in entries if rom_data.get('FULL_ROM_PATH'))
+    # Хэш годен, только если файл не менялся после хэширования
+    hashes = {path: entry for path, entry in cached.items() if file_stat_key(path) == (entry['size'], entry['mtime_ns'])}
+    print(format_report(find_duplicates(entries, hashes, tuple(member_extensions))))
+
+
+def print_empty_folders(catalog, console_keys):
+    """Папки без ROM'ов по консолям — кандидаты на чистку."""
+    for console_key in console_keys:
+        folder_paths = sorted(catalog.load_empty_folders(console_key))
+        print(f"{console_key}: папок без ROM'ов — {len(folder_paths)}")
+        for folder_path in folder_paths:
+            print(f"  {folder_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Индексация библиотеки Retro Hub без запуска лаунчера.")
+    parser.add_argument("consoles", nargs="*", metavar="CONSOLE",
+                        help=f"Консоли для индексации ({', '.join(CONSOLE_SETTINGS)}); по умолчанию — все.")
+    parser.add_argument("--catalog", default=CATALOG_PATH, help="Путь к файлу каталога.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Потоков сканирования (по умолчанию — SCAN_WORKERS консоли).")
+    parser.add_argument("--full", action="store_true",
+                        help="Проверить все папки заново, не доверяя сигнатурам каталога.")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="После индексации вывести отчёт о дубликатах по всему каталогу.")
+    parser.add_argument("--empty", action="store_true",
+                        help="После индексации вывести папки, в которых не найдено ROM'ов.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Подробный лог.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        stream=sys.stdout
+    )
+
+    console_keys = [key.upper() for key in args.consoles] or list(CONSOLE_SETTINGS)
+    unknown = [key for key in console_keys if key not in CONSOLE_SETTINGS]
+    if unknown:
+        parser.error(f"Неизвестные консоли: {', '.join(unknown)}")
+
+    # Снимки для лаунчера пишутся только для его каталога
+    catalog = GameCatalog(args.catalog, snapshot_dir=SNAPSHOT_DIR if args.catalog == CATALOG_PATH else None)
+    started = time.monotonic()
+    failed = 0
+    for console_key in console_keys:
+        if index_console(catalog, console_key, workers=args.workers, full=args.full) is None:
+            failed += 1
+
+    if args.duplicates:
+        print_duplicates(catalog)
+    if args.empty:
+        print_empty_folders(catalog, console_keys)
+
+    logger.info(f"Индексация завершена за {time.monotonic() - started:.2f} с ({len(console_keys) - failed}/{len(console_keys)} консолей).")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
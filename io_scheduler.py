@@ -0,0 +1,151 @@
+# io_scheduler.py - Общий планировщик фонового ввода-вывода с приоритетами (без Qt)
+
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты (меньше — раньше): обложки видимых плиток, активная консоль, прогрев
+PRIORITY_VISIBLE = 0
+PRIORITY_ACTIVE = 1
+PRIORITY_PREFETCH = 2
+PRIORITY_NAMES = ('visible', 'active', 'prefetch')
+
+
+class _IOTask:
+    __slots__ = ('fn', 'args', 'kwargs', 'future', 'priority', 'group', 'queued')
+
+    def __init__(self, fn, args, kwargs, priority, group):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.priority = priority
+        self.group = group
+        self.queued = True
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ПЛАНИРОВЩИКА (IOScheduler)
+# ----------------------------------------------------------------------
+class IOScheduler:
+    """
+    Очереди задач по приоритетам, внутри приоритета — по группам (каталогам).
+    Поток берёт задачу с наивысшим приоритетом, предпочитая группу своей
+    предыдущей задачи: на HDD соседние чтения не перемежаются головкой
+    через весь диск. Задачи одной группы идут в порядке поступления.
+    submit() возвращает concurrent.futures.Future (совместим с wait()).
+    """
+
+    def __init__(self, workers=4, name="io"):
+        self._cond = threading.Condition()
+        # Для каждого приоритета: {группа: deque задач} в порядке появления групп
+        self._queues = [OrderedDict() for _ in PRIORITY_NAMES]
+        self._depths = [0] * len(PRIORITY_NAMES)
+        self._tasks = {}
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{index}", daemon=True)
+            for index in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, priority=PRIORITY_ACTIVE, group=None, **kwargs):
+        """Ставит fn(*args, **kwargs) в очередь приоритета priority, группа — обычно каталог."""
+        task = _IOTask(fn, args, kwargs, priority, group)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("IOScheduler остановлен")
+            self._tasks[task.future] = task
+            self._enqueue(task)
+            self._cond.notify()
+        task.future.add_done_callback(self._forget)
+        return task.future
+
+    def reprioritize(self, future, priority):
+        """Переносит ещё не начатую задачу в другой приоритет (например, плитка стала видимой)."""
+        with self._cond:
+            task = self._tasks.get(future)
+            if task is None or not task.queued or task.priority == priority:
+                return False
+            self._dequeue(task)
+            task.priority = priority
+            self._enqueue(task)
+            return True
+
+    def queue_depths(self):
+        """Число ожидающих задач по приоритетам: {'visible': n, 'active': n, 'prefetch': n}."""
+        with self._cond:
+            return dict(zip(PRIORITY_NAMES, self._depths))
+
+    def shutdown(self, cancel_pending=True):
+        """Останавливает потоки после текущих задач; ожидающие задачи отменяются."""
+        with self._cond:
+            self._closed = True
+            pending = [task.future for task in self._tasks.values() if task.queued] if cancel_pending else []
+            self._cond.notify_all()
+        for future in pending:
+            future.cancel()
+
+    # --- Очереди (под self._cond) ---
+
+    def _enqueue(self, task):
+        self._queues[task.priority].setdefault(task.group, deque()).append(task)
+        self._depths[task.priority] += 1
+        task.queued = True
+
+    def _dequeue(self, task):
+        groups = self._queues[task.priority]
+        tasks = groups[task.group]
+        tasks.remove(task)
+        if not tasks:
+            del groups[task.group]
+        self._depths[task.priority] -= 1
+        task.queued = False
+
+    def _next_task(self, last_group):
+        for priority, groups in enumerate(self._queues):
+            if not groups:
+                continue
+            group = last_group if last_group in groups else next(iter(groups))
+            tasks = groups[group]
+            task = tasks.popleft()
+            if not tasks:
+                del groups[group]
+            self._depths[priority] -= 1
+            task.queued = False
+            return task
+        return None
+
+    def _forget(self, future):
+        """Колбэк завершения/отмены: отменённая задача убирается из очереди сразу."""
+        with self._cond:
+            task = self._tasks.pop(future, None)
+            if task is not None and task.queued:
+                self._dequeue(task)
+
+    # --- Потоки ---
+
+    def _worker(self):
+        last_group = None
+        while True:
+            with self._cond:
+                task = self._next_task(last_group)
+                while task is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    task = self._next_task(last_group)
+
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            last_group = task.group
+            try:
+                result = task.fn(*task.args, **task.kwargs)
+            except BaseException as e:
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import multiprocessing
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton,
@@ -44,7 +45,7 @@ except ImportError:
     
 try:
     from style import apply_dark_theme
-    from threads import EmulatorMonitorThread, ImageLoaderThread, GameLoaderThread
+    from threads import EmulatorMonitorThread, GameLoaderThread
     from widgets import GameItem, DescriptionWindow, extract_short_info
     import resources_rc 
     from app_logic import AppLogicMixin
@@ -253,6 +254,8 @@ class LauncherApp(AppLogicMixin, WindowEventsMixin, QMainWindow):
         self.grid_layout.addItem(self.vertical_spacer, 999, 0, 1, 1) 
         
         self.scroll_area.setWidget(self.grid_widget)
+        # Обложки плиток, показавшихся при прокрутке, загружаются первыми
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self._schedule_visible_covers)
         
         self.content_layout.addWidget(self.scroll_area, 1)
         
@@ -271,6 +274,14 @@ class LauncherApp(AppLogicMixin, WindowEventsMixin, QMainWindow):
         
         self.footer_layout.addStretch(1)
         
+        # 🟢 Папки без ROM'ов (допы, мануалы, недокопированные игры) — список для чистки
+        self.empty_folders_button = QPushButton("")
+        self.empty_folders_button.setObjectName("footerButton")
+        self.empty_folders_button.setCursor(Qt.PointingHandCursor)
+        self.empty_folders_button.setVisible(False)
+        self.empty_folders_button.clicked.connect(self.show_empty_folders)
+        self.footer_layout.addWidget(self.empty_folders_button)
+        
         creator_info = "© 2025, Developed by No_fate"
         self.creator_label = QLabel(creator_info)
         self.creator_label.setObjectName("footerLabel")
@@ -436,6 +447,8 @@ class LauncherApp(AppLogicMixin, WindowEventsMixin, QMainWindow):
 
         
 if __name__ == "__main__":
+    # Пул процессов хэширования в собранном exe (PyInstaller) на Windows
+    multiprocessing.freeze_support()
     
     setup_logging()
     
@@ -0,0 +1,1256 @@
+# scanner.py - Обход папок игр без Qt (os.scandir, один проход на каталог)
+
+import os
+import re
+import math
+import fnmatch
+import queue
+import asyncio
+import stat
+import time
+import heapq
+import logging
+import threading
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from game_info import extract_short_info
+from archives import is_archive, inspect_archive, ARCHIVE_OK
+from headers import read_header
+from discs import is_disc_console, resolve_disc_images, disc_number, sibling_disc_name, strip_disc_tag
+from io_scheduler import PRIORITY_ACTIVE
+
+logger = logging.getLogger(__name__)
+
+# Результат обхода одной папки игры
+GameFolderScan = namedtuple(
+    'GameFolderScan',
+    ['rom_path', 'has_index_html', 'cover_path', 'screenshots', 'disc_paths']
+)
+
+# ----------------------------------------------------------------------
+# СТАТИСТИКА СКАНИРОВАНИЯ
+# ----------------------------------------------------------------------
+class ScanStats:
+    """
+    Счётчики и время по фазам одного сканирования корня (для лога, прогресса и CLI).
+    Время фаз в параллельном режиме суммируется по всем потокам.
+    """
+
+    PHASES = (
+        ('listdir', "листинг корня"),
+        ('signature', "сигнатуры папок"),
+        ('folder_listing', "листинг папки игры и Rom/"),
+        ('walk_fallback', "рекурсивный поиск ROM'а"),
+        ('images', "листинг images/"),
+        ('html_read', "чтение index.html"),
+        ('html_parse', "extract_short_info"),
+        ('archive', "оглавления архивов"),
+        ('discs', "cue-файлы и многодисковые игры"),
+        ('header', "заголовки ROM'ов"),
+    )
+    SLOWEST_N = 10
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self.folders_total = 0
+        self.folders_done = 0
+        self.games = 0
+        self.probed = 0      # Новые/изменённые папки, прошедшие полную проверку
+        self.unchanged = 0   # Папки, пропущенные по сигнатуре
+        self.walk_fallbacks = 0
+        self.walk_loops = 0      # Каталоги, на которые рекурсивный поиск вышел повторно (петли ссылок)
+        self.linked_folders = 0  # Папки игр — ссылки на уже проверенную папку
+        self.hardlinked_roms = 0 # Записи, отброшенные как жёсткие ссылки на тот же ROM
+        self.walk_dirs = 0       # Каталогов, просмотренных рекурсивным поиском
+        self.pruned_folders = 0  # Папок корня, отсечённых SCAN_INCLUDE/SCAN_EXCLUDE
+        self.pruned_dirs = 0     # Подкаталогов, не обойдённых из-за SCAN_EXCLUDE
+        self.folder_time = 0.0   # Суммарное время проверки папок (для оценки экономии)
+        self.misses = 0        # Папки без ROM'а
+        self.known_misses = 0  # ...из них пропущены по сигнатуре (без обхода)
+        self.html_files = 0
+        self.archives = 0
+        self.bad_archives = 0
+        self.html_bytes = 0
+        self.phase_times = {name: 0.0 for name, _ in self.PHASES}
+        self._slowest = []   # min-куча (время, папка) из SLOWEST_N самых медленных
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phase_times[name] += seconds
+
+    def count(self, counter, value=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def record_folder_time(self, folder_name, seconds):
+        with self._lock:
+            self.folder_time += seconds
+            if len(self._slowest) < self.SLOWEST_N:
+                heapq.heappush(self._slowest, (seconds, folder_name))
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (seconds, folder_name))
+
+    def record(self, rom_data, changed, folders=1):
+        with self._lock:
+            self.folders_done += folders
+            if rom_data is not None:
+                self.games += 1
+                if changed:
+                    self.probed += 1
+                else:
+                    self.unchanged += 1
+            self.elapsed = time.monotonic() - self.started
+
+    @property
+    def folders_per_sec(self):
+        return self.folders_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Оценка оставшегося времени в секундах (None, пока скорость неизвестна)."""
+        rate = self.folders_per_sec
+        if not rate or not self.folders_total:
+            return None
+        return max(0.0, (self.folders_total - self.folders_done) / rate)
+
+    @property
+    def pruned_time(self):
+        """
+        Оценка времени, сэкономленного правилами: отсечённые папки по средней
+        стоимости проверки папки, подкаталоги — по средней стоимости шага
+        рекурсивного поиска (поддеревья не считаются — оценка снизу).
+        """
+        folders = self.folder_time / self.folders_done if self.folders_done else 0.0
+        walk_dir = self.phase_times['walk_fallback'] / self.walk_dirs if self.walk_dirs else 0.0
+        return self.pruned_folders * folders + self.pruned_dirs * walk_dir
+
+    @property
+    def slowest(self):
+        return sorted(self._slowest, reverse=True)
+
+    def summary(self):
+        return (f"папок {self.folders_done}/{self.folders_total}, игр {self.games} "
+                f"(проверено {self.probed}, без изменений {self.unchanged}), "
+                f"{self.elapsed:.2f} с, {self.folders_per_sec:.0f} папок/с")
+
+    def report(self):
+        """Подробный отчёт по фазам для лога."""
+        lines = [self.summary()]
+        for name, label in self.PHASES:
+            lines.append(f"  {label}: {self.phase_times[name]:.3f} с")
+        lines.append(f"  рекурсивных поисков ROM'а: {self.walk_fallbacks} (пропущено петель ссылок: {self.walk_loops})")
+        if self.pruned_folders or self.pruned_dirs:
+            lines.append(f"  отсечено правилами сканирования: папок {self.pruned_folders}, подкаталогов "
+                         f"{self.pruned_dirs} (экономия не меньше ~{self.pruned_time:.3f} с)")
+        if self.linked_folders or self.hardlinked_roms:
+            lines.append(f"  ссылок на те же папки: {self.linked_folders}, жёстких ссылок на те же ROM'ы: {self.hardlinked_roms}")
+        lines.append(f"  папок без ROM'а: {self.misses} (из кэша без обхода: {self.known_misses})")
+        lines.append(f"  прочитано index.html: {self.html_files} ({self.html_bytes / 1024:.1f} КБ)")
+        lines.append(f"  архивов: {self.archives} (пустых/чужих/битых: {self.bad_archives})")
+        if self._slowest:
+            lines.append(f"  самые медленные папки:")
+            for seconds, folder_name in self.slowest:
+                lines.append(f"    {seconds * 1000:.1f} мс — {folder_name}")
+        return "\n".join(lines)
+
+
+class _NullStats:
+    """Заглушка, когда статистика не нужна."""
+
+    def phase(self, name):
+        return nullcontext()
+
+    def add_phase(self, name, seconds):
+        pass
+
+    def count(self, counter, value=1):
+        pass
+
+    def record_folder_time(self, folder_name, seconds):
+        pass
+
+
+_NULL_STATS = _NullStats()
+
+# ----------------------------------------------------------------------
+# СИГНАТУРА ПАПКИ
+# ----------------------------------------------------------------------
+def folder_signature(game_folder_path):
+    """
+    Дешёвая сигнатура папки игры: mtime самой папки, 'Rom/' и 'images/',
+    а также размер и mtime index.html. None — если это не папка.
+    """
+    return _folder_signature(game_folder_path)[0]
+
+
+def _stat_key(st, path):
+    """Ключ каталога (устройство, inode); без inode (некоторые сетевые ФС) — нормализованный реальный путь."""
+    if st.st_ino:
+        return st.st_dev, st.st_ino
+    return None, os.path.normcase(os.path.realpath(path))
+
+
+def dir_key(path):
+    """Ключ (устройство, inode) каталога после всех ссылок (symlink, junction); None — если недоступен."""
+    try:
+        return _stat_key(os.stat(path), path)
+    except OSError:
+        return None
+
+
+def _folder_signature(game_folder_path):
+    """(сигнатура, ключ папки) за тот же stat; (None, None) — если это не папка."""
+    try:
+        folder_stat = os.stat(game_folder_path)
+    except OSError:
+        return None, None
+    if not stat.S_ISDIR(folder_stat.st_mode):
+        return None, None
+
+    signature = [folder_stat.st_mtime_ns]
+    for subdir in ("Rom", "images"):
+        try:
+            signature.append(os.stat(os.path.join(game_folder_path, subdir)).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+
+    try:
+        html_stat = os.stat(os.path.join(game_folder_path, "index.html"))
+        signature.extend([html_stat.st_size, html_stat.st_mtime_ns])
+    except OSError:
+        signature.extend([None, None])
+
+    return signature, _stat_key(folder_stat, game_folder_path)
+
+# ----------------------------------------------------------------------
+# ОБХОД ПАПКИ ИГРЫ
+# ----------------------------------------------------------------------
+def _list_dir(path):
+    """Список DirEntry каталога (пустой, если каталог недоступен)."""
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def _is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _is_file(entry):
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
+def _pick_cover(names_by_lower, stem, cover_extensions):
+    """Возвращает имя файла '<stem><ext>' с учётом порядка расширений."""
+    for ext in cover_extensions:
+        name = names_by_lower.get(f"{stem}{ext}")
+        if name:
+            return name
+    return None
+
+
+class ScanCancelled(Exception):
+    """Сканирование отменено посреди проверки папки (см. check_cancelled)."""
+
+
+def check_cancelled(is_cancelled):
+    """
+    Точка отмены перед каждым обращением к диску внутри папки игры: глубокий
+    обход или чтение с NAS не должны дожидаться конца папки.
+    """
+    if is_cancelled is not None and is_cancelled():
+        raise ScanCancelled()
+
+
+class ScanFilter:
+    """
+    Правила SCAN_INCLUDE/SCAN_EXCLUDE консоли, скомпилированные в два
+    регулярных выражения (fnmatch, без учёта регистра). Шаблон без '/'
+    сравнивается с именем каталога на любой глубине, с '/' — с путём от корня
+    ROM'ов ('Game/extras/*'). Исключённый каталог не листается и не обходится.
+    """
+
+    def __init__(self, include=(), exclude=()):
+        self.include = tuple(include or ())
+        self.exclude = tuple(exclude or ())
+        self._include = self._compile(self.include)
+        self._exclude_names = self._compile(pattern for pattern in self.exclude if "/" not in pattern)
+        self._exclude_paths = self._compile(pattern.strip("/") for pattern in self.exclude if "/" in pattern)
+
+    @staticmethod
+    def _compile(patterns):
+        patterns = [fnmatch.translate(pattern) for pattern in patterns]
+        return re.compile("|".join(patterns), re.IGNORECASE) if patterns else None
+
+    def __bool__(self):
+        return bool(self.include or self.exclude)
+
+    def excludes(self, rel_path):
+        """Каталог (путь от корня ROM'ов) исключён правилами SCAN_EXCLUDE."""
+        rel_path = rel_path.replace("\\", "/")
+        name = rel_path.rsplit("/", 1)[-1]
+        if self._exclude_names is not None and self._exclude_names.match(name):
+            return True
+        return self._exclude_paths is not None and self._exclude_paths.match(rel_path) is not None
+
+    def allows_folder(self, folder_name):
+        """Папка корня считается папкой игры: подходит под SCAN_INCLUDE и не исключена."""
+        if self._include is not None and not self._include.match(folder_name):
+            return False
+        return not self.excludes(folder_name)
+
+    def folders(self, folder_names, stats=None):
+        """Папки корня, прошедшие правила (отсечённые учитываются в stats.pruned_folders)."""
+        if not self:
+            return list(folder_names)
+        kept = [folder_name for folder_name in folder_names if self.allows_folder(folder_name)]
+        (stats or _NULL_STATS).count('pruned_folders', len(folder_names) - len(kept))
+        return kept
+
+
+def scan_filter_for(settings):
+    """ScanFilter из настроек консоли (SCAN_INCLUDE, SCAN_EXCLUDE)."""
+    return ScanFilter(settings.get("SCAN_INCLUDE", ()), settings.get("SCAN_EXCLUDE", ()))
+
+
+def _ancestor_keys(path):
+    """Ключи каталога и всех его родителей: ссылка на любой из них — петля."""
+    keys = set()
+    while True:
+        key = dir_key(path)
+        if key is not None:
+            keys.add(key)
+        parent = os.path.dirname(path)
+        if parent == path:
+            return keys
+        path = parent
+
+
+def _walk_for_rom(dir_path, rel_path, rom_extensions, is_cancelled=None, visited=None, stats=None,
+                  scan_filter=None, filter_path=None):
+    """
+    Рекурсивный запасной поиск ROM'а (аналог os.walk, но на DirEntry).
+    visited — ключи (устройство, inode) уже пройденных каталогов вместе с
+    папкой игры и её родителями: ссылка на корень библиотеки или петля
+    symlink/junction не обходятся повторно. Подкаталоги, исключённые
+    scan_filter (filter_path — путь dir_path от корня ROM'ов), не листаются.
+    """
+    stats = stats or _NULL_STATS
+    check_cancelled(is_cancelled)
+    if visited is not None:
+        key = dir_key(dir_path)
+        if key in visited:
+            stats.count('walk_loops')
+            logger.warning(f"Каталог уже пройден (петля или повторная ссылка), пропуск: {dir_path}")
+            return None
+        if key is not None:
+            visited.add(key)
+    stats.count('walk_dirs')
+    entries = _list_dir(dir_path)
+    if "images" not in rel_path.lower():
+        for entry in entries:
+            if entry.name.lower().endswith(rom_extensions) and _is_file(entry):
+                return entry.path
+    for entry in entries:
+        if _is_dir(entry):
+            child_filter_path = f"{filter_path}/{entry.name}" if filter_path else entry.name
+            if scan_filter and scan_filter.excludes(child_filter_path):
+                stats.count('pruned_dirs')
+                continue
+            found = _walk_for_rom(entry.path, os.path.join(rel_path, entry.name), rom_extensions, is_cancelled,
+                                  visited, stats, scan_filter, child_filter_path)
+            if found:
+                return found
+    return None
+
+
+def _pick_rom(entries, rom_extensions, disc_console, stats):
+    """
+    ROM из списка каталога: (путь, [пути всех дисков] или []). Для консолей
+    с образами дисков выбор идёт по cue-файлам (см. discs.resolve_disc_images),
+    иначе — первый подходящий файл.
+    """
+    if not disc_console:
+        for entry in entries:
+            if entry.name.lower().endswith(rom_extensions) and _is_file(entry):
+                return entry.path, []
+        return None, []
+
+    candidates = [entry.path for entry in entries if entry.name.lower().endswith(rom_extensions) and _is_file(entry)]
+    if not candidates:
+        return None, []
+    with stats.phase('discs'):
+        disc_paths = resolve_disc_images(candidates)
+    return disc_paths[0], (disc_paths if len(disc_paths) > 1 else [])
+
+
+def scan_game_folder(game_folder_path, rom_extensions, image_extensions, stats=None, is_cancelled=None,
+                     scan_filter=None):
+    """
+    За один проход по папке игры (и её 'Rom/' и 'images/') находит ROM,
+    наличие index.html, обложку и скриншоты. Тип записей берётся из DirEntry,
+    без отдельных os.path.exists/isdir. ScanCancelled, если is_cancelled()
+    вернул True перед очередным листингом. Рекурсивный поиск не заходит в
+    каталоги, исключённые scan_filter.
+    """
+    stats = stats or _NULL_STATS
+    rom_extensions = tuple(ext.lower() for ext in rom_extensions)
+    image_extensions = tuple(ext.lower() for ext in image_extensions)
+
+    check_cancelled(is_cancelled)
+    with stats.phase('folder_listing'):
+        root_entries = _list_dir(game_folder_path)
+    root_files = {}
+    subdirs = []
+    has_index_html = False
+    rom_dir = images_dir = None
+
+    for entry in root_entries:
+        if _is_dir(entry):
+            # Регистр имени не важен (на Windows 'Images' и 'images' — одна папка)
+            lower_name = entry.name.lower()
+            if lower_name == "rom":
+                rom_dir = entry
+            elif lower_name == "images":
+                images_dir = entry
+            subdirs.append(entry)
+        elif _is_file(entry):
+            lower_name = entry.name.lower()
+            root_files[lower_name] = entry.name
+            if lower_name == "index.html":
+                has_index_html = True
+
+    # --- ROM: сначала явная подпапка 'Rom', затем файлы корня, затем остальные подпапки ---
+    disc_console = is_disc_console(rom_extensions)
+    rom_path, disc_paths = None, []
+    rom_entries = []
+    if rom_dir is not None:
+        check_cancelled(is_cancelled)
+        with stats.phase('folder_listing'):
+            rom_entries = _list_dir(rom_dir.path)
+        rom_path, disc_paths = _pick_rom(rom_entries, rom_extensions, disc_console, stats)
+
+    if rom_path is None:
+        rom_path, disc_paths = _pick_rom(root_entries, rom_extensions, disc_console, stats)
+
+    if rom_path is None:
+        stats.count('walk_fallbacks')
+        with stats.phase('walk_fallback'):
+            visited = _ancestor_keys(game_folder_path)
+            folder_name = os.path.basename(os.path.normpath(game_folder_path))
+            # Сначала подпапки 'Rom/' (Rom/USA/game.nes), её верхний уровень уже просмотрен
+            candidates = []
+            if rom_dir is not None:
+                rom_dir_key = dir_key(rom_dir.path)
+                if rom_dir_key is not None:
+                    visited.add(rom_dir_key)
+                candidates += [
+                    (entry, os.path.join(rom_dir.name, entry.name)) for entry in rom_entries if _is_dir(entry)
+                ]
+            candidates += [(entry, entry.name) for entry in subdirs if entry is not rom_dir]
+            for entry, rel_path in candidates:
+                filter_path = f"{folder_name}/{rel_path.replace(os.sep, '/')}"
+                if scan_filter and scan_filter.excludes(filter_path):
+                    stats.count('pruned_dirs')
+                    continue
+                rom_path = _walk_for_rom(entry.path, rel_path, rom_extensions, is_cancelled, visited, stats,
+                                         scan_filter, filter_path)
+                if rom_path:
+                    break
+        if rom_path and disc_console:
+            # Рядом с найденным файлом могут лежать cue-файл и другие диски
+            rom_path, disc_paths = _pick_rom(_list_dir(os.path.dirname(rom_path)), rom_extensions, disc_console, stats)
+
+    # --- images/: обложка и скриншоты за один проход ---
+    image_files = {}
+    screenshots = []
+    if images_dir is not None:
+        check_cancelled(is_cancelled)
+        with stats.phase('images'):
+            image_entries = _list_dir(images_dir.path)
+        for entry in image_entries:
+            if not _is_file(entry):
+                continue
+            lower_name = entry.name.lower()
+            image_files[lower_name] = entry.name
+            if "cartridge" not in lower_name and "cover" not in lower_name and lower_name.endswith(image_extensions):
+                screenshots.append(os.path.join(images_dir.name, entry.name))
+
+    # Приоритет обложки: images/cartridge.*, cover.* в корне, images/cover.*
+    cover_path = None
+    name = _pick_cover(image_files, "cartridge", image_extensions)
+    if name:
+        cover_path = os.path.join(images_dir.path, name)
+    else:
+        name = _pick_cover(root_files, "cover", image_extensions)
+        if name:
+            cover_path = os.path.join(game_folder_path, name)
+        else:
+            name = _pick_cover(image_files, "cover", image_extensions)
+            if name:
+                cover_path = os.path.join(images_dir.path, name)
+
+    return GameFolderScan(rom_path, has_index_html, cover_path, screenshots, disc_paths)
+
+
+def find_cover_path(game_folder_path, cover_extensions):
+    """Ищет обложку (cartridge/cover) в папке images или корне папки игры."""
+    cover_extensions = tuple(ext.lower() for ext in cover_extensions)
+
+    images_dir = os.path.join(game_folder_path, "images")
+    image_files = {entry.name.lower(): entry.name for entry in _list_dir(images_dir) if _is_file(entry)}
+
+    name = _pick_cover(image_files, "cartridge", cover_extensions)
+    if name:
+        return os.path.join(images_dir, name)
+
+    root_files = {entry.name.lower(): entry.name for entry in _list_dir(game_folder_path) if _is_file(entry)}
+    name = _pick_cover(root_files, "cover", cover_extensions)
+    if name:
+        return os.path.join(game_folder_path, name)
+
+    name = _pick_cover(image_files, "cover", cover_extensions)
+    if name:
+        return os.path.join(images_dir, name)
+
+    return None
+
+
+# ----------------------------------------------------------------------
+# ЗАПИСЬ ИГРЫ И ПРОВЕРКА ПАПКИ
+# ----------------------------------------------------------------------
+def load_description(game_folder_path, has_index_html, stats=None):
+    """Читает index.html и извлекает краткое описание."""
+    stats = stats or _NULL_STATS
+    description = "Описание недоступно."
+    if not has_index_html:
+        return description
+
+    html_path = os.path.join(game_folder_path, "index.html")
+    try:
+        with stats.phase('html_read'):
+            with open(html_path, 'rb') as f:
+                raw_content = f.read()
+        stats.count('html_files')
+        stats.count('html_bytes', len(raw_content))
+        with stats.phase('html_parse'):
+            description = extract_short_info(raw_content.decode('utf-8'))
+    except Exception:
+        logger.warning(f"Ошибка чтения или парсинга HTML для {game_folder_path}")
+
+    return description
+
+
+def probe_game(folder_name, game_folder_path, signature, rom_extensions, image_extensions, stats=None,
+               is_cancelled=None, scan_filter=None):
+    """
+    Полная проверка папки игры: ROM, index.html, обложка и скриншоты за один обход.
+    Между чтениями проверяется отмена (ScanCancelled).
+    """
+    folder_scan = scan_game_folder(game_folder_path, rom_extensions, image_extensions, stats, is_cancelled,
+                                   scan_filter)
+    if not folder_scan.rom_path:
+        return None
+    check_cancelled(is_cancelled)
+    archive = probe_archive(folder_scan.rom_path, rom_extensions, stats)
+    check_cancelled(is_cancelled)
+    header = probe_header(folder_scan.rom_path, rom_extensions, archive, stats)
+    check_cancelled(is_cancelled)
+
+    return {
+        'title': folder_name,
+        'FOLDER_NAME': folder_name,
+        'FOLDER_PATH': game_folder_path,
+        'FULL_ROM_PATH': folder_scan.rom_path,
+        'COVER_PATH': folder_scan.cover_path,
+        'description': load_description(game_folder_path, folder_scan.has_index_html, stats),
+        'screenshots': folder_scan.screenshots,
+        'SIGNATURE': signature,
+        'ARCHIVE': archive,
+        'DISCS': folder_scan.disc_paths,
+        'HEADER': header
+    }
+
+
+def probe_header(rom_path, rom_extensions, archive=None, stats=None):
+    """
+    Регион, серийный номер, маппер и внутреннее имя из заголовка ROM'а (см.
+    headers.read_header): несколько КБ позиционными чтениями в том же потоке
+    пула сканирования, результат кэшируется в каталоге вместе с записью.
+    """
+    stats = stats or _NULL_STATS
+    if archive is not None and archive['status'] != ARCHIVE_OK:
+        return None
+    with stats.phase('header'):
+        return read_header(rom_path, is_disc_console(rom_extensions), archive)
+
+
+def probe_archive(rom_path, rom_extensions, stats=None):
+    """
+    Оглавление архива с игрой без распаковки: {'status', 'members': [[имя, размер, crc32]]}.
+    Для обычного файла — None. CRC32 из оглавления годится для опознания по DAT.
+    """
+    if not is_archive(rom_path):
+        return None
+    stats = stats or _NULL_STATS
+    with stats.phase('archive'):
+        status, members = inspect_archive(rom_path, rom_extensions)
+    stats.count('archives')
+    if status != ARCHIVE_OK:
+        stats.count('bad_archives')
+    return {'status': status, 'members': [list(member) for member in members]}
+
+
+class MissCache:
+    """
+    Папки без ROM'а (допы, мануалы, недокопированные игры) с их сигнатурами.
+    Известная папка с той же сигнатурой не обходится заново — в том числе
+    рекурсивным поиском; промахи этого сканирования собираются в found.
+    known и found: {путь папки: сигнатура}.
+    """
+
+    def __init__(self, known=None):
+        self.known = dict(known or {})
+        self.found = {}
+        self._lock = threading.Lock()
+
+    def is_known(self, folder_path, signature):
+        return self.known.get(folder_path) == signature
+
+    def add(self, folder_path, signature):
+        with self._lock:
+            self.found[folder_path] = signature
+
+
+class LinkGuard:
+    """
+    Ссылки (symlink, junction) на уровне сканирования: папки игр с одним
+    ключом (устройство, inode) проверяются один раз. Оставляется настоящая
+    папка, а не ссылка на неё (lstat — только при совпадении ключей); если
+    ссылка успела проверенной первой, её запись убирается в finalize. С
+    dedupe_hardlinks жёсткие ссылки на один ROM-файл дают одну запись.
+    """
+
+    def __init__(self, dedupe_hardlinks=False):
+        self.dedupe_hardlinks = dedupe_hardlinks
+        self._folders = {}
+        self._superseded = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_link(path):
+        isjunction = getattr(os.path, 'isjunction', None) # Python 3.12+
+        return os.path.islink(path) or bool(isjunction and isjunction(path))
+
+    def claim_folder(self, key, folder_path, stats=None):
+        """True, если папку нужно проверять; False — это вторая ссылка на уже взятую папку."""
+        with self._lock:
+            owner = self._folders.setdefault(key, folder_path)
+        if owner == folder_path:
+            return True
+
+        keep_new = self._is_link(owner) and not self._is_link(folder_path)
+        with self._lock:
+            if keep_new and self._folders.get(key) == owner:
+                self._folders[key] = folder_path
+                self._superseded.add(owner)
+            else:
+                keep_new = False
+        (stats or _NULL_STATS).count('linked_folders')
+        link, target = (owner, folder_path) if keep_new else (folder_path, owner)
+        logger.info(f"Папка {link} — ссылка на {target}, проверяется один раз.")
+        return keep_new
+
+    def finalize(self, rom_list, stats=None):
+        """
+        Итоговый список: записи папок-ссылок, проверенных раньше настоящей
+        папки, заменяются на None; с dedupe_hardlinks — и записи, чей ROM
+        является жёсткой ссылкой на ROM более ранней записи (один stat на
+        запись; файлы с st_nlink == 1 не сравниваются).
+        """
+        stats = stats or _NULL_STATS
+        owners = {}
+        result = []
+        for rom_data in rom_list:
+            if rom_data is not None and rom_data['FOLDER_PATH'] in self._superseded:
+                rom_data = None
+            if rom_data is not None and self.dedupe_hardlinks:
+                rom_data = self._drop_hardlinked(rom_data, owners, stats)
+            result.append(rom_data)
+        return result
+
+    @staticmethod
+    def _drop_hardlinked(rom_data, owners, stats):
+        rom_path = rom_data.get('FULL_ROM_PATH')
+        try:
+            st = os.stat(rom_path) if rom_path else None
+        except OSError:
+            return rom_data
+        if st is None or st.st_nlink < 2 or not st.st_ino:
+            return rom_data
+        owner = owners.setdefault((st.st_dev, st.st_ino), rom_data['FOLDER_PATH'])
+        if owner == rom_data['FOLDER_PATH']:
+            return rom_data
+        stats.count('hardlinked_roms')
+        logger.info(f"ROM {rom_path} — жёсткая ссылка на ROM из {owner}, запись пропущена.")
+        return None
+
+
+def process_folder(root_folder, folder_name, existing_roms_map, rom_extensions, image_extensions, stats=None,
+                   misses=None, is_cancelled=None, guard=None, scan_filter=None):
+    """
+    Проверяет одну папку игры. Возвращает (rom_data, changed), где changed
+    означает, что запись новая или обновлена по сравнению с existing_roms_map.
+    misses — MissCache для папок без ROM'а (необязательно). Если is_cancelled()
+    сработал посреди папки — (None, False), и папка не считается промахом.
+    guard — LinkGuard: вторая ссылка на ту же папку даёт (None, False).
+    scan_filter — ScanFilter: исключённые подкаталоги не обходятся.
+    """
+    stats = stats or _NULL_STATS
+    started = time.perf_counter()
+    try:
+        return _process_folder(root_folder, folder_name, existing_roms_map, rom_extensions, image_extensions,
+                               stats, misses, is_cancelled, guard, scan_filter)
+    except ScanCancelled:
+        return None, False
+    finally:
+        stats.record_folder_time(folder_name, time.perf_counter() - started)
+
+
+def _disc_sibling_folders(root_folder, folder_name, rom_extensions, stats):
+    """
+    Многодисковая игра в соседних папках ('Game (Disc 1)', 'Game (Disc 2)'):
+    для папки первого диска — папки остальных дисков, для папки второго и
+    следующих — None (игра показывается одной плиткой из папки первого диска).
+    """
+    if not is_disc_console(rom_extensions):
+        return []
+    number = disc_number(folder_name)
+    if number is None:
+        return []
+    with stats.phase('discs'):
+        if number > 1:
+            first_disc = os.path.join(root_folder, sibling_disc_name(folder_name, 1))
+            return None if os.path.isdir(first_disc) else []
+        siblings = []
+        while True:
+            sibling = sibling_disc_name(folder_name, len(siblings) + 2)
+            if not os.path.isdir(os.path.join(root_folder, sibling)):
+                return siblings
+            siblings.append(sibling)
+
+
+def _merge_disc_folders(rom_data, root_folder, sibling_names, rom_extensions, image_extensions, stats,
+                        is_cancelled=None, scan_filter=None):
+    """Добавляет к записи первого диска образы из папок остальных дисков."""
+    disc_paths = list(rom_data['DISCS']) or [rom_data['FULL_ROM_PATH']]
+    for sibling in sibling_names:
+        sibling_scan = scan_game_folder(os.path.join(root_folder, sibling), rom_extensions, image_extensions, stats,
+                                        is_cancelled, scan_filter)
+        if sibling_scan.rom_path:
+            disc_paths.extend(sibling_scan.disc_paths or [sibling_scan.rom_path])
+    if len(disc_paths) > 1:
+        rom_data['DISCS'] = disc_paths
+        rom_data['title'] = strip_disc_tag(rom_data['FOLDER_NAME'])
+
+
+def _process_folder(root_folder, folder_name, existing_roms_map, rom_extensions, image_extensions, stats, misses,
+                    is_cancelled=None, guard=None, scan_filter=None):
+    game_folder_path = os.path.join(root_folder, folder_name)
+
+    # Сигнатура заодно проверяет, что это папка (один stat вместо isdir), и даёт её (устройство, inode)
+    with stats.phase('signature'):
+        signature, key = _folder_signature(game_folder_path)
+    if signature is None:
+        return None, False
+
+    if guard is not None and not guard.claim_folder(key, game_folder_path, stats):
+        return None, False
+
+    sibling_names = _disc_sibling_folders(root_folder, folder_name, rom_extensions, stats)
+    if sibling_names is None:
+        return None, False # Второй и следующие диски входят в игру из папки первого
+    for sibling in sibling_names:
+        signature.append(folder_signature(os.path.join(root_folder, sibling)))
+
+    # ШАГ 1: ПРОВЕРКА КЭША (папка не менялась — никаких обращений к диску)
+    cached = existing_roms_map.get(folder_name)
+    if cached is not None and cached.get('SIGNATURE') == signature:
+        cached['FOLDER_PATH'] = game_folder_path
+        return cached, False
+
+    # Папка без ROM'а не менялась с прошлого раза — обходить её снова незачем
+    if misses is not None and misses.is_known(game_folder_path, signature):
+        stats.count('misses')
+        stats.count('known_misses')
+        misses.add(game_folder_path, signature)
+        return None, False
+
+    # ШАГ 2: НОВАЯ ИЛИ ИЗМЕНЁННАЯ ИГРА (ТРЕБУЕТ ЗАГРУЗКИ)
+    rom_data = probe_game(folder_name, game_folder_path, signature, rom_extensions, image_extensions, stats,
+                          is_cancelled, scan_filter)
+    if rom_data is None:
+        stats.count('misses')
+        if misses is not None:
+            misses.add(game_folder_path, signature)
+        if cached is not None:
+            logger.info(f"ROM больше не найден в изменённой папке: {game_folder_path}")
+    if rom_data is not None and sibling_names:
+        _merge_disc_folders(rom_data, root_folder, sibling_names, rom_extensions, image_extensions, stats,
+                            is_cancelled, scan_filter)
+    return rom_data, rom_data is not None
+
+# ----------------------------------------------------------------------
+# СКАНИРОВАНИЕ КОРНЯ КОНСОЛИ
+# ----------------------------------------------------------------------
+def scan_root(root_folder, rom_extensions, image_extensions, existing_roms_map=None, workers=1,
+              is_cancelled=None, on_game=None, on_progress=None, stats=None, folder_names=None, misses=None,
+              scheduler=None, priority=PRIORITY_ACTIVE, guard=None, scan_filter=None):
+    """
+    Сканирует корень консоли. Возвращает записи игр в порядке os.listdir
+    или None, если is_cancelled() вернул True. Новые/изменённые записи
+    передаются в on_game(rom_data) по мере готовности; on_progress(stats)
+    вызывается после каждой папки (и периодически в параллельном режиме).
+    folder_names — готовый список папок (тогда корень не листается).
+    misses — MissCache: папки без ROM'а с прежней сигнатурой не обходятся.
+    scheduler — общий IOScheduler: папки проверяются в его потоках с приоритетом
+    priority, в очереди не больше workers папок этого корня одновременно.
+    guard — LinkGuard (см. process_folder). scan_filter — ScanFilter: папки
+    корня отбираются до проверки (если folder_names не задан), исключённые
+    подкаталоги не обходятся. FileNotFoundError, если корня нет.
+    """
+    existing_roms_map = existing_roms_map or {}
+    is_cancelled = is_cancelled or (lambda: False)
+    stats = stats or ScanStats()
+
+    if folder_names is None:
+        with stats.phase('listdir'):
+            folder_names = os.listdir(root_folder)
+        if scan_filter:
+            folder_names = scan_filter.folders(folder_names, stats)
+        stats.folders_total = len(folder_names)
+
+    def handle(rom_data, changed):
+        stats.record(rom_data, changed)
+        if changed and on_game:
+            on_game(rom_data)
+
+    def probe(folder_name):
+        if is_cancelled(): return None, False
+        return process_folder(root_folder, folder_name, existing_roms_map, rom_extensions, image_extensions, stats,
+                              misses, is_cancelled, guard, scan_filter)
+
+    # --- Через общий планировщик: обложки видимых плиток обгоняют сканирование ---
+    if scheduler is not None:
+        return _scan_scheduled(root_folder, folder_names, probe, handle, workers, is_cancelled, on_progress,
+                               stats, scheduler, priority)
+
+    # --- Последовательный режим ---
+    if workers <= 1 or len(folder_names) <= 1:
+        results = []
+        for folder_name in folder_names:
+            if is_cancelled(): return None
+            rom_data, changed = probe(folder_name)
+            handle(rom_data, changed)
+            results.append(rom_data)
+            if on_progress: on_progress(stats)
+        return results
+
+    # --- Параллельный режим: на NAS/USB-HDD время уходит на задержку запросов ---
+    results = [None] * len(folder_names)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rom-scan")
+    try:
+        pending = {
+            executor.submit(probe, folder_name): index
+            for index, folder_name in enumerate(folder_names)
+        }
+        while pending:
+            if is_cancelled(): return None
+
+            # Короткий таймаут, чтобы не пропустить отмену
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                rom_data, changed = future.result()
+                handle(rom_data, changed)
+                results[index] = rom_data
+            if on_progress: on_progress(stats)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+def _scan_scheduled(root_folder, folder_names, probe, handle, workers, is_cancelled, on_progress, stats,
+                    scheduler, priority):
+    """
+    Папки корня отдаются планировщику окном по workers штук (группа — корень):
+    очередь не забивается тысячами задач, и задача с более высоким
+    приоритетом встаёт перед следующей папкой, а не после всего корня.
+    """
+    results = [None] * len(folder_names)
+    remaining = iter(enumerate(folder_names))
+    pending = {}
+
+    def submit_next():
+        for index, folder_name in remaining:
+            pending[scheduler.submit(probe, folder_name, priority=priority, group=root_folder)] = index
+            return
+
+    try:
+        for _ in range(max(1, workers)):
+            submit_next()
+        while pending:
+            if is_cancelled(): return None
+
+            done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                rom_data, changed = future.result()
+                handle(rom_data, changed)
+                results[index] = rom_data
+                submit_next()
+            if on_progress: on_progress(stats)
+    finally:
+        # Начатые папки сами остановятся на ближайшей проверке is_cancelled
+        for future in pending:
+            future.cancel()
+    return results
+
+# ----------------------------------------------------------------------
+# НЕСКОЛЬКО КОРНЕЙ НА КОНСОЛЬ
+# ----------------------------------------------------------------------
+ROOT_PRECEDENCE_RULES = ("order", "fastest")
+
+
+def console_roots(settings):
+    """Корни ROM'ов консоли: ROM_PATH, затем EXTRA_ROM_PATHS (в порядке из настроек)."""
+    roots = [settings.get("ROM_PATH")] + list(settings.get("EXTRA_ROM_PATHS", ()))
+    return [root for root in roots if root]
+
+
+def _norm_path(path):
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _latency_class(elapsed, entries):
+    """Порядок величины задержки на одну запись листинга (SSD, HDD и сеть различаются на порядки)."""
+    return math.floor(math.log10(max(elapsed / max(1, entries), 1e-7)))
+
+
+def list_roots(root_folders, precedence="order", stats=None):
+    """
+    Листает все корни параллельно и упорядочивает их по правилу приоритета:
+    "order" — как в настройках, "fastest" — сначала корни с меньшей задержкой
+    (по порядку величины, при равенстве — как в настройках). Возвращает
+    [(корень, [папки])]; недоступные корни пропускаются с предупреждением.
+    FileNotFoundError, если недоступны все.
+    """
+    stats = stats or _NULL_STATS
+    if precedence not in ROOT_PRECEDENCE_RULES:
+        logger.warning(f"Неизвестное правило приоритета корней '{precedence}', используется 'order'.")
+        precedence = "order"
+
+    def list_one(root_folder):
+        started = time.perf_counter()
+        try:
+            folder_names = os.listdir(root_folder)
+        except OSError as e:
+            logger.warning(f"Корень ROM'ов недоступен: {root_folder} ({e})")
+            return None
+        elapsed = time.perf_counter() - started
+        stats.add_phase('listdir', elapsed)
+        return folder_names, elapsed
+
+    if len(root_folders) == 1:
+        listed = [list_one(root_folders[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(root_folders), thread_name_prefix="rom-root") as executor:
+            listed = list(executor.map(list_one, root_folders))
+
+    roots = [
+        (index, root_folder, result[0], result[1])
+        for index, (root_folder, result) in enumerate(zip(root_folders, listed))
+        if result is not None
+    ]
+    if not roots:
+        raise FileNotFoundError(f"Ни один корень ROM'ов не найден: {', '.join(root_folders)}")
+
+    if precedence == "fastest":
+        roots.sort(key=lambda root: (_latency_class(root[3], len(root[2])), root[0]))
+    return [(root_folder, folder_names) for _, root_folder, folder_names, _ in roots]
+
+
+def existing_for_root(existing_roms_map, root_folder):
+    """Записи каталога, найденные именно в этом корне (сигнатуры других корней не подходят)."""
+    root_key = _norm_path(root_folder)
+    return {
+        folder_name: rom_data for folder_name, rom_data in existing_roms_map.items()
+        if _norm_path(os.path.dirname(os.path.normpath(rom_data['FOLDER_PATH']))) == root_key
+    }
+
+
+def _device_id(path):
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return path
+
+
+def scan_roots(root_folders, rom_extensions, image_extensions, existing_roms_map=None, workers=1,
+               precedence="order", is_cancelled=None, on_game=None, on_progress=None, stats=None, misses=None,
+               scheduler=None, priority=PRIORITY_ACTIVE, guard=None, scan_filter=None):
+    """
+    Сканирует все корни консоли и объединяет их в один список. Корни на разных
+    устройствах сканируются одновременно (по потоку на устройство, внутри —
+    пул из workers или общий scheduler, см. scan_root). Одинаковый FOLDER_NAME проверяется только в корне с
+    наивысшим приоритетом (см. list_roots); если там игры нет — в следующем.
+    Папки-ссылки на одну и ту же папку (в том числе из разных корней)
+    проверяются один раз (guard, по умолчанию LinkGuard()). scan_filter —
+    ScanFilter консоли (см. scan_filter_for).
+    Возвращает записи в порядке корней и os.listdir, None при отмене.
+    FileNotFoundError, если нет ни одного корня.
+    """
+    if isinstance(root_folders, str):
+        root_folders = [root_folders]
+    existing_roms_map = existing_roms_map or {}
+    is_cancelled = is_cancelled or (lambda: False)
+    stats = stats or ScanStats()
+    guard = guard or LinkGuard()
+
+    ranked = list_roots(root_folders, precedence, stats)
+
+    # Правила SCAN_INCLUDE/SCAN_EXCLUDE — до любых обращений к папкам игр
+    if scan_filter:
+        ranked = [(root_folder, scan_filter.folders(folder_names, stats)) for root_folder, folder_names in ranked]
+
+    # Каждая папка достаётся первому по приоритету корню, где она есть
+    owned, seen = [], set()
+    for root_folder, folder_names in ranked:
+        own_names = [folder_name for folder_name in folder_names if folder_name not in seen]
+        seen.update(own_names)
+        owned.append((root_folder, own_names))
+    stats.folders_total = len(seen)
+    root_maps = {root_folder: existing_for_root(existing_roms_map, root_folder) for root_folder, _ in ranked}
+
+    # Колбэки вызываются из потоков разных корней — сериализуем их
+    callback_lock = threading.Lock()
+
+    def locked(callback):
+        if callback is None: return None
+        def call(arg):
+            with callback_lock:
+                callback(arg)
+        return call
+
+    def scan_device(roots):
+        results = []
+        for root_folder, folder_names in roots:
+            root_results = scan_root(
+                root_folder, rom_extensions, image_extensions,
+                existing_roms_map=root_maps[root_folder], workers=workers,
+                is_cancelled=is_cancelled, on_game=locked(on_game), on_progress=locked(on_progress),
+                stats=stats, folder_names=folder_names, misses=misses, scheduler=scheduler, priority=priority,
+                guard=guard, scan_filter=scan_filter
+            )
+            if root_results is None: return None
+            results.append(root_results)
+        return results
+
+    devices = {}
+    for root_folder, folder_names in owned:
+        devices.setdefault(_device_id(root_folder), []).append((root_folder, folder_names))
+
+    if len(devices) == 1:
+        device_results = [scan_device(next(iter(devices.values())))]
+    else:
+        with ThreadPoolExecutor(max_workers=len(devices), thread_name_prefix="rom-device") as executor:
+            device_results = list(executor.map(scan_device, devices.values()))
+    if any(results is None for results in device_results):
+        return None
+
+    results_by_root = {}
+    for roots, results in zip(devices.values(), device_results):
+        for (root_folder, _), root_results in zip(roots, results):
+            results_by_root[root_folder] = root_results
+
+    # Папка корня-владельца оказалась без игры: пробуем ту же папку в следующих корнях
+    listed = {root_folder: set(folder_names) for root_folder, folder_names in ranked}
+    merged = []
+    for index, (root_folder, folder_names) in enumerate(owned):
+        for folder_name, rom_data in zip(folder_names, results_by_root[root_folder]):
+            if rom_data is None:
+                for other_root, _ in ranked[index + 1:]:
+                    if folder_name not in listed[other_root]:
+                        continue
+                    if is_cancelled(): return None
+                    rom_data, changed = process_folder(
+                        other_root, folder_name, root_maps[other_root],
+                        rom_extensions, image_extensions, stats, misses, is_cancelled, guard, scan_filter
+                    )
+                    if rom_data is not None:
+                        stats.record(rom_data, changed, folders=0)
+                        if changed and on_game:
+                            on_game(rom_data)
+                        break
+            merged.append(rom_data)
+    return guard.finalize(merged, stats)
+
+
+# ----------------------------------------------------------------------
+# ПОТОКОВЫЙ API: ИТЕРАТОР СОБЫТИЙ СКАНИРОВАНИЯ (без Qt)
+# ----------------------------------------------------------------------
+# Новая или изменённая игра — по мере готовности
+FoundGame = namedtuple('FoundGame', ['rom_data'])
+# Прогресс: обработано папок, всего папок, оценка оставшегося времени (с) или None
+ScanProgress = namedtuple('ScanProgress', ['folders_done', 'folders_total', 'eta'])
+# Последнее событие: все записи в порядке корней и os.listdir, статистика
+ScanFinished = namedtuple('ScanFinished', ['rom_list', 'stats'])
+
+SCAN_QUEUE_SIZE = 256
+_SCAN_END = object()
+
+
+class _ScanFailed:
+    """Исключение из потока сканирования — поднимается заново у потребителя."""
+    def __init__(self, error):
+        self.error = error
+
+
+def _start_scan(root_folders, rom_extensions, image_extensions, existing_roms_map, workers,
+                precedence, is_cancelled, stats, progress_interval, misses, scheduler, priority, guard,
+                scan_filter):
+    """
+    Запускает scan_roots в отдельном потоке, события идут в ограниченную
+    очередь (медленный потребитель притормаживает сканер). Возвращает
+    (очередь, событие отмены).
+    """
+    events = queue.Queue(maxsize=SCAN_QUEUE_SIZE)
+    cancel = threading.Event()
+    user_cancelled = is_cancelled or (lambda: False)
+    last_progress = 0.0
+
+    def cancelled():
+        return cancel.is_set() or user_cancelled()
+
+    def put(event):
+        while not cancel.is_set():
+            try:
+                events.put(event, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def on_progress(scan_stats):
+        nonlocal last_progress
+        now = time.monotonic()
+        if now - last_progress >= progress_interval:
+            last_progress = now
+            put(ScanProgress(scan_stats.folders_done, scan_stats.folders_total, scan_stats.eta))
+
+    def produce():
+        try:
+            results = scan_roots(
+                root_folders, rom_extensions, image_extensions,
+                existing_roms_map=existing_roms_map, workers=workers, precedence=precedence,
+                is_cancelled=cancelled, on_game=lambda rom_data: put(FoundGame(rom_data)),
+                on_progress=on_progress, stats=stats, misses=misses, scheduler=scheduler, priority=priority,
+                guard=guard, scan_filter=scan_filter
+            )
+            if results is not None:
+                put(ScanProgress(stats.folders_done, stats.folders_total, 0.0))
+                put(ScanFinished([rom_data for rom_data in results if rom_data], stats))
+        except BaseException as e:
+            put(_ScanFailed(e))
+        finally:
+            # Конец потока событий доставляется всегда: ждём места в очереди, пока
+            # потребитель не закрыл итератор (иначе он навсегда застрянет в get())
+            put(_SCAN_END)
+
+    threading.Thread(target=produce, name="rom-scan-stream", daemon=True).start()
+    return events, cancel
+
+
+def _next_event(events, cancel):
+    """
+    Следующее событие для потока-исполнителя aiter_scan. Отменённая задача
+    asyncio не ждёт результата, но поток продолжает get(): после cancel он
+    должен завершиться сам, иначе asyncio.run() зависнет на закрытии пула.
+    """
+    while not cancel.is_set():
+        try:
+            return events.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _SCAN_END
+
+
+def iter_scan(root_folders, rom_extensions, image_extensions, existing_roms_map=None, workers=1,
+              precedence="order", is_cancelled=None, stats=None, progress_interval=0.1, misses=None,
+              scheduler=None, priority=PRIORITY_ACTIVE, guard=None, scan_filter=None):
+    """
+    Сканирование как обычный итератор: FoundGame по мере нахождения игр,
+    ScanProgress не чаще progress_interval и ScanFinished в конце. Прерванное
+    (is_cancelled) сканирование заканчивается без ScanFinished; выход из
+    цикла или close() отменяет сканирование. misses, scheduler, priority,
+    guard и scan_filter — см. scan_root. FileNotFoundError, если нет ни одного корня.
+
+        for event in iter_scan(roots, exts, img_exts, workers=8):
+            if isinstance(event, FoundGame): ...
+    """
+    stats = stats or ScanStats()
+    events, cancel = _start_scan(
+        root_folders, rom_extensions, image_extensions, existing_roms_map, workers,
+        precedence, is_cancelled, stats, progress_interval, misses, scheduler, priority, guard, scan_filter
+    )
+    try:
+        while True:
+            event = events.get()
+            if event is _SCAN_END:
+                return
+            if isinstance(event, _ScanFailed):
+                raise event.error
+            yield event
+    finally:
+        cancel.set()
+
+
+async def aiter_scan(root_folders, rom_extensions, image_extensions, existing_roms_map=None, workers=1,
+                     precedence="order", is_cancelled=None, stats=None, progress_interval=0.1, misses=None,
+                     scheduler=None, priority=PRIORITY_ACTIVE, guard=None, scan_filter=None):
+    """То же, что iter_scan, но для asyncio: ожидание событий не блокирует цикл событий."""
+    loop = asyncio.get_running_loop()
+    stats = stats or ScanStats()
+    events, cancel = _start_scan(
+        root_folders, rom_extensions, image_extensions, existing_roms_map, workers,
+        precedence, is_cancelled, stats, progress_interval, misses, scheduler, priority, guard, scan_filter
+    )
+    try:
+        while True:
+            event = await loop.run_in_executor(None, _next_event, events, cancel)
+            if event is _SCAN_END:
+                return
+            if isinstance(event, _ScanFailed):
+                raise event.error
+            yield event
+    finally:
+        cancel.set()
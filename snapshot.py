@@ -0,0 +1,208 @@
+# snapshot.py - Бинарный снимок каталога консоли для мгновенного холодного старта (без Qt)
+#
+# Формат (little-endian):
+#   заголовок   — магия, версия формата, число полей, число записей, ревизия каталога
+#   записи      — массив фиксированной ширины: по (смещение, длина) в таблице строк на поле
+#   таблица строк — UTF-8, одинаковые строки хранятся один раз
+# Файл отображается в память (mmap); поле записи декодируется при первом обращении,
+# поэтому первая отрисовка сетки читает только нужные страницы и ничего не парсит заранее.
+
+import os
+import json
+import mmap
+import struct
+import logging
+from collections.abc import MutableMapping, Sequence
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"RHSNAP\r\n"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_EXTENSION = ".snap"
+
+# Порядок полей задаёт формат: изменение списка требует новой SNAPSHOT_VERSION
+FIELDS = (
+    'title', 'FOLDER_NAME', 'FOLDER_PATH', 'FULL_ROM_PATH', 'COVER_PATH', 'description',
+    'screenshots', 'SIGNATURE', 'ARCHIVE', 'DISCS', 'HEADER',
+)
+# Поля-структуры хранятся как JSON и разбираются только при обращении
+JSON_FIELDS = frozenset(('screenshots', 'SIGNATURE', 'ARCHIVE', 'DISCS', 'HEADER'))
+FIELD_INDEX = {name: index for index, name in enumerate(FIELDS)}
+
+HEADER = struct.Struct('<8sHHI16s')
+FIELD_REF = struct.Struct('<II')
+RECORD_SIZE = FIELD_REF.size * len(FIELDS)
+NONE_LENGTH = 0xFFFFFFFF # Длина-метка для None в строковых полях
+REVISION_SIZE = 16
+
+
+class SnapshotError(ValueError):
+    """Файл снимка повреждён или записан другой версией формата."""
+
+
+# ----------------------------------------------------------------------
+# ЗАПИСЬ СНИМКА
+# ----------------------------------------------------------------------
+def _encode_field(name, value):
+    if name in JSON_FIELDS:
+        return json.dumps(value, ensure_ascii=False).encode('utf-8')
+    return None if value is None else str(value).encode('utf-8')
+
+
+def write_snapshot(path, revision, rom_list):
+    """
+    Записывает снимок записей консоли (во временный файл и атомарной заменой).
+    revision — ревизия каталога (см. GameCatalog), снимок действителен, пока она
+    не изменилась.
+    """
+    strings = {}
+    blob = bytearray()
+    records = bytearray()
+
+    for rom_data in rom_list:
+        for name in FIELDS:
+            raw = _encode_field(name, rom_data.get(name))
+            if raw is None:
+                records += FIELD_REF.pack(0, NONE_LENGTH)
+                continue
+            offset = strings.get(raw)
+            if offset is None:
+                offset = strings[raw] = len(blob)
+                blob += raw
+            records += FIELD_REF.pack(offset, len(raw))
+
+    header = HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(FIELDS), len(rom_list),
+        revision.encode('ascii')[:REVISION_SIZE]
+    )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(records)
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(header) + len(records) + len(blob)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС СНИМКА В ПАМЯТИ (ConsoleSnapshot)
+# ----------------------------------------------------------------------
+class ConsoleSnapshot(Sequence):
+    """
+    Снимок, отображённый в память: последовательность ленивых записей
+    SnapshotRecord. Отображение живёт, пока на него ссылается хотя бы одна
+    запись; чтение из разных потоков безопасно.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e: # Пустой файл
+                raise SnapshotError(f"{path}: {e}") from e
+
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{path}: файл короче заголовка")
+        magic, version, field_count, count, revision = HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or field_count != len(FIELDS):
+            raise SnapshotError(f"{path}: неизвестный формат (версия {version})")
+
+        self._count = count
+        self._strings = HEADER.size + count * RECORD_SIZE
+        if self._strings > len(self._map):
+            raise SnapshotError(f"{path}: файл обрезан")
+        self.path = path
+        self.revision = revision.rstrip(b"\x00").decode('ascii', 'replace')
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return SnapshotRecord(self, index)
+
+    def records(self):
+        """Все записи списком (объекты создаются сразу, поля — при обращении)."""
+        return [SnapshotRecord(self, index) for index in range(self._count)]
+
+    def field(self, index, name):
+        field = FIELD_INDEX[name]
+        offset, length = FIELD_REF.unpack_from(self._map, HEADER.size + index * RECORD_SIZE + field * FIELD_REF.size)
+        if length == NONE_LENGTH:
+            return None
+        start = self._strings + offset
+        text = self._map[start:start + length].decode('utf-8')
+        return json.loads(text) if name in JSON_FIELDS else text
+
+
+class SnapshotRecord(MutableMapping):
+    """
+    Запись игры поверх снимка: ведёт себя как dict записи каталога. Поле
+    читается из снимка при первом обращении и запоминается; изменения
+    (например, FOLDER_PATH при сверке) хранятся в самой записи.
+    """
+    __slots__ = ('_snapshot', '_index', '_values')
+
+    def __init__(self, snapshot, index):
+        self._snapshot = snapshot
+        self._index = index
+        self._values = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if self._snapshot is None or key not in FIELD_INDEX:
+                raise
+        value = self._values[key] = self._snapshot.field(self._index, key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._values[key] = value
+
+    def __delitem__(self, key):
+        # Удаление поля снимка: запись отвязывается от снимка целиком
+        self._detach()
+        del self._values[key]
+
+    def __iter__(self):
+        if self._snapshot is None:
+            return iter(self._values)
+        return iter(list(FIELDS) + [key for key in self._values if key not in FIELD_INDEX])
+
+    def __len__(self):
+        if self._snapshot is None:
+            return len(self._values)
+        return len(FIELDS) + sum(1 for key in self._values if key not in FIELD_INDEX)
+
+    def __contains__(self, key):
+        return key in self._values or (self._snapshot is not None and key in FIELD_INDEX)
+
+    def __repr__(self):
+        return f"SnapshotRecord({dict(self)!r})"
+
+    def _detach(self):
+        if self._snapshot is not None:
+            for name in FIELDS:
+                self[name]
+            self._snapshot = None
+
+    def copy(self):
+        return dict(self)
+
+
+def open_snapshot(path):
+    """ConsoleSnapshot или None, если файла нет или он не читается."""
+    try:
+        return ConsoleSnapshot(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, SnapshotError, struct.error) as e:
+        logger.warning(f"Снимок каталога не прочитан, будет использован SQLite: {e}")
+        return None
@@ -227,6 +227,19 @@ def apply_dark_theme(app):
         font-size: 8pt;
     }}
     
+    QPushButton#footerButton {{
+        color: #E0B050;
+        background-color: transparent;
+        border: none;
+        font-size: 8pt;
+        padding: 0 8px;
+    }}
+    
+    QPushButton#footerButton:hover {{
+        color: #FFD070;
+        text-decoration: underline;
+    }}
+    
     QWidget#footerWidget {{
         background-color: #1a1a1a;
         border-top: 1px solid #333333; 
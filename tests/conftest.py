@@ -0,0 +1,6 @@
+# conftest.py - Модули лаунчера лежат в корне репозитория (плоская структура)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
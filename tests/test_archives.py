@@ -0,0 +1,201 @@
+# test_archives.py - Оглавление .zip/.rar: архивы собираются в тестах по спецификации формата
+
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from archives import (
+    list_archive, inspect_archive, ArchiveError, RAR4_SIGNATURE, RAR5_SIGNATURE,
+    ARCHIVE_OK, ARCHIVE_EMPTY, ARCHIVE_UNREADABLE,
+)
+from headers import read_header
+
+ROM = b"NES\x1a" + bytes(range(60))
+
+
+# ----------------------------------------------------------------------
+# СБОРКА RAR 4.x (метод хранения без сжатия)
+# ----------------------------------------------------------------------
+def _rar4_block(head_type, flags, body):
+    return struct.pack('<HBHH', 0, head_type, flags, 7 + len(body)) + body
+
+
+def _rar4_unicode_name(name):
+    """Имя с флагом 0x200: OEM-имя, ноль и сжатое UTF-16 (все символы полными 16 битами)."""
+    encoded = bytearray([0])
+    codes = [ord(char) for char in name]
+    for start in range(0, len(codes), 4):
+        group = codes[start:start + 4]
+        flags = 0
+        for position in range(4):
+            flags = flags << 2 | (2 if position < len(group) else 0)
+        encoded.append(flags)
+        for code in group:
+            encoded += struct.pack('<H', code)
+    return name.encode('cp866', 'replace') + b"\x00" + bytes(encoded)
+
+
+def build_rar4(members, main_flags=0, pack_size=None, end=True):
+    """members — [(имя, данные)]; pack_size подменяет размер данных в заголовке."""
+    out = bytearray(RAR4_SIGNATURE)
+    out += _rar4_block(0x73, main_flags, bytes(6))
+    for name, data in members:
+        flags = 0x8000
+        if name.isascii():
+            raw_name = name.encode('ascii')
+        else:
+            raw_name = _rar4_unicode_name(name)
+            flags |= 0x0200
+        body = struct.pack(
+            '<IIBIIBBHI', len(data) if pack_size is None else pack_size, len(data), 2, zlib.crc32(data),
+            0, 29, 0x30, len(raw_name), 0x20
+        ) + raw_name
+        out += _rar4_block(0x74, flags, body) + data
+    if end:
+        out += _rar4_block(0x7B, 0x4000, b"")
+    return bytes(out)
+
+
+# ----------------------------------------------------------------------
+# СБОРКА RAR 5.0
+# ----------------------------------------------------------------------
+def _vint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        out.append(byte | (0x80 if value else 0))
+        if not value:
+            return bytes(out)
+
+
+def _rar5_block(head_type, fields, data_size=None):
+    flags = 0x02 if data_size is not None else 0
+    header = _vint(head_type) + _vint(flags)
+    if data_size is not None:
+        header += _vint(data_size)
+    header += fields
+    return struct.pack('<I', zlib.crc32(_vint(len(header)) + header)) + _vint(len(header)) + header
+
+
+def build_rar5(members, encrypted=False):
+    out = bytearray(RAR5_SIGNATURE)
+    if encrypted:
+        out += _rar5_block(4, _vint(0) + _vint(0) + _vint(15) + bytes(16))
+    out += _rar5_block(1, _vint(0))
+    for name, data in members:
+        raw_name = name.encode('utf-8')
+        fields = (
+            _vint(0x04) + _vint(len(data)) + _vint(0x20) + struct.pack('<I', zlib.crc32(data))
+            + _vint(0) + _vint(0) + _vint(len(raw_name)) + raw_name
+        )
+        out += _rar5_block(2, fields, data_size=len(data)) + data
+    out += _rar5_block(5, _vint(0))
+    return bytes(out)
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return write
+
+
+# ----------------------------------------------------------------------
+# ZIP
+# ----------------------------------------------------------------------
+def test_zip_members(tmp_path):
+    path = str(tmp_path / "game.zip")
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("game.nes", ROM)
+        archive.writestr("readme.txt", b"text")
+    assert list_archive(path)[0] == ("game.nes", len(ROM), zlib.crc32(ROM))
+    status, roms = inspect_archive(path, ('.nes', '.zip'))
+    assert status == ARCHIVE_OK and [member.name for member in roms] == ["game.nes"]
+
+
+def test_truncated_zip_is_unreadable(tmp_path, write):
+    path = str(tmp_path / "full.zip")
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("game.nes", ROM)
+    data = open(path, 'rb').read()
+    assert inspect_archive(write("cut.zip", data[:len(data) // 2]), ('.nes',))[0] == ARCHIVE_UNREADABLE
+
+
+def test_encrypted_zip_member_header_is_skipped(tmp_path):
+    path = str(tmp_path / "locked.zip")
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr("game.gen", bytes(1024))
+    data = bytearray(open(path, 'rb').read())
+    # Флаг шифрования в локальном и центральном заголовке
+    data[6] |= 1
+    data[data.find(b"PK\x01\x02") + 8] |= 1
+    open(path, 'wb').write(data)
+    archive = {'members': [(name, size, crc) for name, size, crc in list_archive(path)]}
+    assert read_header(path, archive=archive) is None
+
+
+# ----------------------------------------------------------------------
+# RAR 4.x
+# ----------------------------------------------------------------------
+def test_rar4_members(write):
+    path = write("game.rar", build_rar4([("game.nes", ROM), ("info.txt", b"x")]))
+    assert list_archive(path) == [("game.nes", len(ROM), zlib.crc32(ROM)), ("info.txt", 1, zlib.crc32(b"x"))]
+
+
+def test_rar4_unicode_name(write):
+    path = write("game.rar", build_rar4([("Игра (Рус).nes", ROM)]))
+    assert [member.name for member in list_archive(path)] == ["Игра (Рус).nes"]
+
+
+def test_rar4_oem_name(write):
+    data = build_rar4([("game.nes", ROM)]).replace(b"game.nes", "игра.nes".encode('cp866'))
+    assert [member.name for member in list_archive(write("game.rar", data))] == ["игра.nes"]
+
+
+def test_rar4_truncated_data_is_unreadable(write):
+    data = build_rar4([("game.nes", b"abc")], pack_size=100000, end=False)
+    assert inspect_archive(write("cut.rar", data), ('.nes',)) == (ARCHIVE_UNREADABLE, [])
+
+
+def test_rar4_truncated_header_is_unreadable(write):
+    data = build_rar4([("game.nes", ROM)])
+    with pytest.raises(ArchiveError):
+        list_archive(write("cut.rar", data[:len(RAR4_SIGNATURE) + 13 + 10]))
+
+
+def test_bare_rar_signature_is_unreadable(write):
+    assert inspect_archive(write("sig.rar", RAR4_SIGNATURE), ('.nes',))[0] == ARCHIVE_UNREADABLE
+    assert inspect_archive(write("sig5.rar", RAR5_SIGNATURE), ('.nes',))[0] == ARCHIVE_UNREADABLE
+
+
+def test_rar4_encrypted_headers(write):
+    path = write("locked.rar", build_rar4([("game.nes", ROM)], main_flags=0x0080))
+    assert inspect_archive(path, ('.nes',))[0] == ARCHIVE_UNREADABLE
+
+
+def test_rar4_without_roms_is_empty(write):
+    assert inspect_archive(write("docs.rar", build_rar4([("manual.txt", b"x")])), ('.nes',))[0] == ARCHIVE_EMPTY
+
+
+# ----------------------------------------------------------------------
+# RAR 5.0
+# ----------------------------------------------------------------------
+def test_rar5_members(write):
+    path = write("game.rar", build_rar5([("Игра.nes", ROM), ("info.txt", b"x")]))
+    assert list_archive(path) == [("Игра.nes", len(ROM), zlib.crc32(ROM)), ("info.txt", 1, zlib.crc32(b"x"))]
+
+
+def test_rar5_truncated_data_is_unreadable(write):
+    data = build_rar5([("game.nes", ROM)])
+    cut = data[:data.index(ROM) + 5]
+    assert inspect_archive(write("cut.rar", cut), ('.nes',)) == (ARCHIVE_UNREADABLE, [])
+
+
+def test_rar5_encrypted_headers(write):
+    path = write("locked.rar", build_rar5([("game.nes", ROM)], encrypted=True))
+    assert inspect_archive(path, ('.nes',))[0] == ARCHIVE_UNREADABLE
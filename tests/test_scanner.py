@@ -0,0 +1,61 @@
+# test_scanner.py - Сканирование без Qt: iter_scan/aiter_scan и отмена
+
+import asyncio
+import threading
+import time
+
+from scanner import iter_scan, aiter_scan, FoundGame, ScanFinished
+
+
+def _make_library(root, count):
+    for index in range(count):
+        game = root / f"Game {index}"
+        game.mkdir()
+        (game / f"game{index}.nes").write_bytes(b"NES\x1a")
+    return str(root)
+
+
+def test_iter_scan_finds_all_games(tmp_path):
+    root = _make_library(tmp_path, 5)
+    events = list(iter_scan([root], ('.nes',), ('.png',)))
+    assert sum(isinstance(event, FoundGame) for event in events) == 5
+    assert isinstance(events[-1], ScanFinished)
+    assert len(events[-1].rom_list) == 5
+
+
+def test_iter_scan_slow_consumer_gets_end_of_stream(tmp_path, monkeypatch):
+    # Очередь меньше числа событий: конец потока не должен теряться
+    monkeypatch.setattr("scanner.SCAN_QUEUE_SIZE", 2)
+    root = _make_library(tmp_path, 20)
+    events = []
+    for event in iter_scan([root], ('.nes',), ('.png',)):
+        events.append(event)
+        time.sleep(0.005)
+    assert isinstance(events[-1], ScanFinished)
+
+
+def test_aiter_scan_cancelled_consumer_does_not_hang(tmp_path):
+    root = _make_library(tmp_path, 30)
+
+    def slow():
+        time.sleep(0.1) # Медленный диск: сканирование идёт дольше таймаута
+        return False
+
+    async def consume():
+        async for _ in aiter_scan([root], ('.nes',), ('.png',), is_cancelled=slow):
+            pass
+
+    async def main():
+        try:
+            await asyncio.wait_for(consume(), 0.3)
+        except asyncio.TimeoutError:
+            return "timeout"
+        return "finished"
+
+    result = []
+    # asyncio.run() ждёт пул исполнителей при закрытии: зависание видно по живому потоку
+    runner = threading.Thread(target=lambda: result.append(asyncio.run(main())), daemon=True)
+    runner.start()
+    runner.join(10)
+    assert not runner.is_alive(), "asyncio.run() не вернулся после отмены aiter_scan"
+    assert result == ["timeout"]
@@ -4,23 +4,31 @@ import subprocess
 import logging
 import re
 import shlex 
-from PyQt5.QtCore import QThread, pyqtSignal, QSize, Qt
-from PyQt5.QtGui import QPixmap, QImage 
+import threading
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, QSize, Qt
+from PyQt5.QtGui import QImage
 from PyQt5.QtWidgets import QWidget
 
 # ВАЖНО: Убедитесь, что widgets.py существует и содержит эти классы/функции
 # (Оставляю заглушки, чтобы избежать сбоя при автономном запуске threads.py)
 try:
-    from widgets import GameItem, extract_short_info 
+    from widgets import GameItem 
 except ImportError:
     class GameItem(QWidget): 
         def __init__(self, *args, **kwargs):
             super().__init__(*args, **kwargs)
             self.image_label = QWidget() 
             self.image_label.size = lambda: QSize(100, 100)
-            
-    def extract_short_info(html): 
-        return "Описание недоступно."
+
+from scanner import (
+    find_cover_path, process_folder, list_roots, existing_for_root, ScanStats, MissCache, LinkGuard, ScanFilter,
+    iter_scan, FoundGame, ScanProgress
+)
+from hasher import hash_files, file_stat_key, DEFAULT_CHUNK_SIZE
+from datfile import DatIndex
+from duplicates import find_duplicates, hidden_in_console, format_report
+from extract_cache import ExtractionError
+from io_scheduler import PRIORITY_ACTIVE, PRIORITY_VISIBLE
 
 logger = logging.getLogger(__name__)
 
@@ -70,69 +78,77 @@ class EmulatorMonitorThread(QThread):
             self.emulator_closed.emit() 
 
 # ----------------------------------------------------------------------
-# КЛАСС ЗАГРУЗКИ ОБЛОЖЕК (ImageLoaderThread)
+# КЛАСС ЗАГРУЗКИ ОБЛОЖЕК (CoverLoader)
 # ----------------------------------------------------------------------
-class ImageLoaderThread(QThread):
+class CoverLoader(QObject):
     """
-    Поток для асинхронной загрузки изображения обложки.
+    Загружает обложки через общий IOScheduler вместо отдельного потока на
+    каждую плитку: чтения упорядочены по приоритету и сгруппированы по корню,
+    а обложки видимых плиток можно поднять в начало очереди (prioritize).
+    Картинка читается в QImage в потоке планировщика, QPixmap создаётся в GUI.
     """
-    image_ready = pyqtSignal(GameItem, QPixmap) 
+    image_ready = pyqtSignal(GameItem, QImage)
 
-    def __init__(self, game_folder, game_item_widget, allowed_cover_extensions, parent=None):
+    def __init__(self, scheduler, allowed_cover_extensions, parent=None):
         super().__init__(parent)
-        self.game_folder = game_folder
-        self.game_item_widget = game_item_widget
-        self.allowed_cover_extensions = tuple(ext.lower() for ext in allowed_cover_extensions) 
+        self.scheduler = scheduler
+        self.allowed_cover_extensions = tuple(ext.lower() for ext in allowed_cover_extensions)
+        # {виджет: Future} — обложки, которые ещё не загружены
+        self._pending = {}
+        self._lock = threading.Lock()
 
-    def _find_cover_path(self, game_folder_path):
-        """Ищет обложку (cartridge/cover) в папке images или корне папки игры."""
-        
-        images_dir = os.path.join(game_folder_path, "images")
-        
-        # 1. Поиск 'cartridge' в папке 'images'
-        for ext in self.allowed_cover_extensions:
-            cover_filename = f"cartridge{ext}"
-            cover_path_in_images = os.path.join(images_dir, cover_filename)
-            if os.path.exists(cover_path_in_images):
-                return cover_path_in_images
-                
-        # 2. Поиск 'cover' в корне папки игры
-        for ext in self.allowed_cover_extensions:
-            cover_path = os.path.join(game_folder_path, f"cover{ext}")
-            if os.path.exists(cover_path):
-                return cover_path
-                
-        # 3. Поиск 'cover' в папке 'images'
-        for ext in self.allowed_cover_extensions:
-            cover_filename = f"cover{ext}"
-            cover_path_in_images = os.path.join(images_dir, cover_filename)
-            if os.path.exists(cover_path_in_images):
-                return cover_path_in_images
-                
-        return None
+    def load(self, game_item_widget, game_folder, cover_path=None, priority=PRIORITY_ACTIVE):
+        """Ставит загрузку обложки в очередь (прежний запрос для этого виджета отменяется)."""
+        future = self.scheduler.submit(
+            self._read_cover, game_folder, cover_path,
+            priority=priority, group=os.path.dirname(os.path.normpath(game_folder))
+        )
+        with self._lock:
+            previous = self._pending.get(game_item_widget)
+            self._pending[game_item_widget] = future
+        if previous is not None:
+            previous.cancel()
+        future.add_done_callback(lambda done: self._on_loaded(game_item_widget, done))
 
-    def run(self):
-        """Загружает обложку и отправляет сигнал."""
-        cover_path = self._find_cover_path(self.game_folder)
-        
-        pixmap = QPixmap()
-        
+    def prioritize(self, game_item_widgets, priority=PRIORITY_VISIBLE):
+        """Переносит ещё не начатые загрузки для этих виджетов в приоритет priority."""
+        with self._lock:
+            futures = [self._pending.get(widget) for widget in game_item_widgets]
+        return sum(1 for future in futures if future is not None and self.scheduler.reprioritize(future, priority))
+
+    def pending_widgets(self):
+        with self._lock:
+            return list(self._pending)
+
+    def _read_cover(self, game_folder, cover_path):
+        # ШАГ 1: Путь из каталога (без поиска по диску)
         if cover_path:
-            # ОПТИМИЗАЦИЯ: Читаем через QImage для потокобезопасности
             image = QImage(cover_path)
             if not image.isNull():
-                 pixmap = QPixmap.fromImage(image)
-        
-        if not pixmap.isNull():
-            # 🟢 УЛЬТРА-ФИКС V2: Минимальная задержка для сброса очереди событий ГУИ
-            time.sleep(0) 
-            # Отправляем QPixmap без масштабирования
-            self.image_ready.emit(self.game_item_widget, pixmap) 
-        else:
-            # 🟢 УЛЬТРА-ФИКС V2: Минимальная задержка
-            time.sleep(0)
-            # Отправляем пустой QPixmap, если обложка не найдена/не загружена
-            self.image_ready.emit(self.game_item_widget, QPixmap())
+                return image
+
+        # ШАГ 2: Поиск обложки, если каталог не помог (обложку удалили/переименовали)
+        found_path = find_cover_path(game_folder, self.allowed_cover_extensions)
+        if found_path and found_path != cover_path:
+            image = QImage(found_path)
+            if not image.isNull():
+                return image
+        return QImage()
+
+    def _on_loaded(self, game_item_widget, future):
+        """Вызывается в потоке планировщика; сигнал доставляется в GUI через очередь событий."""
+        with self._lock:
+            if self._pending.get(game_item_widget) is future:
+                del self._pending[game_item_widget]
+        if future.cancelled():
+            return
+        try:
+            image = future.result()
+        except Exception as e:
+            logger.warning(f"Ошибка загрузки обложки: {e}")
+            image = QImage()
+        # Пустой QImage, если обложка не найдена/не загружена
+        self.image_ready.emit(game_item_widget, image)
 
 
 # ----------------------------------------------------------------------
@@ -141,115 +157,549 @@ class ImageLoaderThread(QThread):
 class GameLoaderThread(QThread):
     """
     Поток для сканирования папок ROM'ов, использующий кэш для оптимизации.
+    Если передан каталог, результат сверки сохраняется в него по окончании.
+    Найденные игры отправляются пачками (games_found), а не по одной.
+    root_folders — один корень или список корней консоли (объединяются в один список).
     """
-    game_found = pyqtSignal(dict) 
+    games_found = pyqtSignal(list) 
     finished_loading = pyqtSignal(list) 
+    # (обработано папок, всего папок, оценка оставшегося времени в секундах или -1)
+    scan_progress = pyqtSignal(int, int, float)
+    # (консоль, пути папок без ROM'а) — после сохранения в каталог
+    empty_folders_found = pyqtSignal(str, list)
+
+    PROGRESS_INTERVAL = 0.25
 
-    def __init__(self, root_folder, rom_extensions, allowed_screenshot_extensions, existing_roms=None, parent=None):
+    def __init__(self, root_folders, rom_extensions, allowed_screenshot_extensions, existing_roms=None,
+                 console_key=None, catalog=None, scan_workers=1, root_precedence="order",
+                 batch_size=64, batch_interval_ms=100, io_scheduler=None, io_priority=PRIORITY_ACTIVE,
+                 dedupe_hardlinks=False, scan_filter=None, parent=None):
         super().__init__(parent)
-        self.root_folder = root_folder
+        # Пачка отправляется при наборе batch_size записей или по истечении batch_interval_ms
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval_ms / 1000.0
+        self._batch = []
+        self._last_flush = time.monotonic()
+        self._last_progress = 0.0
+        # Число потоков для проверки папок (1 — последовательный режим)
+        self.scan_workers = max(1, int(scan_workers or 1))
+        self.root_folders = [root_folders] if isinstance(root_folders, str) else list(root_folders)
+        self.root_precedence = root_precedence
+        # Общий планировщик ввода-вывода (None — собственный пул из scan_workers потоков)
+        self.io_scheduler = io_scheduler
+        self.io_priority = io_priority
+        # Жёсткие ссылки на один ROM-файл — одна запись (см. scanner.LinkGuard)
+        self.dedupe_hardlinks = dedupe_hardlinks
+        # Правила SCAN_INCLUDE/SCAN_EXCLUDE консоли (scanner.ScanFilter)
+        self.scan_filter = scan_filter
+        self.console_key = console_key
+        self.catalog = catalog
         self.rom_extensions = tuple(ext.lower() for ext in rom_extensions) 
         self.allowed_screenshot_extensions = tuple(ext.lower() for ext in allowed_screenshot_extensions) 
         
         self.existing_roms_map = {}
         if existing_roms:
             self.existing_roms_map = {rom['FOLDER_NAME']: rom for rom in existing_roms} 
+        # existing_roms=None при заданном каталоге: записи читаются из каталога уже в потоке
+        self._load_existing_from_catalog = existing_roms is None
+        # Папки без ROM'а с сигнатурами (из каталога): неизменённые не обходятся заново
+        self.misses = None
+        
+        # Пауза (например, пока запущен эмулятор): папки не обрабатываются до resume()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
         
 
     def run(self):
         """Выполняет сканирование диска, используя кэш."""
-        full_rom_list = []
+        self._load_existing_roms()
+        self._load_misses()
+        self.stats = ScanStats()
+        if self.isInterruptionRequested(): return # Консоль сменили, пока читался каталог
         
+        # Поток — тонкая обёртка над iter_scan: события сканера -> сигналы Qt
+        full_rom_list = None
         try:
-              folder_names = os.listdir(self.root_folder)
+            for event in iter_scan(
+                self.root_folders, self.rom_extensions, self.allowed_screenshot_extensions,
+                existing_roms_map=self.existing_roms_map,
+                workers=self.scan_workers,
+                precedence=self.root_precedence,
+                is_cancelled=self._should_stop,
+                stats=self.stats,
+                misses=self.misses,
+                scheduler=self.io_scheduler,
+                priority=self.io_priority,
+                guard=LinkGuard(self.dedupe_hardlinks),
+                scan_filter=self.scan_filter
+            ):
+                if isinstance(event, FoundGame):
+                    self._queue_game(event.rom_data)
+                elif isinstance(event, ScanProgress):
+                    self._on_scan_progress(event)
+                else:
+                    full_rom_list = event.rom_list
         except FileNotFoundError:
-              logger.error(f"Корневая папка не найдена: {self.root_folder}")
+              logger.error(f"Корневая папка не найдена: {', '.join(self.root_folders)}")
               self.finished_loading.emit([]) 
               return
+        except Exception as e:
+              # Исключение в QThread.run роняет приложение: сообщаем и завершаем загрузку
+              # с известными записями (каталог не перезаписывается неполным результатом)
+              logger.exception(f"Ошибка сканирования {self.console_key or self.root_folders[0]}: {e}")
+              self._flush_batch()
+              self.finished_loading.emit(list(self.existing_roms_map.values())) 
+              return
+            
+        if full_rom_list is None: return # Сканирование прервано
         
-        for folder_name in folder_names:
+        self._flush_batch()
+        logger.info(f"Сканирование {self.console_key or self.root_folders[0]} завершено: {self.stats.report()}")
+        
+        # Итоговый список сохраняет порядок os.listdir независимо от режима
+        # Сохраняем сверенный список в каталог (в этом потоке, не в GUI)
+        if self.catalog is not None and self.console_key:
+            try:
+                self.catalog.save_console(self.console_key, full_rom_list)
+                self.catalog.save_empty_folders(self.console_key, self.misses.found)
+                self.empty_folders_found.emit(self.console_key, sorted(self.misses.found))
+            except Exception as e:
+                logger.error(f"Ошибка сохранения каталога {self.console_key}: {e}")
+                        
+        self.finished_loading.emit(full_rom_list) 
+
+    def _should_stop(self):
+        """Проверка отмены для сканера; на паузе ждёт resume()."""
+        if self.isInterruptionRequested(): return True
+        self._wait_if_paused()
+        return self.isInterruptionRequested()
+
+    def _on_scan_progress(self, progress):
+        # Отправка пачки по таймеру, даже если новых игр давно не было
+        now = time.monotonic()
+        if self._batch and now - self._last_flush >= self.batch_interval:
+            self._flush_batch()
+        # Прогресс для индикатора загрузки (не чаще PROGRESS_INTERVAL; итоговый — всегда)
+        if now - self._last_progress >= self.PROGRESS_INTERVAL or progress.folders_done >= progress.folders_total:
+            self._last_progress = now
+            eta = progress.eta
+            self.scan_progress.emit(progress.folders_done, progress.folders_total, -1.0 if eta is None else eta)
+
+    def _load_existing_roms(self):
+        """Читает известные записи консоли из каталога (если они не переданы явно)."""
+        if not (self._load_existing_from_catalog and self.catalog is not None and self.console_key):
+            return
+        try:
+            self.existing_roms_map = {rom['FOLDER_NAME']: rom for rom in self.catalog.load_console(self.console_key)}
+        except Exception as e:
+            logger.error(f"Ошибка чтения каталога {self.console_key}: {e}")
+
+    def _load_misses(self):
+        """Папки без ROM'а из прошлого сканирования (только при работе с каталогом)."""
+        if self.catalog is None or not self.console_key:
+            return
+        try:
+            self.misses = MissCache(self.catalog.load_empty_folders(self.console_key))
+        except Exception as e:
+            logger.error(f"Ошибка чтения папок без ROM'а {self.console_key}: {e}")
+            self.misses = MissCache()
+
+    def pause(self):
+        """Приостанавливает обработку папок (текущая папка дообрабатывается)."""
+        self._resume_event.clear()
+
+    def resume(self):
+        self._resume_event.set()
+
+    def _wait_if_paused(self):
+        """Ждёт resume(), продолжая реагировать на requestInterruption()."""
+        while not self._resume_event.wait(0.1):
             if self.isInterruptionRequested(): return
+
+    def _queue_game(self, rom_data):
+        """Добавляет запись в текущую пачку и отправляет её по размеру или времени."""
+        self._batch.append(rom_data)
+        if len(self._batch) >= self.batch_size or time.monotonic() - self._last_flush >= self.batch_interval:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        """Отправляет накопленную пачку одним межпоточным сигналом."""
+        if self._batch:
+            self.games_found.emit(self._batch)
+            self._batch = []
+        self._last_flush = time.monotonic()
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ТОЧЕЧНОЙ ПРОВЕРКИ ПАПОК (FolderProbeThread)
+# ----------------------------------------------------------------------
+class FolderProbeThread(GameLoaderThread):
+    """
+    Повторно проверяет только указанные папки игр (по событиям наблюдателя
+    за файловой системой) и обновляет их записи в каталоге.
+    """
+    folders_probed = pyqtSignal(str, list) 
+
+    def __init__(self, root_folders, folder_names, rom_extensions, allowed_screenshot_extensions,
+                 existing_roms=None, console_key=None, catalog=None, check_root=False,
+                 root_precedence="order", io_scheduler=None, io_priority=PRIORITY_ACTIVE, scan_filter=None,
+                 parent=None):
+        super().__init__(root_folders, rom_extensions, allowed_screenshot_extensions,
+                         existing_roms=existing_roms, console_key=console_key, catalog=catalog,
+                         root_precedence=root_precedence, io_scheduler=io_scheduler, io_priority=io_priority,
+                         scan_filter=scan_filter, parent=parent)
+        self.folder_names = list(folder_names)
+        self.check_root = check_root
+
+    def run(self):
+        """Возвращает список (FOLDER_NAME, rom_data или None, changed)."""
+        # Для неактивной консоли записи читаются из каталога
+        self._load_existing_roms()
+        # Папки изменились — проверяем их заново, промахи только собираем
+        self.misses = MissCache()
+        
+        folder_names = set(self.folder_names)
+        
+        # Корни в порядке приоритета и их содержимое (папки, исключённые правилами, — как удалённые)
+        scan_filter = self.scan_filter or ScanFilter()
+        try:
+            ranked = [
+                (root, set(scan_filter.folders(names)))
+                for root, names in list_roots(self.root_folders, self.root_precedence)
+            ]
+        except FileNotFoundError:
+            ranked = []
+        root_maps = {root: existing_for_root(self.existing_roms_map, root) for root, _ in ranked}
+        
+        # Изменился сам корень: сравниваем список папок с известными записями
+        if self.check_root:
+            on_disk = set().union(*(names for _, names in ranked))
+            known = set(self.existing_roms_map)
+            folder_names |= (on_disk - known) | (known - on_disk)
+        
+        results = []
+        probed_paths = set()
+        for folder_name in sorted(folder_names):
+            if self.isInterruptionRequested(): return
+            
+            # Игра берётся из первого по приоритету корня, где она есть
+            rom_data, changed, is_dir = None, False, False
+            for root_folder, root_names in ranked:
+                probed_paths.add(os.path.join(root_folder, folder_name))
+                if folder_name not in root_names:
+                    continue
+                is_dir = is_dir or os.path.isdir(os.path.join(root_folder, folder_name))
+                rom_data, changed = self._process_folder(root_folder, folder_name, root_maps[root_folder])
+                if rom_data is not None:
+                    break
+            # Отмена посреди папки: (None, False) не значит, что игру удалили
+            if self.isInterruptionRequested(): return
+            if rom_data is None and folder_name not in self.existing_roms_map:
+                # Папка без ROM'а (например, игра ещё копируется): GUI начнёт следить за ней
+                if not is_dir:
+                    continue
+            results.append((folder_name, rom_data, changed))
+        
+        if self.catalog is not None and self.console_key:
+            try:
+                for folder_name, rom_data, changed in results:
+                    if rom_data is None and folder_name in self.existing_roms_map:
+                        self.catalog.remove_game(self.console_key, folder_name)
+                    elif changed:
+                        self.catalog.upsert_game(self.console_key, rom_data)
+                self.catalog.save_empty_folders(
+                    self.console_key, self.misses.found, replace=False,
+                    cleared=probed_paths - set(self.misses.found)
+                )
+                self.empty_folders_found.emit(self.console_key, sorted(self.catalog.load_empty_folders(self.console_key)))
+            except Exception as e:
+                logger.error(f"Ошибка обновления каталога {self.console_key}: {e}")
+                
+        self.folders_probed.emit(self.console_key or "", results)
+
+    def _process_folder(self, root_folder, folder_name, existing_roms_map):
+        """Проверяет одну папку игры в корне. Возвращает (rom_data, changed)."""
+        if self._should_stop(): return None, False
+        args = (root_folder, folder_name, existing_roms_map, self.rom_extensions, self.allowed_screenshot_extensions)
+        kwargs = {'misses': self.misses, 'is_cancelled': self._should_stop, 'scan_filter': self.scan_filter}
+        if self.io_scheduler is not None:
+            return self.io_scheduler.submit(
+                process_folder, *args, priority=self.io_priority, group=root_folder, **kwargs
+            ).result()
+        return process_folder(*args, **kwargs)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ХЭШИРОВАНИЯ ROM'ОВ (RomHashThread)
+# ----------------------------------------------------------------------
+class RomHashThread(QThread):
+    """
+    Считает CRC32/MD5/SHA1 файлов ROM'ов после сканирования. Файлы читаются
+    в пуле процессов (hasher.hash_files), поток раздаёт задачи, сохраняет
+    хэши в каталог и сообщает прогресс. Файлы с теми же размером и mtime
+    берутся из кэша хэшей каталога и повторно не читаются.
+    """
+    # (обработано файлов, всего файлов к хэшированию, МБ/с)
+    hash_progress = pyqtSignal(int, int, float)
+    # (консоль, {FULL_ROM_PATH: {'size', 'crc32', 'md5', 'sha1'}})
+    hashes_ready = pyqtSignal(str, dict)
+
+    PROGRESS_INTERVAL = 0.5
+    SAVE_BATCH = 32
+
+    def __init__(self, console_key, rom_paths, catalog=None, workers=2,
+                 chunk_size=DEFAULT_CHUNK_SIZE, parent=None):
+        super().__init__(parent)
+        self.console_key = console_key
+        self.rom_paths = [path for path in dict.fromkeys(rom_paths) if path]
+        self.catalog = catalog
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        
+        self.hashes = {}
+        self._stat_keys = {}
+        self._unsaved = []
+        self._done = 0
+        self._bytes = 0
+        self._total = 0
+        self._started = 0.0
+        self._last_progress = 0.0
+        
+        # Пауза на время игры: новые файлы не отдаются пулу до resume()
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+
+    def pause(self):
+        self._resume_event.clear()
+
+    def resume(self):
+        self._resume_event.set()
+
+    @property
+    def mb_per_sec(self):
+        elapsed = time.monotonic() - self._started
+        return self._bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+
+    def run(self):
+        try:
+            to_hash = self._collect_uncached()
+            self._total = len(to_hash)
+            self._started = time.monotonic()
+            if to_hash:
+                logger.info(f"Хэширование {self.console_key}: {len(to_hash)} файлов, из кэша {len(self.hashes)}.")
             
-            game_folder_path = os.path.join(self.root_folder, folder_name)
+            completed = hash_files(
+                to_hash, self.workers, self.chunk_size,
+                is_cancelled=self.isInterruptionRequested,
+                is_paused=lambda: not self._resume_event.is_set(),
+                on_result=self._on_result
+            )
+        except Exception as e:
+            # Исключение в QThread.run роняет приложение (например, BrokenProcessPool,
+            # если процесс пула убит): сохраняем уже посчитанное и выходим без hashes_ready
+            logger.exception(f"Ошибка хэширования {self.console_key} ({self._done}/{self._total}): {e}")
+            self._save_hashes()
+            return
+        self._save_hashes()
+        if not completed:
+            logger.info(f"Хэширование {self.console_key} прервано ({self._done}/{self._total}).")
+            return
             
-            if os.path.isdir(game_folder_path):
+        if to_hash:
+            elapsed = time.monotonic() - self._started
+            self.hash_progress.emit(self._total, self._total, self.mb_per_sec)
+            logger.info(
+                f"Хэширование {self.console_key} завершено: {self._done} файлов, "
+                f"{self._bytes / (1024 * 1024):.0f} МБ за {elapsed:.1f} с ({self.mb_per_sec:.1f} МБ/с)."
+            )
+        self.hashes_ready.emit(self.console_key, self.hashes)
+
+    def _collect_uncached(self):
+        """Раскладывает файлы на взятые из кэша и требующие хэширования."""
+        cached = {}
+        if self.catalog is not None:
+            try:
+                cached = self.catalog.load_hashes(self.rom_paths)
+            except Exception as e:
+                logger.error(f"Ошибка чтения кэша хэшей: {e}")
                 
-                # ШАГ 1: ПРОВЕРКА КЭША
-                if folder_name in self.existing_roms_map:
-                    rom_data = self.existing_roms_map[folder_name]
-                    
-                    rom_data['FULL_ROM_PATH'] = self._find_rom_file(game_folder_path) or rom_data.get('FULL_ROM_PATH')
-                    rom_data['FOLDER_PATH'] = game_folder_path
-                    
-                    full_rom_list.append(rom_data)
-                    continue 
-
-                # ШАГ 2: НОВАЯ ИГРА (ТРЕБУЕТ ЗАГРУЗКИ)
-                rom_path = self._find_rom_file(game_folder_path)
+        to_hash = []
+        for path in self.rom_paths:
+            stat_key = file_stat_key(path)
+            if stat_key is None:
+                continue
+            entry = cached.get(path)
+            if entry is not None and (entry['size'], entry['mtime_ns']) == stat_key:
+                self.hashes[path] = {key: entry[key] for key in ('size', 'crc32', 'md5', 'sha1')}
+            else:
+                self._stat_keys[path] = stat_key
+                to_hash.append(path)
+        return to_hash
+
+    def _on_result(self, path, digests, error):
+        self._done += 1
+        if digests is None:
+            logger.warning(f"Не удалось хэшировать {path}: {error}")
+        else:
+            self.hashes[path] = digests
+            self._bytes += digests['size']
+            size, mtime_ns = self._stat_keys[path]
+            # Файл менялся во время чтения (ещё копируется) — в кэш не пишем
+            if digests['size'] == size and file_stat_key(path) == (size, mtime_ns):
+                self._unsaved.append((path, size, mtime_ns, digests))
+            if len(self._unsaved) >= self.SAVE_BATCH:
+                self._save_hashes()
                 
-                if rom_path:
-                    info = self._load_game_info(game_folder_path)
-                    
-                    rom_data = {
-                        'title': folder_name,
-                        'FOLDER_NAME': folder_name, 
-                        'FOLDER_PATH': game_folder_path, 
-                        'FULL_ROM_PATH': rom_path,
-                        'description': info['description'],
-                        'screenshots': info['screenshots']
-                    }
-                    
-                    self.game_found.emit(rom_data) 
-                    full_rom_list.append(rom_data)
-                    # 🚀 СКОРОСТЬ ВОССТАНОВЛЕНА: time.sleep(0.01) УДАЛЕНО
-                        
-        self.finished_loading.emit(full_rom_list) 
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.hash_progress.emit(self._done, self._total, self.mb_per_sec)
+
+    def _save_hashes(self):
+        if self.catalog is None or not self._unsaved:
+            return
+        try:
+            self.catalog.save_hashes(self._unsaved)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения хэшей {self.console_key}: {e}")
+        self._unsaved = []
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ЗАГРУЗКИ DAT-ФАЙЛОВ (DatLoaderThread)
+# ----------------------------------------------------------------------
+class DatLoaderThread(QThread):
+    """
+    Загружает индекс DAT в фоне, не задерживая запуск лаунчера. XML
+    разбирается только при первом запуске или после обновления DAT,
+    дальше индекс читается из кэша.
+    """
+    index_ready = pyqtSignal(object)
+
+    def __init__(self, dat_paths, cache_dir=None, parent=None):
+        super().__init__(parent)
+        self.dat_paths = list(dat_paths)
+        self.cache_dir = cache_dir
+
+    def run(self):
+        started = time.monotonic()
+        index = DatIndex.load(self.dat_paths, self.cache_dir)
+        logger.info(
+            f"Индекс DAT загружен за {time.monotonic() - started:.2f} с: "
+            f"{len(index)} ROM'ов из {len(index.sources)} файлов."
+        )
+        self.index_ready.emit(index)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС РАСПАКОВКИ АРХИВА ПЕРЕД ЗАПУСКОМ (ExtractionThread)
+# ----------------------------------------------------------------------
+class ExtractionThread(QThread):
+    """
+    Потоково распаковывает ROM из архива в кэш распаковки (ExtractionCache)
+    для эмуляторов, которые не открывают .zip/.rar сами.
+    """
+    extraction_progress = pyqtSignal(int) # Проценты
+    extracted = pyqtSignal(str)           # Путь к распакованному файлу для запуска
+    extraction_failed = pyqtSignal(str)   # Текст ошибки ('' — отменено пользователем)
+
+    PROGRESS_STEP = 1
+
+    def __init__(self, cache, archive_path, members, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.archive_path = archive_path
+        self.members = list(members)
+        self._last_percent = -1
+
+    def _on_progress(self, done, total):
+        percent = min(100, done * 100 // total)
+        if percent - self._last_percent >= self.PROGRESS_STEP:
+            self._last_percent = percent
+            self.extraction_progress.emit(percent)
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            launch_path = self.cache.extract(
+                self.archive_path, self.members,
+                on_progress=self._on_progress, is_cancelled=self.isInterruptionRequested
+            )
+        except (ExtractionError, OSError) as e:
+            if self.isInterruptionRequested():
+                logger.info(f"Распаковка {os.path.basename(self.archive_path)} отменена.")
+                self.extraction_failed.emit("")
+            else:
+                logger.error(f"Не удалось распаковать {self.archive_path}: {e}")
+                self.extraction_failed.emit(str(e))
+            return
+        logger.info(
+            f"{os.path.basename(self.archive_path)} распакован за "
+            f"{time.monotonic() - started:.1f} с: {launch_path}"
+        )
+        self.extracted.emit(launch_path)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС ПОИСКА ДУБЛИКАТОВ (DuplicateScanThread)
+# ----------------------------------------------------------------------
+class DuplicateScanThread(QThread):
+    """
+    Ищет одинаковые игры по всему каталогу (все консоли): сначала по размеру,
+    затем по содержимому. Хэши берутся из кэша каталога; недостающие считаются
+    только для файлов, совпавших по размеру, и тоже сохраняются в кэш.
+    """
+    # (группы дубликатов, {консоль: {скрываемые FOLDER_NAME}})
+    duplicates_found = pyqtSignal(list, dict)
+
+    def __init__(self, catalog, member_extensions_by_console, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        # {консоль: расширения ROM'ов внутри архивов}
+        self.member_extensions_by_console = member_extensions_by_console
+
+    def run(self):
+        started = time.monotonic()
+        try:
+            entries = [
+                (console_key, rom_data)
+                for console_key in self.member_extensions_by_console
+                for rom_data in self.catalog.load_console(console_key)
+            ]
+            hashes = self._load_valid_hashes([rom_data.get('FULL_ROM_PATH') for _, rom_data in entries])
+        except Exception as e:
+            logger.error(f"Ошибка чтения каталога для поиска дубликатов: {e}")
+            return
+        known = set(hashes)
         
-    def _find_rom_file(self, rom_dir):
-        """
-        Ищет ROM-файл с заданными расширениями.
-        """
-        rom_subdir = os.path.join(rom_dir, "Rom")
-        
-        # 1. Поиск в явной подпапке 'Rom'
-        if os.path.isdir(rom_subdir):
-            for filename in os.listdir(rom_subdir):
-                if filename.lower().endswith(self.rom_extensions):
-                    return os.path.join(rom_subdir, filename)
-        
-        # 2. Рекурсивный поиск (как запасной вариант)
-        for root, _, files in os.walk(rom_dir):
-            for filename in files:
-                if filename.lower().endswith(self.rom_extensions):
-                    if "images" not in root.lower():
-                        return os.path.join(root, filename)
-                        
-        return None
+        member_extensions = tuple(sorted({
+            ext for extensions in self.member_extensions_by_console.values() for ext in extensions
+        }))
+        groups = find_duplicates(entries, hashes, member_extensions)
+        if self.isInterruptionRequested(): return
+        
+        hidden = {console_key: hidden_in_console(groups, console_key) for console_key in self.member_extensions_by_console}
+        try:
+            self._save_new_hashes({path: hashes[path] for path in hashes.keys() - known})
+            self.catalog.save_duplicates(hidden)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения результатов поиска дубликатов: {e}")
+            
+        logger.info(f"Поиск дубликатов ({len(entries)} игр, {time.monotonic() - started:.2f} с): {format_report(groups)}")
+        self.duplicates_found.emit(groups, hidden)
 
-    def _load_game_info(self, game_folder_path):
-        """Читает index.html, извлекает краткое описание и ищет скриншоты."""
-        html_content = ""
-        html_path = os.path.join(game_folder_path, "index.html")
-        description = "Описание недоступно."
+    def _load_valid_hashes(self, paths):
+        """Хэши из кэша, у которых совпадают размер и mtime файла."""
+        hashes = {}
+        for path, entry in self.catalog.load_hashes([path for path in paths if path]).items():
+            if file_stat_key(path) == (entry['size'], entry['mtime_ns']):
+                hashes[path] = entry
+        return hashes
 
-        if os.path.exists(html_path):
-            try:
-                with open(html_path, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                description = extract_short_info(html_content) 
-            except Exception:
-                logger.warning(f"Ошибка чтения или парсинга HTML для {game_folder_path}")
-        
-        images_dir = os.path.join(game_folder_path, "images")
-        screenshots = []
-        if os.path.isdir(images_dir):
-            for filename in os.listdir(images_dir):
-                if "cartridge" not in filename.lower() and "cover" not in filename.lower() and any(
-                    filename.lower().endswith(ext) for ext in self.allowed_screenshot_extensions
-                ):
-                    screenshots.append(os.path.join("images", filename)) 
-        
-        return {
-            'description': description,
-            'screenshots': screenshots
-        }
\ No newline at end of file
+    def _save_new_hashes(self, new_hashes):
+        entries = []
+        for path, digests in new_hashes.items():
+            stat_key = file_stat_key(path)
+            if stat_key is not None and stat_key[0] == digests['size']:
+                entries.append((path, stat_key[0], stat_key[1], digests))
+        self.catalog.save_hashes(entries)
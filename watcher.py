@@ -0,0 +1,104 @@
+# watcher.py - Наблюдение за папками ROM'ов (QFileSystemWatcher + дебаунс)
+
+import os
+import logging
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС НАБЛЮДАТЕЛЯ ЗА БИБЛИОТЕКОЙ (RomLibraryWatcher)
+# ----------------------------------------------------------------------
+class RomLibraryWatcher(QObject):
+    """
+    Следит за корнями ROM_PATH всех консолей и за папками игр активной консоли.
+    Пачки событий (копирование игры порождает десятки изменений) собираются
+    в одну проверку после паузы debounce_ms.
+    """
+    # (консоль, список FOLDER_NAME, изменился ли сам корень)
+    changes_detected = pyqtSignal(str, list, bool)
+
+    def __init__(self, debounce_ms=750, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._roots = {}          # нормализованный путь корня -> консоль
+        self._game_folders = {}   # нормализованный путь папки игры -> (консоль, FOLDER_NAME)
+        self._pending = {}        # консоль -> [set(FOLDER_NAME), root_changed]
+
+        self._debounce_timer = QTimer(self)
+        self._debounce_timer.setSingleShot(True)
+        self._debounce_timer.setInterval(debounce_ms)
+        self._debounce_timer.timeout.connect(self._flush)
+
+    @staticmethod
+    def _norm(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    def watch_root(self, console_key, root_folder):
+        """Начинает наблюдение за корнем ROM_PATH консоли."""
+        if not root_folder or not os.path.isdir(root_folder):
+            return
+        self._roots[self._norm(root_folder)] = console_key
+        if root_folder not in self._watcher.directories():
+            self._watcher.addPath(root_folder)
+
+    def set_game_folders(self, console_key, game_folders):
+        """
+        Заменяет набор наблюдаемых папок игр (папки других консолей снимаются).
+        game_folders: {FOLDER_NAME: [пути]} — сама папка игры и, при наличии, её 'Rom/' и 'images/'.
+        """
+        stale = [path for path in self._watcher.directories() if self._norm(path) in self._game_folders]
+        if stale:
+            self._watcher.removePaths(stale)
+        self._game_folders = {}
+
+        paths = []
+        for folder_name, folder_paths in game_folders.items():
+            for path in folder_paths:
+                self._game_folders[self._norm(path)] = (console_key, folder_name)
+                paths.append(path)
+        if paths:
+            failed = self._watcher.addPaths(paths)
+            if failed:
+                logger.warning(f"Не удалось поставить наблюдение за {len(failed)} папками {console_key}.")
+        logger.info(f"Наблюдение за {len(game_folders)} папками игр {console_key}.")
+
+    def watch_game_folder(self, console_key, folder_name, folder_paths):
+        """Добавляет одну папку игры (новая игра, найденная наблюдателем)."""
+        for path in folder_paths:
+            key = self._norm(path)
+            if key in self._game_folders:
+                continue
+            self._game_folders[key] = (console_key, folder_name)
+            self._watcher.addPath(path)
+
+    def unwatch_game_folder(self, console_key, folder_name):
+        """Снимает наблюдение с папок удалённой игры."""
+        keys = [key for key, value in self._game_folders.items() if value == (console_key, folder_name)]
+        watched = {self._norm(path): path for path in self._watcher.directories()}
+        for key in keys:
+            del self._game_folders[key]
+            if key in watched:
+                self._watcher.removePath(watched[key])
+
+    def _on_directory_changed(self, path):
+        key = self._norm(path)
+        if key in self._roots:
+            pending = self._pending.setdefault(self._roots[key], [set(), False])
+            pending[1] = True
+        elif key in self._game_folders:
+            console_key, folder_name = self._game_folders[key]
+            self._pending.setdefault(console_key, [set(), False])[0].add(folder_name)
+        else:
+            return
+        # Каждое новое событие откладывает проверку (дебаунс)
+        self._debounce_timer.start()
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        for console_key, (folder_names, root_changed) in pending.items():
+            logger.info(f"Изменения в {console_key}: папок {len(folder_names)}, корень изменён: {root_changed}.")
+            self.changes_detected.emit(console_key, sorted(folder_names), root_changed)
@@ -2,7 +2,6 @@
 
 import os
 import logging
-import re
 from PyQt5.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -11,10 +10,15 @@ from PyQt5.QtWidgets import (
     QFrame,
     QTextBrowser,
     QPushButton,
-    QDialog
+    QDialog,
+    QListWidget
 )
 from PyQt5.QtCore import QSize, Qt, pyqtSignal, QRect, QUrl, QPoint, QCoreApplication, QEvent
-from PyQt5.QtGui import QPixmap, QColor, QPainter, QFont, QTextCursor
+from PyQt5.QtGui import QPixmap, QColor, QPainter, QFont, QTextCursor, QDesktopServices
+
+# extract_short_info не зависит от Qt (нужна и консольному индексатору)
+from game_info import extract_short_info
+from headers import describe_header
 
 logger = logging.getLogger(__name__)
 
@@ -23,82 +27,19 @@ ITEM_WIDTH = 180
 ITEM_HEIGHT = 220
 BORDER_RADIUS = 10
 
-# ----------------------------------------------------------------------
-# ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
-# ----------------------------------------------------------------------
-
-def extract_short_info(html_content):
-    """
-    Извлекает основные детали (год, разработчик, оценка критиков и т.д.) из HTML для тултипа.
-    Поля, которые не удалось спарсить (возвращают '???'), исключаются из итогового описания.
-    """
-    
-    # Полный список мета-полей для использования в lookahead
-    META_FIELDS = ["Дата выхода", "Разработчик", "Издатель", "Количество игроков", "Жанр", "Доп. детали", "Год", "Оценка критиков", "Язык игры"]
-
-    # Создаем строку-разделитель, которая ищет любое название поля, завершающееся двоеточием
-    field_separators = "|".join([re.escape(f + ":") for f in META_FIELDS])
-
-    def get_value(field_name, content):
-        """Вспомогательная функция для надежного извлечения значения поля по его имени."""
-        
-        # Регулярное выражение для извлечения значения поля
-        pattern = re.search(
-            # Start: Имя поля: и опциональные пробелы
-            rf'{re.escape(field_name)}:\s*'
-            # Value: Нежадный захват (.*?)
-            r'(.*?)'
-            # Lookahead (Конец): Остановка перед следующим полем, блочным тегом или концом строки.
-            rf'(?=\s*(?:<[^>]+>)*\s*(?:{field_separators})|\s*</p>|\s*</li>|\s*</div>|$)',
-            content,
-            re.IGNORECASE | re.DOTALL
-        )
-
-        if pattern:
-            raw_value = pattern.group(1).strip()
-            
-            # Агрессивно удаляем ВСЕ HTML-теги и сущности
-            clean_value = re.sub(r'<[^>]+>', '', raw_value).strip()
-            clean_value = clean_value.replace('&nbsp;', ' ').strip()
-
-            return clean_value if clean_value else '???'
-
-        return '???'
-
-    # --- 1. Парсинг основных полей ---
-    dev_data = get_value("Разработчик", html_content)
-    lang_data = get_value("Количество игроков", html_content)
-
-    # --- 2. Парсинг Года ---
-    year_data = get_value("Год", html_content)
-    year_match = re.search(r'(\d{4})', year_data)
-    year = year_match.group(1) if year_match else '???'
-    
-    if year == '???':
-        year_data_full = get_value("Дата выхода", html_content)
-        year_match = re.search(r'(\d{4})', year_data_full)
-        year = year_match.group(1) if year_match else '???'
-    
-    # --- 3. Обработка ОЦЕНКИ КРИТИКОВ ---
-    critics_rating_data = get_value("Оценка критиков", html_content)
-    
-    # ----------------------------------------------------------------------------------
-    # --- 4. Формирование итоговой строки (С УСЛОВИЕМ) ---
-    # ----------------------------------------------------------------------------------
-    info_parts = []
-    
-    # Вспомогательная функция для добавления строки только при наличии данных
-    def add_info_part(label, data):
-        if data != '???':
-            info_parts.append(f"{label}: {data}")
-
-    add_info_part("Разработчик", dev_data)
-    add_info_part("Год", year)
-    add_info_part("Количество игроков", lang_data)
-    add_info_part("Оценка критиков", critics_rating_data)
-    
-    return "\n".join(info_parts)
+# Статусы дампа из DAT-файлов для тултипа
+DAT_STATUS_LABELS = {
+    "verified": "✔ проверенный дамп",
+    "good": "✓ известный дамп",
+    "baddump": "⚠ плохой дамп",
+}
 
+# Проблемные архивы (см. archives.py) для тултипа
+ARCHIVE_STATUS_LABELS = {
+    "empty": "⚠ В архиве нет ROM'ов",
+    "foreign": "⚠ В архиве ROM другой системы",
+    "unreadable": "⚠ Архив повреждён или не читается",
+}
 
 # ----------------------------------------------------------------------
 # КЛАСС ЭЛЕМЕНТА ИГРЫ (GameItem)
@@ -109,7 +50,7 @@ class GameItem(QFrame):
     game_launched = pyqtSignal(str)
     show_description_requested = pyqtSignal(str)
 
-    def __init__(self, game_folder, rom_path, description, item_width, item_height, screenshots, parent=None):
+    def __init__(self, game_folder, rom_path, description, item_width, item_height, screenshots, title=None, parent=None):
 
         self.item_width = item_width
         self.item_height = item_height
@@ -119,15 +60,20 @@ class GameItem(QFrame):
         self.setFixedSize(item_width, item_height)
         self.setCursor(Qt.PointingHandCursor)
 
-        # Тултип отображает КРАТКОЕ описание (description)
-        self.setToolTip(f"**{os.path.basename(game_folder)}**\n\n{description}")
-
         self.game_folder = game_folder
         self.rom_path = rom_path
         self.description = description
         self.screenshots = screenshots
+        self.cover_path = None
+        self.dat_entry = None
+        self.archive_status = None
+        self.header = None
 
-        title = os.path.basename(game_folder)
+        # Имя папки, у многодисковой игры — без пометки '(Disc 1)'
+        self.title = title or os.path.basename(game_folder)
+
+        # Тултип отображает КРАТКОЕ описание (description)
+        self._update_tooltip()
 
         # Макет
         self.layout = QVBoxLayout(self)
@@ -145,7 +91,7 @@ class GameItem(QFrame):
         self.image_label.setPixmap(self._create_placeholder_pixmap())
 
         # 2. Название игры
-        self.title_label = QLabel(title)
+        self.title_label = QLabel(self.title)
         self.title_label.setObjectName("GameItemTitle")
         self.title_label.setAlignment(Qt.AlignCenter | Qt.AlignTop)
         self.title_label.setFont(QFont("Segoe UI", 10))
@@ -177,6 +123,47 @@ class GameItem(QFrame):
             }}
         """)
 
+    def update_game_data(self, rom_path, description, screenshots):
+        """Обновляет данные виджета после повторной проверки папки игры."""
+        self.rom_path = rom_path
+        self.description = description
+        self.screenshots = screenshots
+        self._update_tooltip()
+
+    def set_dat_entry(self, dat_entry, use_canonical_title=True):
+        """Применяет результат сопоставления с DAT (No-Intro/Redump): имя, регион, статус дампа."""
+        self.dat_entry = dat_entry
+        if dat_entry is not None and use_canonical_title:
+            self.title_label.setText(dat_entry.name)
+        else:
+            self.title_label.setText(self.title)
+        self._update_tooltip()
+
+    def set_archive_status(self, archive_status):
+        """Помечает игру в пустом, «чужом» или повреждённом архиве."""
+        if archive_status != self.archive_status:
+            self.archive_status = archive_status
+            self._update_tooltip()
+
+    def set_header(self, header):
+        """Метаданные из заголовка ROM'а (регион, серийный номер, маппер) для тултипа."""
+        if header != self.header:
+            self.header = header
+            self._update_tooltip()
+
+    def _update_tooltip(self):
+        tooltip = f"**{self.title}**\n\n{self.description}"
+        header_details = describe_header(self.header)
+        if header_details:
+            tooltip += f"\n\n{header_details}"
+        if self.dat_entry is not None:
+            status = DAT_STATUS_LABELS.get(self.dat_entry.status, self.dat_entry.status)
+            region = f", {self.dat_entry.region}" if self.dat_entry.region else ""
+            tooltip += f"\n\n{self.dat_entry.name}\n{self.dat_entry.source}{region}: {status}"
+        if self.archive_status in ARCHIVE_STATUS_LABELS:
+            tooltip += f"\n\n{ARCHIVE_STATUS_LABELS[self.archive_status]}"
+        self.setToolTip(tooltip)
+
     def set_cover_pixmap(self, pixmap):
         """
         Устанавливает загруженное изображение на метку обложки.
@@ -451,4 +438,57 @@ class DescriptionWindow(QDialog):
         QCoreApplication.processEvents()
         cursor = self.browser.textCursor()
         cursor.setPosition(0)
-        self.browser.setTextCursor(cursor)
\ No newline at end of file
+        self.browser.setTextCursor(cursor)
+
+
+# ----------------------------------------------------------------------
+# КЛАСС СПИСКА ПАПОК БЕЗ ROM'ОВ (EmptyFoldersWindow)
+# ----------------------------------------------------------------------
+class EmptyFoldersWindow(QDialog):
+    """Список папок консоли, в которых не нашлось ROM'а, — чтобы их разобрать или удалить."""
+
+    def __init__(self, console_name, folder_paths, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Папки без ROM'ов: {console_name}")
+        self.setMinimumSize(600, 400)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+
+        layout = QVBoxLayout(self)
+        hint = QLabel(
+            f"В этих папках ({len(folder_paths)}) не найдено ни одного ROM'а. "
+            "Двойной щелчок открывает папку в проводнике."
+        )
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+
+        self.folder_list = QListWidget(self)
+        self.folder_list.addItems(folder_paths)
+        self.folder_list.itemDoubleClicked.connect(lambda item: self.open_folder(item.text()))
+        layout.addWidget(self.folder_list, 1)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch(1)
+        open_button = QPushButton("Открыть папку")
+        open_button.clicked.connect(self._open_selected)
+        button_layout.addWidget(open_button)
+        close_button = QPushButton("Закрыть")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+        self.setStyleSheet("""
+            QDialog { background-color: #2a2a2a; }
+            QLabel { color: #DCDCDC; }
+            QListWidget { background-color: #1a1a1a; color: #DCDCDC; border: 1px solid #444444; }
+            QPushButton { background-color: #444444; color: #FFFFFF; border: none; padding: 5px 12px; border-radius: 5px; }
+            QPushButton:hover { background-color: #555555; }
+        """)
+
+    def _open_selected(self):
+        item = self.folder_list.currentItem()
+        if item is not None:
+            self.open_folder(item.text())
+
+    @staticmethod
+    def open_folder(folder_path):
+        QDesktopServices.openUrl(QUrl.fromLocalFile(folder_path))